@@ -2,10 +2,66 @@
 Deep Research Multi-Agent System
 
 A comprehensive research system built with the deepagents framework.
+
+Modules inside this directory import each other by top-level name (`config`,
+`utils.x`, `state`, ...). Importing them through the package as well
+(`deep_research.utils.x`) would load a second copy with its own settings,
+caches and singletons, so `deep_research.<name>` is aliased to the top-level
+module of the same name instead.
 """
 
-from .state import ResearchFlowState
-from .agents.clarifier import clarifier_agent
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+
+class _AliasLoader(importlib.abc.Loader):
+    def __init__(self, target: str):
+        self.target = target
+        self._spec = None
+
+    def create_module(self, spec):
+        module = importlib.import_module(self.target)
+        self._spec = module.__spec__
+        return module
+
+    def exec_module(self, module):
+        # The import system stamped the alias spec on the module; restore the real one
+        module.__spec__ = self._spec
+
+
+class _AliasFinder(importlib.abc.MetaPathFinder):
+    """Resolves `deep_research.<name>` to the already-importable top-level `<name>`."""
+
+    prefix = __name__ + "."
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not fullname.startswith(self.prefix):
+            return None
+        target_name = fullname[len(self.prefix):]
+        if importlib.util.find_spec(target_name.split(".")[0]) is None:
+            return None
+        return importlib.util.spec_from_loader(fullname, _AliasLoader(target_name))
+
+
+if not any(isinstance(finder, _AliasFinder) for finder in sys.meta_path):
+    sys.meta_path.insert(0, _AliasFinder())
+
+from .state import ResearchFlowState  # noqa: E402
 
 __version__ = "0.1.0"
-__all__ = ["ResearchFlowState", "clarifier_agent"]
\ No newline at end of file
+__all__ = ["ResearchFlowState", "clarifier_agent"]
+
+
+def __getattr__(name):
+    # Built on first use (agents/registry.py)
+    if name == "clarifier_agent":
+        from agents.registry import get_agent
+        return get_agent("clarifier")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -12,7 +12,8 @@ from deepagents import create_deep_agent, ToolInterruptConfig
 from state import ResearchFlowState
 from utils.prompts import CLARIFIER_AGENT_PROMPT
 from tools.clarification import ask_clarifying_question, finalize_clarified_query
-from config.models import get_model
+from config import settings
+from config.models import get_model, get_step_budget
 
 
 def create_clarifier_agent():
@@ -47,6 +48,9 @@ def create_clarifier_agent():
         tools=tools,
         instructions=CLARIFIER_AGENT_PROMPT,
         state_schema=ResearchFlowState,
+        # Turn budget and loop guard (deepagents/loop_guard.py)
+        max_steps=get_step_budget("clarifier"),
+        detect_loops=settings.LOOP_DETECTION_ENABLED,
         # Include built-in file tools plus custom clarification tools
         builtin_tools=["write_file", "read_file", "ls", "edit_file"],
         interrupt_config=interrupt_config,
@@ -56,5 +60,6 @@ def create_clarifier_agent():
     return agent
 
 
-# Create the agent instance
-clarifier_agent = create_clarifier_agent()
\ No newline at end of file
+# Built on first use by agents/registry.py, so importing this module stays cheap
+from agents.registry import lazy_agent_attribute
+__getattr__ = lazy_agent_attribute(__name__, "clarifier_agent", "clarifier")
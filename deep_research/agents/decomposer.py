@@ -11,7 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from deepagents import create_deep_agent
 from state import ResearchFlowState
 from utils.prompts import DECOMPOSER_AGENT_PROMPT
-from config.models import get_model
+from config import settings
+from config.models import get_model, get_step_budget
 
 
 def create_decomposer_agent():
@@ -32,6 +33,9 @@ def create_decomposer_agent():
         tools=tools,
         instructions=DECOMPOSER_AGENT_PROMPT,
         state_schema=ResearchFlowState,
+        # Turn budget and loop guard (deepagents/loop_guard.py)
+        max_steps=get_step_budget("decomposer"),
+        detect_loops=settings.LOOP_DETECTION_ENABLED,
         # Only need the built-in file tools: write_file, read_file, ls, edit_file
         builtin_tools=["write_file", "read_file", "ls", "edit_file"],
         model=get_model("decomposer")
@@ -40,5 +44,6 @@ def create_decomposer_agent():
     return agent
 
 
-# Create the agent instance
-decomposer_agent = create_decomposer_agent()
\ No newline at end of file
+# Built on first use by agents/registry.py, so importing this module stays cheap
+from agents.registry import lazy_agent_attribute
+__getattr__ = lazy_agent_attribute(__name__, "decomposer_agent", "decomposer")
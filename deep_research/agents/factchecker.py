@@ -12,7 +12,8 @@ sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__f
 from deepagents import create_deep_agent
 from state import ResearchFlowState
 from utils.prompts import FACTCHECKER_AGENT_PROMPT
-from config.models import get_model
+from config import settings
+from config.models import get_model, get_pre_model_hook, get_step_budget
 
 
 def create_factchecker_agent():
@@ -31,13 +32,21 @@ def create_factchecker_agent():
         tools=[],  # No custom tools needed, just built-in file operations
         instructions=FACTCHECKER_AGENT_PROMPT,
         state_schema=ResearchFlowState,
+        # Turn budget and loop guard (deepagents/loop_guard.py)
+        max_steps=get_step_budget("factchecker"),
+        detect_loops=settings.LOOP_DETECTION_ENABLED,
         # Include built-in file tools for reading summaries/raw data and writing fact-check report
         builtin_tools=["write_file", "read_file", "ls", "edit_file"],
-        model=get_model("factchecker")
+        model=get_model("factchecker"),
+        # Keep per-turn input flat as read_file results pile up
+        pre_model_hook=get_pre_model_hook("factchecker"),
+        # Batches of read_file calls in one turn run concurrently
+        tool_parallelism=settings.TOOL_PARALLELISM
     )
     
     return agent
 
 
-# Create the agent instance
-factchecker_agent = create_factchecker_agent()
\ No newline at end of file
+# Built on first use by agents/registry.py, so importing this module stays cheap
+from agents.registry import lazy_agent_attribute
+__getattr__ = lazy_agent_attribute(__name__, "factchecker_agent", "factchecker")
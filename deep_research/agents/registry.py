@@ -0,0 +1,57 @@
+"""
+Lazy agent registry.
+
+Agents are compiled on first use instead of at import time, so importing the
+workflow (API workers, CLI runs, LangGraph Studio) does not build models, deep
+agents or the scraper's ReAct agent until a run actually reaches them.
+
+The agent modules still expose `<name>_agent` attributes for existing imports;
+those resolve through get_agent() as well.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importlib
+import threading
+from typing import Any, Dict, Tuple
+
+# agent name -> (module, factory function)
+AGENT_FACTORIES: Dict[str, Tuple[str, str]] = {
+    "clarifier": ("agents.clarifier", "create_clarifier_agent"),
+    "decomposer": ("agents.decomposer", "create_decomposer_agent"),
+    "strategist": ("agents.strategist", "create_strategist_agent"),
+    "researcher": ("agents.researcher", "create_researcher_custom_agent"),
+    "factchecker": ("agents.factchecker", "create_factchecker_agent"),
+    "synthesizer": ("agents.synthesizer", "create_synthesizer_agent"),
+    "reviewer": ("agents.reviewer", "create_reviewer_agent"),
+}
+
+_agents: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def get_agent(name: str) -> Any:
+    """Return the named agent, building it on first use (thread-safe, once per process)."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    if name not in AGENT_FACTORIES:
+        raise ValueError(f"Unknown agent '{name}'. Available: {sorted(AGENT_FACTORIES)}")
+    with _lock:
+        if name not in _agents:
+            module_name, factory = AGENT_FACTORIES[name]
+            _agents[name] = getattr(importlib.import_module(module_name), factory)()
+        return _agents[name]
+
+
+def lazy_agent_attribute(module_name: str, attribute: str, agent_name: str):
+    """Build a module-level __getattr__ that serves `attribute` from the registry."""
+
+    def __getattr__(name: str) -> Any:
+        if name == attribute:
+            return get_agent(agent_name)
+        raise AttributeError(f"module '{module_name}' has no attribute '{name}'")
+
+    return __getattr__
@@ -54,5 +54,6 @@ def create_researcher_custom_agent() -> CustomSubAgent:
     return researcher_custom_agent
 
 
-# Create the researcher agent instance
-researcher_agent = create_researcher_custom_agent()
\ No newline at end of file
+# Built on first use by agents/registry.py, so importing this module stays cheap
+from agents.registry import lazy_agent_attribute
+__getattr__ = lazy_agent_attribute(__name__, "researcher_agent", "researcher")
@@ -11,7 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from deepagents import create_deep_agent
 from state import ResearchFlowState
 from utils.prompts import STRATEGIST_AGENT_PROMPT
-from config.models import get_model
+from config import settings
+from config.models import get_model, get_step_budget
 
 
 def create_strategist_agent():
@@ -35,6 +36,9 @@ def create_strategist_agent():
         tools=tools,
         instructions=STRATEGIST_AGENT_PROMPT,
         state_schema=ResearchFlowState,
+        # Turn budget and loop guard (deepagents/loop_guard.py)
+        max_steps=get_step_budget("strategist"),
+        detect_loops=settings.LOOP_DETECTION_ENABLED,
         # Only need the built-in file tools: write_file, read_file, ls, edit_file
         builtin_tools=["write_file", "read_file", "ls", "edit_file"],
         model=get_model("strategist")
@@ -43,5 +47,6 @@ def create_strategist_agent():
     return agent
 
 
-# Create the agent instance
-strategist_agent = create_strategist_agent()
\ No newline at end of file
+# Built on first use by agents/registry.py, so importing this module stays cheap
+from agents.registry import lazy_agent_attribute
+__getattr__ = lazy_agent_attribute(__name__, "strategist_agent", "strategist")
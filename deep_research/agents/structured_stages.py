@@ -0,0 +1,176 @@
+"""
+Single-shot structured mode for the decomposer and strategist.
+
+Both agents read one input file and write one JSON file, which as a ReAct loop
+costs 3-5 model turns (read_file, think, write_file, fix JSON, finish). Here the
+input files are put into the prompt, the model is called once with
+with_structured_output against a pydantic schema of the output file, and the
+artifact is written in code. If an input is missing, the answer is unusable
+even after local repair and one retry (utils/structured_output.py), the call
+fails with a transient provider error after the resilience policy's retries, or
+the artifact cannot be serialized, the runner returns None and the caller falls
+back to the agent loop.
+
+Enabled per stage with DR_STRUCTURED_STAGES (default: decomposer,strategist).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Literal, Optional, Type
+
+from pydantic import BaseModel, Field
+
+from config import settings
+from config.models import get_model
+from state import ResearchFlowState, read_json, read_text
+from utils.prompt_builder import PromptBuilder
+from utils.prompts import DECOMPOSER_AGENT_PROMPT, STRATEGIST_AGENT_PROMPT, STRUCTURED_STAGE_NOTE
+from utils.resilience import is_retryable
+from utils.structured_output import StructuredOutputError, structured_output
+
+
+# --- subqueries.json ---
+
+class SubQuery(BaseModel):
+    id: int
+    query: str
+    priority: Literal["high", "medium", "low"]
+    freshness: Literal["recent", "any"]
+    description: str
+
+
+class SubQueryList(BaseModel):
+    subqueries: List[SubQuery] = Field(description="3-7 focused sub-queries covering the clarified objective")
+
+
+# --- research_plan.json ---
+
+class SearchStrategy(BaseModel):
+    primary_terms: List[str]
+    alternative_terms: List[str]
+    max_results: int
+    search_depth: Literal["basic", "advanced"]
+    time_range: Optional[Literal["day", "week", "month", "year"]]
+    preferred_sources: List[str]
+    include_domains: List[str]
+    exclude_domains: List[str]
+    backup_strategy: str
+
+
+class PlannedSubQuery(BaseModel):
+    id: int
+    query: str
+    priority: Literal["high", "medium", "low"]
+    freshness: Literal["recent", "any"]
+    search_strategy: SearchStrategy
+    expected_results: int
+    dependencies: List[str]
+    can_run_parallel: bool
+
+
+class ResearchPlan(BaseModel):
+    executive_summary: str
+    subqueries: List[PlannedSubQuery]
+    execution_order: List[int]
+    quality_criteria: List[str]
+
+
+@dataclass(frozen=True)
+class StructuredStage:
+    component: str
+    inputs: List[str]
+    output_file: str
+    schema: Type[BaseModel]
+    instructions: str
+    # Output model -> JSON-serializable file content
+    to_file: Callable[[BaseModel], Any]
+    # Rejects answers the agent loop would do better on (returns a reason, or None)
+    check: Callable[[BaseModel, ResearchFlowState], Optional[str]]
+
+
+def _check_subqueries(result: SubQueryList, state: ResearchFlowState) -> Optional[str]:
+    return None if result.subqueries else "no subqueries"
+
+
+def _check_plan(result: ResearchPlan, state: ResearchFlowState) -> Optional[str]:
+    expected = read_json(state, "subqueries.json", default=[]) or []
+    if len(result.subqueries) < len(expected):
+        return f"plan covers {len(result.subqueries)} of {len(expected)} subqueries"
+    return None
+
+
+STAGES: Dict[str, StructuredStage] = {
+    "decomposer": StructuredStage(
+        component="decomposer",
+        inputs=["clarified_query.md"],
+        output_file="subqueries.json",
+        schema=SubQueryList,
+        instructions=DECOMPOSER_AGENT_PROMPT,
+        to_file=lambda result: [sq.model_dump() for sq in result.subqueries],
+        check=_check_subqueries,
+    ),
+    "strategist": StructuredStage(
+        component="strategist",
+        inputs=["subqueries.json"],
+        output_file="research_plan.json",
+        schema=ResearchPlan,
+        instructions=STRATEGIST_AGENT_PROMPT,
+        to_file=lambda result: result.model_dump(),
+        check=_check_plan,
+    ),
+}
+
+# Agent instructions first (shared with the agent loop), then the single-shot note
+_prompts: Dict[str, PromptBuilder] = {
+    name: PromptBuilder(f"{name}_structured", stage.instructions + STRUCTURED_STAGE_NOTE.format(output_file=stage.output_file))
+    for name, stage in STAGES.items()
+}
+
+
+def run_structured_stage(name: str, state: ResearchFlowState) -> Optional[Dict[str, str]]:
+    """
+    Run a stage as one structured call. Returns the merged files, or None when the
+    stage is not enabled or did not produce a usable artifact (use the agent loop).
+    """
+    stage = STAGES.get(name)
+    if stage is None or name not in settings.STRUCTURED_STAGES:
+        return None
+
+    inputs = [(path, read_text(state, path, default="")) for path in stage.inputs]
+    missing = [path for path, text in inputs if not text.strip()]
+    if missing:
+        print(f"[STRUCTURED STAGE] {name}: missing {', '.join(missing)}; using the agent loop")
+        return None
+
+    started = time.perf_counter()
+    try:
+        result = structured_output(get_model(stage.component), stage.schema, stage.component).invoke(
+            _prompts[name].messages(*inputs)
+        )
+    except StructuredOutputError as e:
+        print(f"[STRUCTURED STAGE] {name}: {str(e)[:200]}; using the agent loop")
+        return None
+    except Exception as e:
+        # Transient provider errors that outlasted the retries; the agent loop may still get through
+        if not is_retryable(e):
+            raise
+        print(f"[STRUCTURED STAGE] {name}: {type(e).__name__} after retries ({str(e)[:200]}); using the agent loop")
+        return None
+    reason = stage.check(result, state)
+    if reason:
+        print(f"[STRUCTURED STAGE] {name}: {reason}; using the agent loop")
+        return None
+
+    try:
+        content = json.dumps(stage.to_file(result), indent=2, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        print(f"[STRUCTURED STAGE] {name}: could not write {stage.output_file} ({e}); using the agent loop")
+        return None
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    print(f"[STRUCTURED STAGE] {name}: wrote {stage.output_file} in one call ({latency_ms}ms)")
+    return {**state.get("files", {}), stage.output_file: content}
@@ -26,7 +26,7 @@ env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__
 # Use override=True so the repo's .env values win over any shell defaults
 load_dotenv(env_path, override=True)
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse
 from pydantic import BaseModel, Field
@@ -35,6 +35,13 @@ from sse_starlette.sse import EventSourceResponse
 # Import LangGraph workflow
 from graphs.workflow import graph  # Import the graph, not the compiled app
 from state import ResearchFlowState, read_text, read_json
+from utils.budget import get_accountant, tenant_for_api_key
+from utils.cascade import cascade_report
+from utils.prompt_builder import prompt_cache_report
+from utils.rate_limit import headroom as rate_limit_headroom
+from utils.recording import save_fixtures
+from utils.structured_output import structured_output_report
+from utils.usage import usage_report
 from langgraph.checkpoint.memory import MemorySaver
 
 # Thread management
@@ -69,6 +76,10 @@ class ResearchStatus(BaseModel):
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
     error: Optional[str] = None
+    search_credits: Optional[Dict[str, Any]] = None
+    prompt_cache: Optional[Dict[str, Any]] = None
+    structured_output: Optional[Dict[str, Any]] = None
+    cascade: Optional[Dict[str, Any]] = None
 
 
 class AgentMetadata(BaseModel):
@@ -221,7 +232,7 @@ def calculate_progress(node_name: str) -> int:
     return int((node_order / total_nodes) * 100) if total_nodes > 0 else 0
 
 
-async def run_research_workflow(thread_id: str, query: str):
+async def run_research_workflow(thread_id: str, query: str, tenant_id: Optional[str] = None):
     """
     Run the LangGraph workflow and track progress.
     This runs in the background and updates the thread state.
@@ -242,6 +253,9 @@ async def run_research_workflow(thread_id: str, query: str):
 
         # Config with thread_id for checkpointer
         config = {"configurable": {"thread_id": thread_id}}
+        if tenant_id:
+            # Search credit budgets are enforced per tenant as well as per run
+            config["configurable"]["tenant_id"] = tenant_id
 
         # Stream the workflow execution
         async for event in langgraph_app.astream(
@@ -307,6 +321,17 @@ async def run_research_workflow(thread_id: str, query: str):
 
         print(f"❌ Error in thread {thread_id}: {error_message}")
 
+    finally:
+        thread_manager.update_thread(thread_id, {
+            "search_credits": get_accountant().run_spend(thread_id),
+            "prompt_cache": prompt_cache_report(thread_id),
+            "structured_output": structured_output_report(thread_id),
+            "cascade": cascade_report(thread_id),
+            "usage": usage_report(thread_id),
+        })
+        # Persist recorded search/LLM traffic after each run (no-op unless DR_FIXTURE_MODE=record)
+        save_fixtures()
+
 
 # ===== API Endpoints =====
 
@@ -326,6 +351,12 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/rate-limits")
+async def rate_limits():
+    """Current LLM request/token headroom per model (client-side RPM/TPM buckets)."""
+    return {"models": rate_limit_headroom()}
+
+
 @app.get("/api/agents")
 async def list_agents():
     """Get metadata about all available agents."""
@@ -337,7 +368,8 @@ async def list_agents():
 @app.post("/api/research/start", response_model=ResearchResponse)
 async def start_research(
     request: ResearchRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    x_api_key: Optional[str] = Header(default=None),
 ):
     """
     Start a new research task.
@@ -348,8 +380,9 @@ async def start_research(
     # Create thread
     thread_id = thread_manager.create_thread(request.query)
 
-    # Start workflow in background
-    background_tasks.add_task(run_research_workflow, thread_id, request.query)
+    # Start workflow in background; the tenant comes from the API key, never from the request body
+    tenant_id = tenant_for_api_key(x_api_key)
+    background_tasks.add_task(run_research_workflow, thread_id, request.query, tenant_id)
 
     return ResearchResponse(
         thread_id=thread_id,
@@ -377,7 +410,11 @@ async def get_research_status(thread_id: str):
         progress_percentage=thread["progress_percentage"],
         started_at=thread["started_at"],
         completed_at=thread["completed_at"],
-        error=thread["error"]
+        error=thread["error"],
+        search_credits=thread.get("search_credits"),
+        prompt_cache=thread.get("prompt_cache"),
+        structured_output=thread.get("structured_output"),
+        cascade=thread.get("cascade")
     )
 
 
@@ -526,6 +563,26 @@ async def get_research_logs(thread_id: str):
     }
 
 
+@app.get("/api/research/usage/{thread_id}")
+async def get_research_usage(thread_id: str):
+    """
+    Get token, latency and cost accounting for a research thread.
+
+    Totals are broken down by workflow node, agent, subquery and model (most expensive
+    first). Finished runs return the report stored with the run; running ones a live view.
+    """
+    thread = thread_manager.get_thread(thread_id)
+
+    if not thread:
+        raise HTTPException(status_code=404, detail="Thread not found")
+
+    return {
+        "thread_id": thread_id,
+        "status": thread["status"],
+        "usage": thread.get("usage") or usage_report(thread_id)
+    }
+
+
 @app.post("/api/research/pdf/{thread_id}")
 async def generate_pdf(thread_id: str):
     """
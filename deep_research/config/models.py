@@ -1,9 +1,21 @@
-from langchain_openai import ChatOpenAI
+import os
+import threading
+from config import settings
+from utils.llm_cache import cache_enabled_for, get_llm_cache, samples_deterministically
+from utils.prompt_builder import PromptCacheTracker
+from utils.usage import UsageTracker
+from utils.cascade import ModelCascade
+
+# Fixture replay never reaches OpenAI, so it must not require a real key
+_api_key = None
+if settings.FIXTURE_MODE == "replay" and not os.environ.get("OPENAI_API_KEY"):
+    _api_key = "replay-without-key"
 
 # Model configurations to avoid typos when changing values
-GPT_5_NANO = ChatOpenAI(model="gpt-5-nano", temperature=0)
-GPT_5_MINI = ChatOpenAI(model="gpt-5-mini", temperature=0)
-GPT_5 = ChatOpenAI(model="gpt-5", temperature=0)
+# Retries, backoff and circuit breaking come from utils/resilience.py (see config/settings.py)
+GPT_5_NANO = "gpt-5-nano"
+GPT_5_MINI = "gpt-5-mini"
+GPT_5 = "gpt-5"
 
 # Simple dictionary mapping component names to their models
 MODELS = {
@@ -20,6 +32,86 @@ MODELS = {
     "summarizer_node": GPT_5_MINI,
 }
 
+# Clients are built on first use: importing langchain_openai and creating the
+# SDK clients is most of the cost of importing the workflow
+_SHARED_MODELS = {}
+# Per-component copies of the shared models: each carries its own prompt-cache
+# and usage trackers, plus the persistent response cache where enabled
+_COMPONENT_MODELS = {}
+_models_lock = threading.Lock()
+
+
+def _shared_model(model_name: str):
+    if model_name not in _SHARED_MODELS:
+        if settings.MODEL_PROVIDER == "fake":
+            # Offline, deterministic stand-in (utils/fake_models.py)
+            from utils.fake_models import FakeResearchChatModel
+            _SHARED_MODELS[model_name] = FakeResearchChatModel(model_name=model_name)
+        else:
+            from utils.chat_models import ResearchChatOpenAI
+            _SHARED_MODELS[model_name] = ResearchChatOpenAI(model=model_name, temperature=0, api_key=_api_key)
+    return _SHARED_MODELS[model_name]
+
+
+# Components whose every call starts with a static prefix below the provider's
+# prompt-cache minimum (see utils/prompt_builder.py): they never hit the cache
+_NO_PROMPT_CACHE = {"summarizer_node"}
+
+
+def _component_model(component_name: str, model_name: str):
+    key = (component_name, model_name)
+    with _models_lock:
+        if key not in _COMPONENT_MODELS:
+            model = _shared_model(model_name)
+            callbacks = [UsageTracker(component_name, model_name)]
+            if component_name not in _NO_PROMPT_CACHE:
+                callbacks.insert(0, PromptCacheTracker(component_name))
+            update = {"callbacks": callbacks}
+            # Only models that do not sample reuse earlier answers, unless sampling is allowed
+            if cache_enabled_for(component_name):
+                if samples_deterministically(model) or settings.LLM_CACHE_ALLOW_SAMPLING:
+                    update["cache"] = get_llm_cache()
+                else:
+                    print(
+                        f"[LLM CACHE] Warning: {component_name} is not cached: {model_name} samples. "
+                        "Set DR_LLM_CACHE_ALLOW_SAMPLING=true to cache one valid sample per request."
+                    )
+            if settings.MODEL_PROVIDER == "fake":
+                # Selects the fake model's scripted behavior for this component
+                update["component"] = component_name
+            _COMPONENT_MODELS[key] = model.model_copy(update=update)
+        return _COMPONENT_MODELS[key]
+
+
 def get_model(component_name: str):
     """Get model for a component"""
-    return MODELS.get(component_name, GPT_5_MINI)
\ No newline at end of file
+    return _component_model(component_name, MODELS.get(component_name, GPT_5_MINI))
+
+
+def get_cascade(component_name: str, validate=None):
+    """Cheap-first cascade for a structured-output component, or its plain model if not enabled.
+    `validate(result)` returns a reason to escalate, or None to accept the cheap answer."""
+    model = get_model(component_name)
+    if not settings.CASCADE_ENABLED or component_name not in settings.CASCADE_COMPONENTS:
+        return model
+    if model.model_name == GPT_5_NANO:
+        return model
+    cheap = _component_model(component_name, GPT_5_NANO)
+    return ModelCascade(component_name, [(cheap.model_name, cheap), (model.model_name, model)], validate=validate)
+
+
+def get_step_budget(component_name: str):
+    """Model turns a deep agent gets before it must wrap up (DR_AGENT_STEP_BUDGET[S])"""
+    for entry in settings.AGENT_STEP_BUDGETS:
+        name, _, budget = entry.partition("=")
+        if name.strip() == component_name and budget.strip().isdigit():
+            return int(budget)
+    return settings.AGENT_STEP_BUDGET
+
+
+def get_pre_model_hook(component_name: str):
+    """Context-compaction pre_model_hook for a deep agent, or None if not enabled for it"""
+    if component_name not in settings.COMPACTION_AGENTS:
+        return None
+    from deepagents import create_compaction_hook
+    return create_compaction_hook(settings.COMPACTION_TOKEN_BUDGET, keep_recent=settings.COMPACTION_KEEP_RECENT)
@@ -0,0 +1,212 @@
+"""
+Runtime settings for the research pipeline.
+
+Values are read once from the environment (or the repo's .env) so they can be tuned
+per deployment without code changes. Cost and latency optimizations of the
+pipeline (passage selection, batching, structured stages, the model cascade,
+two-phase search, novelty stop, compaction, the loop guard and step budgets) are
+on by default; each has a switch that restores the previous behaviour. Features
+that need per-deployment tuning or can change answers across runs (the LLM
+response cache, client-side rate limiting) are opt-in.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str, default: list[str]) -> list[str]:
+    raw = os.environ.get(name)
+    if raw is None:
+        return list(default)
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+# --- Resilience (retries, backoff, circuit breaker) ---
+
+# Attempts per call, including the first one
+RETRY_MAX_ATTEMPTS = _env_int("DR_RETRY_MAX_ATTEMPTS", 3)
+# Decorrelated-jitter backoff bounds, in seconds
+RETRY_BASE_DELAY = _env_float("DR_RETRY_BASE_DELAY", 2.0)
+RETRY_MAX_DELAY = _env_float("DR_RETRY_MAX_DELAY", 20.0)
+# Retries allowed per run (thread) and service before failing fast
+RETRY_BUDGET_PER_RUN = _env_int("DR_RETRY_BUDGET_PER_RUN", 30)
+# Consecutive failures that open the breaker, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = _env_int("DR_BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = _env_float("DR_BREAKER_RESET_TIMEOUT", 30.0)
+
+
+# --- Summarizer passage selection ---
+
+# Send only the most relevant passages of each raw page to the summarizer
+PASSAGE_SELECTION_ENABLED = _env_bool("DR_PASSAGE_SELECTION", True)
+# Token budget for the selected passages, and max number of passages
+PASSAGE_TOKEN_BUDGET = _env_int("DR_PASSAGE_TOKEN_BUDGET", 1500)
+PASSAGE_TOP_K = _env_int("DR_PASSAGE_TOP_K", 8)
+
+
+# --- Summarizer batching ---
+
+# Summarize several raw results of a subquery in one structured call (per-result calls on failure)
+SUMMARIZER_BATCH_ENABLED = _env_bool("DR_SUMMARIZER_BATCH", True)
+# Content tokens packed into one call, and max results per call
+SUMMARIZER_BATCH_TOKEN_BUDGET = _env_int("DR_SUMMARIZER_BATCH_TOKEN_BUDGET", 8000)
+SUMMARIZER_BATCH_MAX_RESULTS = _env_int("DR_SUMMARIZER_BATCH_MAX_RESULTS", 5)
+
+
+# --- Single-shot structured stages ---
+
+# Agents that run as one structured call, falling back to their agent loop on failure
+STRUCTURED_STAGES = _env_list("DR_STRUCTURED_STAGES", ["decomposer", "strategist"])
+
+
+# --- Deep agent tool execution ---
+
+# Max tool calls from one model turn run at once by the fact-checker, synthesizer and reviewer
+TOOL_PARALLELISM = _env_int("DR_TOOL_PARALLELISM", 8)
+
+
+# --- Deep agent loop guard ---
+
+# Answer repeated reads from earlier results; refuse identical repeats and oscillating edits
+LOOP_DETECTION_ENABLED = _env_bool("DR_LOOP_DETECTION", True)
+# Model turns per deep agent before it must write its output and stop;
+# override per agent with DR_AGENT_STEP_BUDGETS="factchecker=60,reviewer=30"
+AGENT_STEP_BUDGET = _env_int("DR_AGENT_STEP_BUDGET", 40)
+AGENT_STEP_BUDGETS = _env_list("DR_AGENT_STEP_BUDGETS", [])
+
+
+# --- Search provider ---
+
+# "tavily" (default), "local" for the offline local-corpus index, or "fake" (tools/fake_search.py)
+SEARCH_PROVIDER = os.environ.get("DR_SEARCH_PROVIDER", "tavily")
+# On-disk index for the local provider, and an optional directory to (re)ingest at startup
+LOCAL_CORPUS_INDEX = os.environ.get("DR_LOCAL_CORPUS_INDEX", os.path.join(".local_corpus", "index.sqlite"))
+LOCAL_CORPUS_DIR = os.environ.get("DR_LOCAL_CORPUS_DIR") or None
+
+
+# --- Record/replay fixtures ---
+
+# "off", "record" (capture search + LLM traffic) or "replay" (serve it back offline)
+FIXTURE_MODE = os.environ.get("DR_FIXTURE_MODE", "off").strip().lower()
+FIXTURE_PATH = os.environ.get("DR_FIXTURE_PATH", os.path.join("fixtures", "run.json.gz"))
+# Replay latency: "none", "recorded", "fixed:<ms>" or "lognormal:<median_ms>,<sigma>"
+FIXTURE_LATENCY = os.environ.get("DR_FIXTURE_LATENCY", "none")
+
+
+# --- Two-phase search ---
+
+# Search without raw page content, rank on snippets, then extract only the kept URLs
+TWO_PHASE_SEARCH = _env_bool("DR_TWO_PHASE_SEARCH", True)
+# Pages kept in the process-wide extraction cache (by canonical URL)
+EXTRACT_CACHE_SIZE = _env_int("DR_EXTRACT_CACHE_SIZE", 512)
+
+
+# --- Raw content normalization ---
+
+# Per-document size cap (characters) after boilerplate stripping; 0 disables the cap
+NORMALIZE_MAX_CHARS = _env_int("DR_NORMALIZE_MAX_CHARS", 20000)
+
+
+# --- Scraper early stopping ---
+
+# Stop issuing searches once a round adds little new material (see utils/novelty.py)
+NOVELTY_STOP_ENABLED = _env_bool("DR_NOVELTY_STOP", True)
+# Minimum share of new domains/shingles/entities a round must bring to keep searching
+NOVELTY_THRESHOLD = _env_float("DR_NOVELTY_THRESHOLD", 0.25)
+# Distinct results (above the scraper's score floor) after which searching stops
+NOVELTY_RESULT_QUOTA = _env_int("DR_NOVELTY_RESULT_QUOTA", 10)
+
+
+# --- Search credit budgets ---
+
+# Provider credits a single run (invocation or thread) may spend on search/extract calls
+SEARCH_CREDITS_PER_RUN = _env_int("DR_SEARCH_CREDITS_PER_RUN", 80)
+# Credits a tenant may spend within the rolling window (seconds)
+SEARCH_CREDITS_PER_TENANT = _env_int("DR_SEARCH_CREDITS_PER_TENANT", 1000)
+SEARCH_CREDITS_TENANT_WINDOW = _env_float("DR_SEARCH_CREDITS_TENANT_WINDOW", 86400.0)
+# API keys (X-API-Key header) and the tenant each belongs to, e.g. "k1=acme,k2=globex";
+# requests without a listed key share the "default" tenant
+TENANT_API_KEYS = _env_list("DR_TENANT_API_KEYS", [])
+
+
+# --- Persistent LLM response cache ---
+
+# Master switch for the on-disk cache (utils/llm_cache.py), opt-in; disabled automatically with fixtures
+LLM_CACHE_ENABLED = _env_bool("DR_LLM_CACHE", False)
+LLM_CACHE_PATH = os.environ.get("DR_LLM_CACHE_PATH", os.path.join(".llm_cache", "llm_cache.sqlite"))
+LLM_CACHE_MAX_MB = _env_int("DR_LLM_CACHE_MAX_MB", 256)
+# Components whose models use the cache (only models that do not sample, e.g. not gpt-5), and components forced to bypass it
+LLM_CACHE_COMPONENTS = _env_list("DR_LLM_CACHE_COMPONENTS", ["summarizer_node"])
+LLM_CACHE_BYPASS = _env_list("DR_LLM_CACHE_BYPASS", [])
+# Also cache models that sample (all gpt-5 models): a cached answer is one valid sample
+LLM_CACHE_ALLOW_SAMPLING = _env_bool("DR_LLM_CACHE_ALLOW_SAMPLING", False)
+
+
+# --- Deep agent context compaction ---
+
+# Agents whose model input is compacted to a token budget (deepagents.create_compaction_hook)
+COMPACTION_AGENTS = _env_list("DR_COMPACTION_AGENTS", ["factchecker", "synthesizer", "reviewer"])
+COMPACTION_TOKEN_BUDGET = _env_int("DR_COMPACTION_TOKEN_BUDGET", 60000)
+# Most recent messages that are always sent uncompacted
+COMPACTION_KEEP_RECENT = _env_int("DR_COMPACTION_KEEP_RECENT", 6)
+
+
+# --- Model cascade ---
+
+# Try the cheap tier first for these components and escalate only on failed validation (utils/cascade.py)
+CASCADE_ENABLED = _env_bool("DR_CASCADE", True)
+CASCADE_COMPONENTS = _env_list("DR_CASCADE_COMPONENTS", ["summarizer_node", "scraper_node"])
+# Self-reported confidence below this escalates to the component's regular model
+CASCADE_MIN_CONFIDENCE = _env_float("DR_CASCADE_MIN_CONFIDENCE", 0.6)
+
+
+# --- LLM rate limits ---
+
+# Client-side RPM/TPM token buckets shared by all runs (utils/rate_limit.py). Opt-in:
+# set the account's real tier limits below first, or it throttles below them
+RATE_LIMIT_ENABLED = _env_bool("DR_RATE_LIMIT", False)
+# Default per-model limits; override per model with DR_RATE_LIMITS="gpt-5=500:30000,gpt-5-mini=500:200000"
+RATE_LIMIT_RPM = _env_int("DR_RATE_LIMIT_RPM", 500)
+RATE_LIMIT_TPM = _env_int("DR_RATE_LIMIT_TPM", 200000)
+RATE_LIMITS = _env_list("DR_RATE_LIMITS", [])
+# Completion tokens reserved per call when the model sets no max_tokens
+RATE_LIMIT_COMPLETION_ESTIMATE = _env_int("DR_RATE_LIMIT_COMPLETION_ESTIMATE", 1000)
+
+
+# --- Fake providers (offline runs and performance tests) ---
+
+# "openai" (default) or "fake" for the deterministic offline model (utils/fake_models.py)
+MODEL_PROVIDER = os.environ.get("DR_MODEL_PROVIDER", "openai").strip().lower()
+FAKE_SEED = _env_int("DR_FAKE_SEED", 0)
+# Log-normal latency: median in ms and sigma
+FAKE_LLM_LATENCY_MS = _env_float("DR_FAKE_LLM_LATENCY_MS", 300.0)
+FAKE_LLM_LATENCY_SIGMA = _env_float("DR_FAKE_LLM_LATENCY_SIGMA", 0.5)
+FAKE_SEARCH_LATENCY_MS = _env_float("DR_FAKE_SEARCH_LATENCY_MS", 200.0)
+FAKE_SEARCH_LATENCY_SIGMA = _env_float("DR_FAKE_SEARCH_LATENCY_SIGMA", 0.5)
+# Log-normal sizes in tokens: free-text completions and fetched pages
+FAKE_COMPLETION_TOKENS = _env_int("DR_FAKE_COMPLETION_TOKENS", 400)
+FAKE_COMPLETION_SIGMA = _env_float("DR_FAKE_COMPLETION_SIGMA", 0.4)
+FAKE_PAGE_TOKENS = _env_int("DR_FAKE_PAGE_TOKENS", 1500)
+FAKE_PAGE_SIGMA = _env_float("DR_FAKE_PAGE_SIGMA", 0.6)
+# Subqueries the scripted decomposer writes
+FAKE_SUBQUERIES = _env_int("DR_FAKE_SUBQUERIES", 3)
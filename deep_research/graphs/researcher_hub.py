@@ -8,11 +8,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import json
 import threading
+from types import SimpleNamespace
 from langgraph.graph import StateGraph, END
 from langgraph.types import Send
 from state import ResearchFlowState, ResearcherState, read_json
-from agents.researcher import researcher_agent
+from agents.registry import get_agent
+from utils.rerank import default_engine
+from utils.run_context import run_scope
+from utils.usage import usage_scope
 from typing import Dict, Any, List
 
 # Semaphore to limit concurrent researcher executions to 2
@@ -32,6 +37,7 @@ def map_each_subquery(state: ResearcherState):
             "current_subquery": subquery,
             "current_subquery_index": idx,
             "files": state.get("files", {}),
+            "run_id": state.get("run_id"),
             "__metadata__": {"run_id": f"subquery_{idx}"}
         }        
         sends.append(Send("run_researcher", send_data))
@@ -39,8 +45,9 @@ def map_each_subquery(state: ResearcherState):
 
 
 def map_subqueries_node(state: ResearcherState) -> Dict[str, Any]:
-    """Dummy node that just passes state through (map happens via conditional edges)."""
-    return {"files": state.get("files", {})}
+    """Passes state through (map happens via conditional edges); makes sure the run has an id."""
+    with run_scope(state) as run_id:
+        return {"files": state.get("files", {}), "run_id": run_id}
 
 
 def run_researcher(state: ResearcherState) -> Dict[str, Any]:
@@ -58,7 +65,9 @@ def run_researcher(state: ResearcherState) -> Dict[str, Any]:
     
     _researcher_semaphore.acquire()
     try:
-        result = researcher_agent["graph"].invoke(state)
+        # Model calls in this researcher are attributed to its subquery in the usage report
+        with run_scope(state), usage_scope(subquery_idx if isinstance(subquery_idx, int) else None):
+            result = get_agent("researcher")["graph"].invoke(state)
         print(f"[RESEARCHER HUB] ✓ Subquery {subquery_idx} completed successfully")
         return {"files": result.get("files", {})}
     except Exception as e:
@@ -90,8 +99,43 @@ def run_researcher_merge(state: ResearcherState) -> Dict[str, Any]:
     """
     Merge function that combines results from all researcher agents.
     """
-    # The file_reducer in ResearchFlowState automatically merges files from parallel executions, so we just return the current state
-    return {"files": state.get("files", {})}
+    # The file_reducer in ResearchFlowState automatically merges files from parallel executions;
+    # on top of that, rank every stored source across subqueries for the fact-checker/synthesizer
+    files = dict(state.get("files", {}))
+    ranking = _global_source_ranking(files)
+    if ranking:
+        files["raw_data/global_ranking.json"] = json.dumps(ranking, indent=2)
+        print(f"[RESEARCHER HUB] Ranked {len(ranking)} sources across subqueries")
+    return {"files": files}
+
+
+def _global_source_ranking(files: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Rank all results from every subquery's metadata with the shared rerank engine."""
+    entries = []
+    for path, content in files.items():
+        if not (path.startswith("raw_data/subquery") and path.endswith("_metadata.json")):
+            continue
+        try:
+            metadata = json.loads(content)
+        except (TypeError, ValueError):
+            continue
+        for item in metadata.get("ranking", []):
+            entries.append({**item, "subquery_index": metadata.get("subquery_index")})
+    if not entries:
+        return []
+
+    candidates = [
+        SimpleNamespace(
+            url=e.get("url", ""), title=e.get("title", ""), content=e.get("snippet", ""),
+            score=e.get("score", 0.0), published_date=e.get("published_date"), source_type=e.get("source_type"),
+        )
+        for e in entries
+    ]
+    order, scores = default_engine.select(candidates)
+    return [
+        {"rank": rank, **entries[i], "global_score": round(float(scores[i]), 3)}
+        for rank, i in enumerate(order, 1)
+    ]
 
 
 def create_researcher_hub():
@@ -9,15 +9,11 @@ from langgraph.types import Send
 from state import ResearchFlowState
 from deepagents.state import file_reducer
 
-# Import all agent instances
-from agents.clarifier import clarifier_agent
-from agents.decomposer import decomposer_agent
-from agents.strategist import strategist_agent
-from agents.researcher import researcher_agent
-from agents.factchecker import factchecker_agent
-from agents.synthesizer import synthesizer_agent
-from agents.reviewer import reviewer_agent
+# Agents are built on first use, not at import (see agents/registry.py)
+from agents.registry import get_agent
+from agents.structured_stages import run_structured_stage
 from graphs.researcher_hub import researcher_hub_graph
+from utils.run_context import run_scope
 
 
 # --- Generic Agent Runner ---
@@ -26,35 +22,45 @@ def run_agent(agent, state: ResearchFlowState):
     """
     Generic runner for all sub agents
     """
-    result = agent.invoke(state)
+    with run_scope(state) as run_id:
+        result = agent.invoke(state)
     merged_files = {**state.get("files", {}), **result.get("files", {})}
-    return {"files": merged_files}
+    return {"files": merged_files, "run_id": run_id}
 
 
 # --- Individual Agent Runners ---
 
 def run_clarifier(state: ResearchFlowState):
-    return run_agent(clarifier_agent, state)
+    return run_agent(get_agent("clarifier"), state)
+
+
+def run_stage(name: str, state: ResearchFlowState):
+    """One structured call where the stage supports it, else the agent loop."""
+    with run_scope(state) as run_id:
+        files = run_structured_stage(name, state)
+    if files is not None:
+        return {"files": files, "run_id": run_id}
+    return run_agent(get_agent(name), {**state, "run_id": run_id})
 
 
 def run_decomposer(state: ResearchFlowState):
-    return run_agent(decomposer_agent, state)
+    return run_stage("decomposer", state)
 
 
 def run_strategist(state: ResearchFlowState):
-    return run_agent(strategist_agent, state)
+    return run_stage("strategist", state)
 
 
 def run_fact_checker(state: ResearchFlowState):
-    return run_agent(factchecker_agent, state)
+    return run_agent(get_agent("factchecker"), state)
 
 
 def run_synthesizer(state: ResearchFlowState):
-    return run_agent(synthesizer_agent, state)
+    return run_agent(get_agent("synthesizer"), state)
 
 
 def run_reviewer(state: ResearchFlowState):
-    return run_agent(reviewer_agent, state)
+    return run_agent(get_agent("reviewer"), state)
 
 
 
@@ -14,15 +14,11 @@ from langgraph.types import Send
 from state import ResearchFlowState
 from deepagents.state import file_reducer
 
-# Import all agent instances
-from agents.clarifier import clarifier_agent
-from agents.decomposer import decomposer_agent
-from agents.strategist import strategist_agent
-from agents.researcher import researcher_agent
-from agents.factchecker import factchecker_agent
-from agents.synthesizer import synthesizer_agent
-from agents.reviewer import reviewer_agent
+# Agents are built on first use, not at import (see agents/registry.py)
+from agents.registry import get_agent
+from agents.structured_stages import run_structured_stage
 from graphs.researcher_hub import researcher_hub_graph
+from utils.run_context import run_scope
 
 
 # Agent metadata for frontend
@@ -87,7 +83,8 @@ def run_agent_with_metadata(agent, state: ResearchFlowState, agent_name: str):
     }}
 
     # Run the agent
-    result = agent.invoke(state)
+    with run_scope(state) as run_id:
+        result = agent.invoke(state)
 
     # Merge files
     merged_files = {**state.get("files", {}), **result.get("files", {})}
@@ -95,6 +92,7 @@ def run_agent_with_metadata(agent, state: ResearchFlowState, agent_name: str):
     # Add completion metadata
     return {
         "files": merged_files,
+        "run_id": run_id,
         "__metadata__": {
             "agent": agent_name,
             "status": "completed"
@@ -104,22 +102,30 @@ def run_agent_with_metadata(agent, state: ResearchFlowState, agent_name: str):
 
 # Individual agent runners with metadata
 def run_clarifier(state: ResearchFlowState):
-    return run_agent_with_metadata(clarifier_agent, state, "clarifier")
+    return run_agent_with_metadata(get_agent("clarifier"), state, "clarifier")
+
+def run_stage_with_metadata(name: str, state: ResearchFlowState):
+    """One structured call where the stage supports it, else the agent loop."""
+    with run_scope(state) as run_id:
+        files = run_structured_stage(name, state)
+    if files is None:
+        return run_agent_with_metadata(get_agent(name), {**state, "run_id": run_id}, name)
+    return {"files": files, "run_id": run_id, "__metadata__": {"agent": name, "status": "completed"}}
 
 def run_decomposer(state: ResearchFlowState):
-    return run_agent_with_metadata(decomposer_agent, state, "decomposer")
+    return run_stage_with_metadata("decomposer", state)
 
 def run_strategist(state: ResearchFlowState):
-    return run_agent_with_metadata(strategist_agent, state, "strategist")
+    return run_stage_with_metadata("strategist", state)
 
 def run_fact_checker(state: ResearchFlowState):
-    return run_agent_with_metadata(factchecker_agent, state, "fact_checker")
+    return run_agent_with_metadata(get_agent("factchecker"), state, "fact_checker")
 
 def run_synthesizer(state: ResearchFlowState):
-    return run_agent_with_metadata(synthesizer_agent, state, "synthesizer")
+    return run_agent_with_metadata(get_agent("synthesizer"), state, "synthesizer")
 
 def run_reviewer(state: ResearchFlowState):
-    return run_agent_with_metadata(reviewer_agent, state, "reviewer")
+    return run_agent_with_metadata(get_agent("reviewer"), state, "reviewer")
 
 
 # Build the graph
@@ -6,22 +6,31 @@ Uses an LLM with Tavily tools to run searches for a subquery and save raw result
 import sys, os, json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
-from state import ResearcherState
+from state import ResearcherState, read_json
 from tools.web_search import (
     tavily_search,
     tavily_extract,
     parse_search_results,
     format_search_content_for_storage,
+    format_alternate_urls,
     filter_results_by_score,
-    rerank_results_by_source_type,
+    extract_pages,
     SearchResult,
 )
-from config.models import get_model
-from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage
+from config import settings
+from config.models import get_model, get_cascade
+from utils.budget import get_accountant
+from utils.dedup import canonical_url, collapse_near_duplicates, get_run_index
+from utils.normalize import normalize_documents
+from utils.novelty import NoveltyStopMiddleware, novelty_metrics
+from utils.rerank import engine_for
+from utils.run_context import current_run_id
+from utils.structured_output import structured_output
 from pydantic import BaseModel, Field, ValidationError
-from utils.prompts import SCRAPER_PROMPT
+from utils.prompt_builder import PromptBuilder
+from utils.prompts import SCRAPER_PROMPT, SCRAPER_EXTRACTION_PROMPT
 
 # --- Structured schema for scraper final output (what the LLM must return) ---
 
@@ -37,12 +46,25 @@ class ScraperOutput(BaseModel):
     results: List[TavilyResult]
     terms_used: List[str]
 
-# Use ReAct agent pattern to allow the LLM to decide when to use which tool and validate outputs and reiterate if needed
-llm = get_model("scraper_node")
-_scraper_node_agent = create_agent(
-    model=llm,
-    tools=[tavily_search, tavily_extract],
-)
+# Use ReAct agent pattern to allow the LLM to decide when to use which tool and validate outputs and reiterate if needed.
+# Compiled on first use so importing the workflow does not build it.
+@lru_cache(maxsize=1)
+def _scraper_node_agent():
+    from langchain.agents import create_agent
+    return create_agent(
+        model=get_model("scraper_node"),
+        tools=[tavily_search, tavily_extract],
+        middleware=[NoveltyStopMiddleware()],
+    )
+
+# Static instructions first, dynamic sections after (see utils/prompt_builder.py);
+# the extraction prompt is below the provider's prompt-cache minimum
+_search_prompt = PromptBuilder("scraper_node", SCRAPER_PROMPT)
+_extraction_prompt = PromptBuilder("scraper_node.extract", SCRAPER_EXTRACTION_PROMPT)
+
+# Each search round is a model step plus a tools step
+SCRAPER_RECURSION_LIMIT = 10
+MAX_SEARCH_ROUNDS = (SCRAPER_RECURSION_LIMIT - 1) // 2
 
 def scraper_node(state: ResearcherState) -> Dict[str, Any]:
     """Scraper node: run Tavily via LLM, process results, and save to files."""
@@ -58,15 +80,15 @@ def scraper_node(state: ResearcherState) -> Dict[str, Any]:
 
     try:
         # Step 1: Use ReAct agent to call Tavily tools and gather information
-        prompt = f"{SCRAPER_PROMPT}\n\nSubquery: {query_text}"
+        messages = _search_prompt.messages(("Subquery", query_text))
 
         # CRITICAL: Limit recursion to prevent token explosion
         # Most searches should complete in 5-8 tool calls max
         from langchain_core.runnables.config import RunnableConfig
-        config = RunnableConfig(recursion_limit=10)
+        config = RunnableConfig(recursion_limit=SCRAPER_RECURSION_LIMIT)
 
-        llm_res = _scraper_node_agent.invoke(
-            {"messages": [HumanMessage(content=prompt)]},
+        llm_res = _scraper_node_agent().invoke(
+            {"messages": messages},
             config=config
         )
         messages = llm_res.get("messages", [])
@@ -97,36 +119,41 @@ This search failed but processing continues with empty results.
             }
         }
     
-    # DEBUG: Log message count and approximate token usage
-    total_chars = sum(len(str(msg.content)) for msg in messages if hasattr(msg, 'content'))
-    print(f"[SCRAPER DEBUG] ReAct agent returned {len(messages)} messages, ~{total_chars} chars (~{total_chars//4} tokens)")
+    # DEBUG: Log message count and provider-reported token usage (full accounting in utils/usage.py)
+    usage = [getattr(msg, "usage_metadata", None) or {} for msg in messages]
+    input_tokens = sum(u.get("input_tokens", 0) for u in usage)
+    output_tokens = sum(u.get("output_tokens", 0) for u in usage)
+    print(f"[SCRAPER DEBUG] ReAct agent returned {len(messages)} messages, {input_tokens} prompt / {output_tokens} completion tokens")
 
     # Step 2: Extract tool results from messages and structure them with a second LLM call
     # CRITICAL FIX: Don't pass full messages (351k tokens!), extract only essential data
     
+    search_rounds = novelty_metrics(messages, MAX_SEARCH_ROUNDS)
+    if search_rounds["max_searches_avoided"]:
+        print(
+            f"[SCRAPER NODE] Early stop for subquery {idx}: at most "
+            f"~{search_rounds['max_searches_avoided']} searches avoided (round cap {MAX_SEARCH_ROUNDS})"
+        )
+
     tool_results_summary = _extract_tool_results_summary(messages)
+    # Full page text by URL; the structured call below only sees truncated content
+    raw_pages = _collect_raw_pages(messages)
     print(f"[SCRAPER DEBUG] Extracted tool results: {len(tool_results_summary)} chars (~{len(tool_results_summary)//4} tokens)")
     
-    # Build a concise prompt with just the extracted data
-    extraction_prompt = f"""Based on these search results, extract and structure the information.
-
-Original subquery: {subquery.get('query', '')}
-
-Tool Results:
-{tool_results_summary}
-
-Create a structured output with:
-- A list of the best 5-8 search results (URL, title, snippet, content, published date if available, and relevance score)
-- The search terms that were actually used
-
-Focus on the most relevant, high-quality results."""
-
-    # Use structured output to get ScraperOutput
-    structured_llm = llm.with_structured_output(ScraperOutput)
+    # Build a concise prompt with just the extracted data (static instructions first)
+    extraction_messages = _extraction_prompt.messages(
+        ("Original subquery", subquery.get('query', '')),
+        ("Tool Results", tool_results_summary),
+    )
+
+    # Use structured output to get ScraperOutput (cheap model first, escalating if results go missing)
+    validate = _structuring_validator(tool_results_summary)
+    # Malformed answers are repaired locally (valid results salvaged) before any retry
+    structured_llm = structured_output(get_cascade("scraper_node", validate=validate), ScraperOutput, "scraper_node")
     
     try:
         # Pass only the minimal context, not the entire conversation history
-        scraper_output = structured_llm.invoke([HumanMessage(content=extraction_prompt)])
+        scraper_output = structured_llm.invoke(extraction_messages)
         out = scraper_output.model_dump()
         print(f"[SCRAPER NODE] ✓ Successfully structured {len(out.get('results', []))} results for subquery {idx}")
     except (ValidationError, Exception) as e:
@@ -141,15 +168,36 @@ Focus on the most relevant, high-quality results."""
     results = _deduplicate_results(results)
     results = filter_results_by_score(results, min_score=0.2)
 
-    # Optional boosts based on subquery hints
-    prefs = []
-    if subquery.get("prefer_academic"): prefs.append("academic")
-    if subquery.get("include_news"):    prefs.append("news")
-    if prefs: results = rerank_results_by_source_type(results, prefs)
-
-    final = results[:5]
+    # Rank with the shared engine: provider score, domain authority, recency,
+    # preferred source types (plan + subquery hints) and an MMR diversity penalty
+    plan_entry = _plan_entry(state, subquery, idx)
+    prefs = list((plan_entry.get("search_strategy") or {}).get("preferred_sources") or [])
+    if subquery.get("prefer_academic") and "academic" not in prefs: prefs.append("academic")
+    if subquery.get("include_news") and "news" not in prefs:        prefs.append("news")
+    order, scores = engine_for(plan_entry.get("freshness")).select(results, preferred_sources=prefs)
+    rerank_scores = {results[i].url: round(float(scores[i]), 3) for i in order}
+    results = [results[i] for i in order]
+
+    # Skip results another subquery of this run already stored (same article, different search)
+    final, cross_duplicates = _select_run_unique(results, idx, limit=5)
+
+    # Two-phase search: full page text only for the results we keep (one batched extract)
+    extraction = None
+    if settings.TWO_PHASE_SEARCH:
+        missing = [r.url for r in final if canonical_url(r.url) not in raw_pages]
+        fetched, extraction = extract_pages(missing)
+        raw_pages.update(fetched)
     files = dict(state.get("files", {}))
 
+    # Strip boilerplate, site chrome and oversized pages before anything is stored
+    contents, norm_stats = normalize_documents(
+        [(r.url, raw_pages.get(canonical_url(r.url)) or r.content) for r in final]
+    )
+    normalization = {f"raw_data/subquery{idx}_result{i}.txt": s for i, s in enumerate(norm_stats)}
+    before = sum(s["tokens_before"] for s in norm_stats)
+    after = sum(s["tokens_after"] for s in norm_stats)
+    print(f"[SCRAPER NODE] Normalized {len(final)} results for subquery {idx}: ~{before} -> ~{after} tokens")
+
     # Write per-result files
     for i, r in enumerate(final):
         fname = f"raw_data/subquery{idx}_result{i}.txt"
@@ -160,9 +208,9 @@ Title: {r.title}
 Type: {r.source_type}
 Published: {r.published_date or 'Unknown'}
 Score: {r.score}
-
+{format_alternate_urls(r)}
 Content:
-{r.content}
+{contents[i]}
 
 Snippet:
 {r.snippet}
@@ -183,6 +231,36 @@ Subquery: {subquery.get('query', '')}
         "search_terms_used": used_terms,
         "results_count": len(final),
         "raw_data_files": [f"raw_data/subquery{idx}_result{i}.txt" for i in range(len(final))],
+        "alternate_urls": {
+            f"raw_data/subquery{idx}_result{i}.txt": r.alternate_urls
+            for i, r in enumerate(final) if r.alternate_urls
+        },
+        "cross_subquery_duplicates": cross_duplicates,
+        # Per-result features for the run-wide ranking in the researcher hub
+        "ranking": [
+            {
+                "file": f"raw_data/subquery{idx}_result{i}.txt",
+                "url": r.url,
+                "title": r.title,
+                "snippet": (r.snippet or r.content)[:300],
+                "source_type": r.source_type,
+                "published_date": r.published_date,
+                "score": r.score,
+                "rerank_score": rerank_scores.get(r.url),
+            }
+            for i, r in enumerate(final)
+        ],
+        "preferred_sources": prefs,
+        "extraction": extraction,
+        "search_rounds": search_rounds,
+        "search_credits": get_accountant().run_spend(current_run_id()),
+        "normalization": {
+            "per_result": normalization,
+            "bytes_before": sum(s["bytes_before"] for s in norm_stats),
+            "bytes_after": sum(s["bytes_after"] for s in norm_stats),
+            "tokens_before": before,
+            "tokens_after": after,
+        },
     }
     files[f"raw_data/subquery{idx}_metadata.json"] = json.dumps(metadata, indent=2)
 
@@ -229,11 +307,81 @@ def _extract_tool_results_summary(messages: List) -> str:
     return "\n\n".join(summaries) if summaries else "No tool results found"
 
 
+def _structuring_validator(tool_results_summary: str):
+    """Cascade check for the structuring pass: keep the URLs the searches actually returned."""
+    seen = set()
+    for chunk in tool_results_summary.split("\n\n"):
+        try:
+            seen.add(canonical_url(json.loads(chunk).get("url", "")))
+        except (ValueError, AttributeError):
+            continue
+    seen.discard("")
+    expected = min(3, len(seen))
+
+    def validate(output: ScraperOutput) -> Optional[str]:
+        kept = [r for r in output.results if r.url and r.title]
+        if len(kept) < expected:
+            return f"only {len(kept)} of {len(seen)} results structured"
+        return None
+
+    return validate
+
+
+def _collect_raw_pages(messages: List) -> Dict[str, str]:
+    """Map canonical URL -> raw page content from search/extract tool results."""
+    from langchain_core.messages import ToolMessage
+
+    pages: Dict[str, str] = {}
+    for msg in messages:
+        if not isinstance(msg, ToolMessage):
+            continue
+        try:
+            data = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(data, dict):
+            continue
+        for result in data.get("results", []) or []:
+            raw = result.get("raw_content")
+            url = result.get("url")
+            if raw and url and len(raw) > len(pages.get(canonical_url(url), "")):
+                pages[canonical_url(url)] = raw
+    return pages
+
+
+def _plan_entry(state: ResearcherState, subquery: Dict[str, Any], idx: int) -> Dict[str, Any]:
+    """The research_plan.json entry for this subquery (matched by query text, then position)."""
+    plan = read_json(state, "research_plan.json", default={}) or {}
+    entries = plan.get("subqueries", []) if isinstance(plan, dict) else []
+    query = subquery.get("query", "")
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("query") == query:
+            return entry
+    if idx < len(entries) and isinstance(entries[idx], dict):
+        return entries[idx]
+    return {}
+
+
 def _deduplicate_results(results: List[SearchResult]) -> List[SearchResult]:
-    """Remove duplicate results by URL."""
-    seen, uniq = set(), []
+    """Collapse exact and near-duplicate results (mirrors, syndication, AMP/print variants)."""
+    return collapse_near_duplicates(results)
+
+
+def _select_run_unique(results: List[SearchResult], idx: int, limit: int):
+    """
+    Pick up to `limit` results that no other subquery in this run has already stored.
+    Returns the selection and a list of {url, duplicate_of} records for skipped results.
+    """
+    run_index = get_run_index(current_run_id())
+    selected, skipped = [], []
     for r in results:
-        if r.url not in seen:
-            seen.add(r.url)
-            uniq.append(r)
-    return uniq
+        if len(selected) >= limit:
+            break
+        owner = f"raw_data/subquery{idx}_result{len(selected)}.txt"
+        existing = run_index.claim(r, owner)
+        if existing is not None and not existing.startswith(f"raw_data/subquery{idx}_"):
+            print(f"[SCRAPER NODE] Skipping {r.url}: near-duplicate of {existing}")
+            skipped.append({"url": r.url, "duplicate_of": existing})
+            continue
+        selected.append(r)
+    return selected, skipped
@@ -6,12 +6,19 @@ Reads raw search results and creates structured summaries using LLM.
 import sys, os, json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from state import ResearcherState, read_text, read_json
-from config.models import get_model
-from langchain_core.messages import HumanMessage
+from config.models import get_cascade
+from config import settings
+from utils.passages import select_passages
+from utils.tokens import estimate_tokens
+from utils.cascade import check_completeness, check_confidence
+from utils.prompt_builder import PromptBuilder
+from utils.structured_output import StructuredOutputError, structured_output
+from utils.prompts import SUMMARIZER_BATCH_PROMPT, SUMMARIZER_NODE_PROMPT
 from pydantic import BaseModel, Field
 from datetime import datetime
+import time
 
 
 # Schema for structured LLM output
@@ -25,6 +32,51 @@ class SummaryAnalysis(BaseModel):
     summary_text: str
     extracted_url: str
     extracted_title: str
+    confidence: Optional[float] = Field(None, description="0-1: how well the content supports this analysis")
+
+
+def _validate_summary(analysis: SummaryAnalysis) -> Optional[str]:
+    """Cascade check: a usable summary has findings and more than a one-liner."""
+    if not analysis.key_findings:
+        return "no key findings"
+    if len(analysis.summary_text.strip()) < 80:
+        return "short summary"
+    return None
+
+
+class BatchSummaryItem(SummaryAnalysis):
+    result_index: int = Field(description="N of the 'Result N' section this analysis is for")
+
+
+class BatchSummaryAnalysis(BaseModel):
+    summaries: List[BatchSummaryItem]
+
+
+def _check_batch_item(item: BatchSummaryItem) -> Optional[str]:
+    """The checks a single-result call gets, applied to one item of a packed answer."""
+    reason = check_completeness(item) or _validate_summary(item)
+    if reason is None and settings.CASCADE_ENABLED and "summarizer_node" in settings.CASCADE_COMPONENTS:
+        reason = check_confidence(item, settings.CASCADE_MIN_CONFIDENCE)
+    return reason
+
+
+def _validate_batch(batch: BatchSummaryAnalysis) -> Optional[str]:
+    """
+    Cascade check for a packed call: escalate only if no item is usable. Weak or
+    missing items are redone per document, so one bad item does not send the
+    whole batch to the expensive tier.
+    """
+    if not batch.summaries:
+        return "no summaries"
+    if all(_check_batch_item(item) for item in batch.summaries):
+        return "no valid summaries"
+    return None
+
+
+# Static instructions first, dynamic sections after (see utils/prompt_builder.py);
+# both are below the provider's prompt-cache minimum, so they are not cache-tracked
+_prompt = PromptBuilder("summarizer_node", SUMMARIZER_NODE_PROMPT)
+_batch_prompt = PromptBuilder("summarizer_node_batch", SUMMARIZER_BATCH_PROMPT)
 
 
 def summarizer_node(state: ResearcherState) -> Dict[str, Any]:
@@ -41,16 +93,40 @@ def summarizer_node(state: ResearcherState) -> Dict[str, Any]:
         return {"files": state.get("files", {})}
 
     files = dict(state.get("files", {}))
-    llm = get_model("summarizer_node")
+    llm = get_cascade("summarizer_node", validate=_validate_summary)
+    search_terms = meta.get("search_terms_used", [])
     summaries = []
 
+    docs = []
     for i, raw_path in enumerate(meta["raw_data_files"]):
         raw = read_text(state, raw_path, default="")
         if not raw:
             print(f"Skipped empty file {raw_path}")
             continue
+        raw, selection = _select_relevant_content(raw, subquery.get("query", ""), search_terms)
+        docs.append((i, raw_path, raw, selection))
 
-        summary = _create_llm_summary(llm, raw, subquery, i)
+    batched = _summarize_batches(docs, subquery) if settings.SUMMARIZER_BATCH_ENABLED and len(docs) > 1 else {}
+
+    for i, raw_path, raw, selection in docs:
+        # Results a packed call dropped or got wrong fall back to their own call
+        try:
+            summary = batched.get(i) or _create_llm_summary(llm, raw, subquery, i)
+        except StructuredOutputError as e:
+            # Unusable even after repair and a retry; keep the other results of the subquery
+            print(f"[SUMMARIZER NODE] Warning: skipped {raw_path}: {str(e)[:200]}")
+            continue
+        summary["passage_selection"] = selection
+        print(
+            f"[SUMMARIZER NODE] {raw_path}: ~{selection['tokens_before']} -> ~{selection['tokens_after']} "
+            f"content tokens, LLM call {summary['llm_latency_ms']}ms"
+            + (f" (batch of {summary['batch_size']})" if summary.get("batch_size", 1) > 1 else "")
+        )
+        alternates = meta.get("alternate_urls", {}).get(raw_path)
+        if alternates:
+            # Collapsed near-duplicates are cited alongside the canonical source
+            summary["alternate_urls"] = alternates
+            summary["citation"] += "".join(f" [Also: {url}]" for url in alternates)
         fname = f"summaries/subquery{idx}_result{i}.json"
         files[fname] = json.dumps(summary, indent=2)
         summaries.append(summary)
@@ -62,7 +138,14 @@ def summarizer_node(state: ResearcherState) -> Dict[str, Any]:
         "priority": subquery.get("priority", "medium"),
         "freshness": subquery.get("freshness", "any"),
         "summaries_count": len(summaries),
-        "summary_files": [f"summaries/subquery{idx}_result{i}.json" for i in range(len(summaries))],
+        "passage_selection": {
+            "tokens_before": sum(s["passage_selection"]["tokens_before"] for s in summaries),
+            "tokens_after": sum(s["passage_selection"]["tokens_after"] for s in summaries),
+            "llm_latency_ms": sum(s["llm_latency_ms"] for s in summaries),
+        },
+        "llm_calls": len({s.get("batch_id", f"single{s['result_index']}") for s in summaries}),
+        # Skipped results leave gaps in the numbering; list the files actually written
+        "summary_files": [f"summaries/subquery{idx}_result{s['result_index']}.json" for s in summaries],
         "summaries": summaries,
     }
     index_file = f"summaries/subquery{idx}_index.json"
@@ -71,21 +154,40 @@ def summarizer_node(state: ResearcherState) -> Dict[str, Any]:
     return {"files": files, "summary_files": index_data["summary_files"], "summary_index": index_file}
 
 
-def _create_llm_summary(llm, raw: str, subquery: Dict[str, Any], i: int) -> Dict[str, Any]:
-    """Ask LLM to analyze one raw search result."""
-    q = subquery.get("query", "")
-    prompt = f"""Analyze this search result for the research question below.
+def _select_relevant_content(raw: str, query: str, search_terms: List[str]):
+    """
+    Replace the Content section of a raw result file with its most relevant passages.
+    Returns the (possibly shortened) file text and token stats for the content section.
+    """
+    head, sep, rest = raw.partition("\nContent:\n")
+    content, tail_sep, tail = rest.partition("\n\nSnippet:\n")
+    if not sep:
+        # Not in the scraper's file layout; select over the whole text
+        head, content, tail_sep, tail = "", raw, "", ""
 
-Research Question: {q}
+    if not settings.PASSAGE_SELECTION_ENABLED:
+        tokens = estimate_tokens(content)
+        return raw, {"tokens_before": tokens, "tokens_after": tokens, "passages_total": 1, "passages_selected": 1}
 
-Raw Content:
-{raw}
+    selected, stats = select_passages(
+        content,
+        query,
+        search_terms,
+        token_budget=settings.PASSAGE_TOKEN_BUDGET,
+        top_k=settings.PASSAGE_TOP_K,
+    )
+    return f"{head}{sep}{selected}{tail_sep}{tail}", stats
 
-Return key findings, arguments, data, conclusions, relevance, reliability, and a short summary.
-Also extract the URL and title if present."""
 
-    structured_llm = llm.with_structured_output(SummaryAnalysis)
-    analysis = structured_llm.invoke([HumanMessage(content=prompt)])
+def _create_llm_summary(llm, raw: str, subquery: Dict[str, Any], i: int) -> Dict[str, Any]:
+    """Ask LLM to analyze one raw search result."""
+    q = subquery.get("query", "")
+    messages = _prompt.messages(("Research Question", q), ("Raw Content", raw))
+
+    structured_llm = structured_output(llm, SummaryAnalysis, "summarizer_node")
+    started = time.perf_counter()
+    analysis = structured_llm.invoke(messages)
+    latency_ms = int((time.perf_counter() - started) * 1000)
 
     return {
         "result_index": i,
@@ -93,4 +195,65 @@ Also extract the URL and title if present."""
         "llm_analysis": analysis.model_dump(),
         "citation": f"[Source: {analysis.extracted_url}]",
         "generated_at": datetime.utcnow().isoformat(),
+        "llm_latency_ms": latency_ms,
     }
+
+
+def _pack_batches(docs: List[tuple], token_budget: int, max_results: int) -> List[List[tuple]]:
+    """Greedy, order-preserving packing of (index, path, raw, selection) docs by estimated tokens."""
+    batches, current, used = [], [], 0
+    for doc in docs:
+        tokens = estimate_tokens(doc[2])
+        if current and (used + tokens > token_budget or len(current) >= max_results):
+            batches.append(current)
+            current, used = [], 0
+        current.append(doc)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _summarize_batches(docs: List[tuple], subquery: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    """
+    Summarize docs several per call. Returns summaries by result index for the
+    results that came back valid; the caller summarizes the rest one by one.
+    """
+    q = subquery.get("query", "")
+    llm = get_cascade("summarizer_node", validate=_validate_batch)
+    out: Dict[int, Dict[str, Any]] = {}
+
+    for number, batch in enumerate(_pack_batches(docs, settings.SUMMARIZER_BATCH_TOKEN_BUDGET, settings.SUMMARIZER_BATCH_MAX_RESULTS)):
+        if len(batch) == 1:
+            continue
+        expected = {doc[0] for doc in batch}
+        messages = _batch_prompt.messages(("Research Question", q), *((f"Result {doc[0]}", doc[2]) for doc in batch))
+        started = time.perf_counter()
+        try:
+            result = structured_output(llm, BatchSummaryAnalysis, "summarizer_node").invoke(messages)
+        except Exception as e:
+            print(f"[SUMMARIZER NODE] Batch of {len(batch)} failed ({type(e).__name__}); summarizing one by one")
+            continue
+        latency_ms = int((time.perf_counter() - started) * 1000)
+
+        accepted = {}
+        for item in result.summaries:
+            if item.result_index in expected and item.result_index not in accepted and _check_batch_item(item) is None:
+                accepted[item.result_index] = item
+        for i, item in accepted.items():
+            analysis = SummaryAnalysis(**item.model_dump(exclude={"result_index"}))
+            out[i] = {
+                "result_index": i,
+                "subquery": q,
+                "llm_analysis": analysis.model_dump(),
+                "citation": f"[Source: {analysis.extracted_url}]",
+                "generated_at": datetime.utcnow().isoformat(),
+                # Share of the packed call, so per-subquery totals still add up
+                "llm_latency_ms": latency_ms // len(accepted),
+                "batch_id": f"batch{number}",
+                "batch_size": len(batch),
+            }
+        missing = sorted(expected - accepted.keys())
+        if missing:
+            print(f"[SUMMARIZER NODE] Batch {number}: results {missing} missing or invalid; summarizing them one by one")
+    return out
@@ -16,8 +16,9 @@ class ResearchFlowState(DeepAgentState):
 
     - files: in-memory virtual filesystem {path: content} (inherited from DeepAgentState)
     - todos: task tracking (inherited from DeepAgentState)
+    - run_id: id of this invocation, set by the first node (see utils/run_context.py)
     """
-    pass  # files field is already defined in DeepAgentState
+    run_id: NotRequired[str]
 
 
 class ResearcherState(ResearchFlowState):
@@ -0,0 +1,77 @@
+"""
+Deterministic fake search provider (DR_SEARCH_PROVIDER=fake).
+
+Returns Tavily-shaped responses generated from the query text: stable URLs on a
+fixed set of domains, titles and snippets built from the query's keywords, and
+page text of a log-normally distributed size (DR_FAKE_PAGE_TOKENS). Latency is
+simulated with DR_FAKE_SEARCH_LATENCY_MS. Used with the fake chat model
+(utils/fake_models.py) to run the whole workflow offline.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from utils.fake_models import _DOMAINS, keywords, paragraph_text, rng_for, sample_lognormal, sentence, sleep_latency
+
+
+def _page(url: str, topic: List[str]) -> str:
+    rng = rng_for("page", url)
+    tokens = max(50, int(sample_lognormal(rng, settings.FAKE_PAGE_TOKENS, settings.FAKE_PAGE_SIGMA)))
+    paragraphs = []
+    while tokens > 0:
+        size = min(tokens, rng.randint(80, 200))
+        paragraphs.append(paragraph_text(rng, topic, size))
+        tokens -= size
+    return "\n\n".join(paragraphs)
+
+
+class FakeSearchProvider:
+    """Offline provider with deterministic results (see module docstring)."""
+
+    name = "fake"
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        search_depth: str = "basic",
+        include_raw_content: bool = True,
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        time_range: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        rng = rng_for("search", query, search_depth)
+        sleep_latency(rng, settings.FAKE_SEARCH_LATENCY_MS, settings.FAKE_SEARCH_LATENCY_SIGMA)
+        topic = keywords(query)
+        domains = [d for d in (include_domains or _DOMAINS) if d not in (exclude_domains or [])] or list(_DOMAINS)
+        slug = "-".join(topic[:4])
+        results = []
+        for i in range(max_results):
+            domain = domains[(rng.randrange(len(domains)) + i) % len(domains)]
+            # A shared article id space makes related queries overlap, like real search
+            url = f"https://{domain}/{slug}/{rng.randint(1, 3 * max_results)}"
+            result = {
+                "url": url,
+                "title": f"{' '.join(topic[:3]).title()}: {sentence(rng, topic)[:60].rstrip('.')}",
+                "content": " ".join(sentence(rng, topic) for _ in range(3)),
+                "score": round(max(0.05, 0.95 - i * 0.08 - rng.random() * 0.05), 3),
+                "published_date": (date(2025, 6, 1) - timedelta(days=rng.randint(0, 1500))).isoformat(),
+            }
+            if include_raw_content:
+                result["raw_content"] = _page(url, topic)
+            results.append(result)
+        return {"query": query, "results": results}
+
+    def extract(self, urls: List[str], extract_depth: str = "basic", format: str = "markdown") -> Dict[str, Any]:
+        sleep_latency(rng_for("extract", *urls), settings.FAKE_SEARCH_LATENCY_MS, settings.FAKE_SEARCH_LATENCY_SIGMA)
+        results = []
+        for url in urls:
+            path = re.sub(r"^https?://[^/]+/", "", url)
+            results.append({"url": url, "raw_content": _page(url, keywords(path.replace("-", " ")))})
+        return {"results": results, "failed_results": []}
@@ -0,0 +1,367 @@
+"""
+Offline search provider over a local directory of documents.
+
+Documents (HTML, Markdown, plain text and PDF text dumps) are bulk-ingested into
+an on-disk SQLite FTS5 index and ranked with its built-in BM25. Results use the
+same schema as Tavily, so the rest of the pipeline cannot tell the difference.
+
+Build or refresh an index (only new/changed files are re-read):
+
+    python tools/local_corpus.py ingest /path/to/corpus --index .local_corpus/index.sqlite
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SUPPORTED_EXTENSIONS = {".html", ".htm", ".md", ".markdown", ".txt", ".text"}
+# Rows per executemany batch during ingestion
+INGEST_BATCH_SIZE = 500
+# Tokens of context FTS5 returns around matches for the `content` snippet
+SNIPPET_TOKENS = {"basic": 48, "advanced": 64}
+TIME_RANGE_DAYS = {"day": 1, "week": 7, "month": 31, "year": 366}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    title TEXT NOT NULL,
+    published_date TEXT,
+    mtime REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, content, tokenize = 'porter unicode61'
+);
+"""
+
+
+# --- Document parsing ---
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects visible text, <title>, canonical link and published-date meta tags."""
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "footer", "header", "aside", "svg"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article"}
+    DATE_META = {"article:published_time", "date", "pubdate", "publishdate", "dc.date", "datepublished"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self.canonical: Optional[str] = None
+        self.published: Optional[str] = None
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "link" and (attrs.get("rel") or "").lower() == "canonical":
+            self.canonical = attrs.get("href")
+        elif tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+            if key in self.DATE_META and attrs.get("content") and not self.published:
+                self.published = attrs["content"]
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+_FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+
+
+def _front_matter(text: str) -> Tuple[Dict[str, str], str]:
+    match = _FRONT_MATTER_RE.match(text)
+    if not match:
+        return {}, text
+    meta = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            meta[key.strip().lower()] = value.strip().strip("'\"")
+    return meta, text[match.end():]
+
+
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    match = re.match(r"(\d{4}-\d{2}-\d{2})", value.strip())
+    return match.group(1) if match else None
+
+
+def parse_document(path: str) -> Dict[str, Any]:
+    """Read a corpus file into {url, title, content, published_date}."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    mtime_date = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).strftime("%Y-%m-%d")
+    ext = os.path.splitext(path)[1].lower()
+
+    url = title = published = None
+    if ext in (".html", ".htm"):
+        parser = _HTMLTextExtractor()
+        parser.feed(text)
+        content = "".join(parser.parts)
+        title, url, published = parser.title.strip(), parser.canonical, parser.published
+    else:
+        meta, content = _front_matter(text)
+        title = meta.get("title")
+        url = meta.get("url") or meta.get("source_url")
+        published = meta.get("date") or meta.get("published_date")
+        if not title:
+            for line in content.splitlines():
+                if line.strip():
+                    title = line.strip().lstrip("#").strip()
+                    break
+
+    content = re.sub(r"[ \t]+", " ", content)
+    content = re.sub(r"\n\s*\n+", "\n\n", content).strip()
+    return {
+        "url": url or f"file://{os.path.abspath(path)}",
+        "title": (title or os.path.basename(path))[:300],
+        "content": content,
+        "published_date": _normalize_date(published) or mtime_date,
+    }
+
+
+def _iter_corpus_files(corpus_dir: str) -> Iterator[str]:
+    for root, _dirs, names in os.walk(corpus_dir):
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+# --- Index ---
+
+class LocalCorpusIndex:
+    """On-disk BM25 index (SQLite FTS5) of a document directory."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        directory = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation keeps the index safe to share across threads
+        return sqlite3.connect(self.index_path)
+
+    def document_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def ingest(self, corpus_dir: str) -> Dict[str, int]:
+        """Bulk-ingest new or modified files under corpus_dir; drop files that disappeared."""
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        conn = self._connect()
+        try:
+            known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, id, mtime FROM documents")}
+            seen = set()
+            batch: List[Tuple[str, float, Dict[str, Any], Optional[int]]] = []
+
+            def flush():
+                for path, mtime, doc, old_id in batch:
+                    if old_id is not None:
+                        conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (old_id,))
+                        conn.execute("DELETE FROM documents WHERE id = ?", (old_id,))
+                    cur = conn.execute(
+                        "INSERT INTO documents (path, url, domain, title, published_date, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, doc["url"], urlsplit(doc["url"]).netloc.lower(), doc["title"], doc["published_date"], mtime),
+                    )
+                    conn.execute(
+                        "INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)",
+                        (cur.lastrowid, doc["title"], doc["content"]),
+                    )
+                batch.clear()
+
+            for path in _iter_corpus_files(corpus_dir):
+                path = os.path.abspath(path)
+                seen.add(path)
+                mtime = os.path.getmtime(path)
+                old = known.get(path)
+                if old and old[1] == mtime:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if old else "added"] += 1
+                batch.append((path, mtime, parse_document(path), old[0] if old else None))
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    flush()
+            flush()
+
+            root = os.path.abspath(corpus_dir)
+            for path, (doc_id, _mtime) in known.items():
+                # commonpath, not startswith: /corpus2 is not inside /corpus
+                if path not in seen and os.path.commonpath([path, root]) == root:
+                    conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                    conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                    stats["removed"] += 1
+            conn.commit()
+        finally:
+            conn.close()
+        return stats
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        include_raw_content: bool = True,
+        snippet_tokens: int = 48,
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        since: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+
+        sql = [
+            "SELECT d.url, d.title, d.published_date, -bm25(documents_fts) AS rank,",
+            f"snippet(documents_fts, 1, '', '', ' ... ', {int(snippet_tokens)}),",
+            "documents_fts.content" if include_raw_content else "NULL",
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid",
+            "WHERE documents_fts MATCH ?",
+        ]
+        params: List[Any] = [match]
+        # A domain filter matches the domain itself and its subdomains, not e.g. notexample.com
+        if include_domains:
+            sql.append("AND (" + " OR ".join("(d.domain = ? OR d.domain LIKE '%.' || ?)" for _ in include_domains) + ")")
+            for domain in include_domains:
+                params += [domain.lower(), domain.lower()]
+        for domain in exclude_domains or []:
+            sql.append("AND NOT (d.domain = ? OR d.domain LIKE '%.' || ?)")
+            params += [domain.lower(), domain.lower()]
+        if since:
+            sql.append("AND d.published_date >= ?")
+            params.append(since)
+        sql.append("ORDER BY rank DESC LIMIT ?")
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(" ".join(sql), params).fetchall()
+        top = rows[0][3] if rows and rows[0][3] > 0 else 1.0
+        return [
+            {
+                "url": url,
+                "title": title,
+                "content": snippet,
+                "score": round(max(0.0, min(1.0, rank / top)), 4),
+                "published_date": published,
+                "raw_content": raw,
+            }
+            for url, title, published, rank, snippet, raw in rows
+        ]
+
+    def get_by_url(self, url: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT documents_fts.content FROM documents JOIN documents_fts ON documents_fts.rowid = documents.id "
+                "WHERE documents.url = ?",
+                (url,),
+            ).fetchone()
+        return row[0] if row else None
+
+
+class LocalCorpusProvider:
+    """SearchProvider backed by a LocalCorpusIndex."""
+
+    name = "local"
+
+    def __init__(self, index_path: str, corpus_dir: Optional[str] = None):
+        self.index = LocalCorpusIndex(index_path)
+        self._ingest_lock = threading.Lock()
+        if corpus_dir:
+            with self._ingest_lock:
+                stats = self.index.ingest(corpus_dir)
+            print(f"[LOCAL CORPUS] Indexed {corpus_dir}: {stats}")
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        search_depth: str = "basic",
+        include_raw_content: bool = True,
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        time_range: Optional[str] = None,
+        **_ignored: Any,
+    ) -> Dict[str, Any]:
+        since = None
+        if time_range in TIME_RANGE_DAYS:
+            since = (datetime.now(timezone.utc) - timedelta(days=TIME_RANGE_DAYS[time_range])).strftime("%Y-%m-%d")
+        results = self.index.search(
+            query,
+            limit=max_results,
+            include_raw_content=include_raw_content,
+            snippet_tokens=SNIPPET_TOKENS.get(search_depth, SNIPPET_TOKENS["basic"]),
+            include_domains=include_domains,
+            exclude_domains=exclude_domains,
+            since=since,
+        )
+        if not include_raw_content:
+            for r in results:
+                r.pop("raw_content", None)
+        return {"query": query, "results": results, "response_time": 0.0}
+
+    def extract(self, urls: List[str], **_ignored: Any) -> Dict[str, Any]:
+        results, failed = [], []
+        for url in urls:
+            content = self.index.get_by_url(url)
+            if content is None:
+                failed.append({"url": url, "error": "Not in local corpus"})
+            else:
+                results.append({"url": url, "raw_content": content})
+        return {"results": results, "failed_results": failed}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the offline local-corpus search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="Index new/changed documents in a directory")
+    ingest.add_argument("corpus_dir")
+    ingest.add_argument("--index", default=None, help="Index file (defaults to DR_LOCAL_CORPUS_INDEX)")
+    query = sub.add_parser("search", help="Run a test query against the index")
+    query.add_argument("query")
+    query.add_argument("--index", default=None)
+    query.add_argument("--max-results", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from config import settings
+    index = LocalCorpusIndex(args.index or settings.LOCAL_CORPUS_INDEX)
+    if args.command == "ingest":
+        print(index.ingest(args.corpus_dir))
+        print(f"{index.document_count()} documents in {index.index_path}")
+    else:
+        for r in index.search(args.query, args.max_results, include_raw_content=False):
+            print(f"{r['score']:.3f}  {r['published_date']}  {r['title']}  <{r['url']}>")
+
+
+if __name__ == "__main__":
+    main()
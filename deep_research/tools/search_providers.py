@@ -0,0 +1,125 @@
+"""
+Search provider interface and registry.
+
+The web search tools talk to a SearchProvider instead of a hard-wired Tavily
+client, so the pipeline can run against other backends (e.g. an offline local
+corpus) selected with DR_SEARCH_PROVIDER. Every provider returns Tavily-shaped
+responses so parsing and storage code stays provider-agnostic:
+
+    search  -> {"query", "results": [{"url", "title", "content", "score",
+                                      "published_date", "raw_content"}]}
+    extract -> {"results": [{"url", "raw_content"}], "failed_results": [...]}
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Protocol, runtime_checkable
+
+from config import settings
+from utils.recording import RecordingSearchProvider, ReplaySearchProvider, get_recorder, get_replayer
+from utils.resilience import get_policy
+
+
+@runtime_checkable
+class SearchProvider(Protocol):
+    """Backend used by tavily_search / tavily_extract."""
+
+    name: str
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        search_depth: str = "basic",
+        include_raw_content: bool = True,
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        time_range: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Run a search and return a Tavily-shaped response. Raises on failure."""
+        ...
+
+    def extract(
+        self,
+        urls: List[str],
+        extract_depth: str = "basic",
+        format: str = "markdown",
+    ) -> Dict[str, Any]:
+        """Fetch full content for URLs and return a Tavily-shaped response. Raises on failure."""
+        ...
+
+
+class TavilySearchProvider:
+    """Tavily API backend, called under the shared resilience policy."""
+
+    name = "tavily"
+
+    def __init__(self, api_key: Optional[str] = None):
+        from tavily import TavilyClient
+
+        # Note: Timeout is handled at the HTTP request level, not in the client init
+        self.client = TavilyClient(api_key=api_key or os.environ["TAVILY_API_KEY"])
+        self.policy = get_policy("tavily")
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        params = {k: v for k, v in kwargs.items() if v is not None}
+        return self.policy.call(self.client.search, query=query, label="TAVILY SEARCH", **params)
+
+    def extract(self, urls: List[str], **kwargs) -> Dict[str, Any]:
+        return self.policy.call(self.client.extract, urls=urls, label="TAVILY EXTRACT", **kwargs)
+
+
+def _local_corpus_provider() -> SearchProvider:
+    from tools.local_corpus import LocalCorpusProvider
+    return LocalCorpusProvider(settings.LOCAL_CORPUS_INDEX, corpus_dir=settings.LOCAL_CORPUS_DIR)
+
+
+def _fake_provider() -> SearchProvider:
+    from tools.fake_search import FakeSearchProvider
+    return FakeSearchProvider()
+
+
+# Provider name -> zero-argument factory
+_PROVIDER_FACTORIES: Dict[str, Callable[[], SearchProvider]] = {
+    "tavily": TavilySearchProvider,
+    "local": _local_corpus_provider,
+    "fake": _fake_provider,
+}
+
+_providers: Dict[str, SearchProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def register_search_provider(name: str, factory: Callable[[], SearchProvider]) -> None:
+    """Register (or replace) a provider factory under a name usable in DR_SEARCH_PROVIDER."""
+    with _providers_lock:
+        _PROVIDER_FACTORIES[name] = factory
+        _providers.pop(name, None)
+
+
+def get_search_provider(name: Optional[str] = None) -> SearchProvider:
+    """
+    Return the configured provider instance (created once per process).
+    In fixture replay mode the real provider is never created; in record mode it is
+    wrapped so every call lands in the fixture bundle.
+    """
+    name = name or settings.SEARCH_PROVIDER
+    with _providers_lock:
+        if name not in _providers:
+            if name not in _PROVIDER_FACTORIES:
+                raise ValueError(
+                    f"Unknown search provider '{name}'. Available: {sorted(_PROVIDER_FACTORIES)}"
+                )
+            replayer = get_replayer()
+            if replayer is not None:
+                provider = ReplaySearchProvider(replayer)
+            else:
+                provider = _PROVIDER_FACTORIES[name]()
+                recorder = get_recorder()
+                if recorder is not None:
+                    provider = RecordingSearchProvider(provider, recorder)
+            _providers[name] = provider
+        return _providers[name]
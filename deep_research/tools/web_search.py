@@ -1,20 +1,21 @@
 """
 Web search tools for the researcher agent.
-Uses Tavily API with schema enforcement.
+Uses the configured search provider (Tavily by default) with schema enforcement.
 """
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import List, Dict, Any, Optional, Literal
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Literal, Tuple
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from tavily import TavilyClient
-import time
-
-# Initialize Tavily client once
-# Note: Timeout is handled at the HTTP request level, not in the client init
-tavily_client = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
+from config import settings
+from tools.search_providers import get_search_provider
+from utils.budget import get_accountant
+from utils.dedup import canonical_url
+from utils.rerank import classify_source_type, default_engine
 
 # --- Schemas ---
 
@@ -40,6 +41,8 @@ class SearchResult(BaseModel):
     published_date: Optional[str] = None
     score: float = Field(ge=0.0, le=1.0)
     source_type: str = "web"
+    # URLs of near-duplicate copies (mirrors, syndication, AMP/print) collapsed into this result
+    alternate_urls: List[str] = Field(default_factory=list)
 
 # --- Tools ---
 
@@ -53,7 +56,7 @@ def tavily_search(
     exclude_domains: Optional[List[str]] = None,
     time_range: Optional[Literal["day", "week", "month", "year"]] = None,
 ) -> Dict[str, Any]:
-    """Run a Tavily web search with retry logic and return raw JSON results."""
+    """Run a web search with the configured provider and return raw JSON results."""
     args = SearchArgs(
         query=query,
         max_results=max_results,
@@ -64,36 +67,32 @@ def tavily_search(
         time_range=time_range,
     )
     
-    # Retry logic with exponential backoff
-    max_retries = 3
-    base_delay = 2
-    
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            print(f"[TAVILY SEARCH] Attempt {attempt + 1}/{max_retries} for query: {query[:50]}...")
-            result = tavily_client.search(**args.model_dump(exclude_none=True))
-            print(f"[TAVILY SEARCH] ✓ Success on attempt {attempt + 1}")
-            return result
-        except Exception as e:
-            last_error = e
-            error_type = type(e).__name__
-            error_msg = str(e)
-            
-            if attempt < max_retries - 1:
-                delay = base_delay * (2 ** attempt)  # Exponential backoff: 2s, 4s, 8s
-                print(f"[TAVILY SEARCH] ✗ Attempt {attempt + 1} failed ({error_type}: {error_msg}), retrying in {delay}s...")
-                time.sleep(delay)
-    
-    # All retries failed
-    error_type = type(last_error).__name__ if last_error else "Unknown"
-    error_msg = str(last_error) if last_error else "Unknown error"
-    print(f"[TAVILY SEARCH] ✗ All {max_retries} attempts failed for query: {query[:50]}")
-    return {
-        "results": [],
-        "query": query,
-        "error": f"{error_type}: {error_msg}"
-    }
+    if settings.TWO_PHASE_SEARCH:
+        # Phase one: snippets only; the scraper extracts full pages for the results it keeps
+        args.include_raw_content = False
+
+    budget = get_accountant().reserve("search", args.search_depth)
+    if not budget.allowed:
+        print(f"[TAVILY SEARCH] ✗ Refused query: {query[:50]} ({budget.reason})")
+        return {"results": [], "query": query, "error": f"BudgetExceeded: {budget.reason}"}
+    if budget.degraded:
+        print(f"[TAVILY SEARCH] Credit budget low, degrading to basic depth: {query[:50]}")
+        args.search_depth = budget.depth
+
+    print(f"[TAVILY SEARCH] Searching for query: {query[:50]}...")
+    try:
+        result = get_search_provider().search(**args.model_dump(exclude_none=True))
+        cache_extractions(result.get("results", []))
+        print(f"[TAVILY SEARCH] ✓ Success for query: {query[:50]}")
+        return result
+    except Exception as e:
+        get_accountant().refund(budget)
+        print(f"[TAVILY SEARCH] ✗ Giving up on query: {query[:50]} ({type(e).__name__})")
+        return {
+            "results": [],
+            "query": query,
+            "error": f"{type(e).__name__}: {e}"
+        }
 
 @tool
 def tavily_extract(
@@ -101,70 +100,112 @@ def tavily_extract(
     extract_depth: Literal["basic", "advanced"] = "basic",
     format: Literal["markdown", "text"] = "markdown",
 ) -> Dict[str, Any]:
-    """Extract full content from given URLs using Tavily with retry logic."""
+    """Extract full content from given URLs with the configured provider."""
     args = ExtractArgs(urls=urls, extract_depth=extract_depth, format=format)
-    
-    # Retry logic with exponential backoff
-    max_retries = 3
-    base_delay = 2
-    
-    last_error = None
-    for attempt in range(max_retries):
+
+    budget = get_accountant().reserve("extract", args.extract_depth, url_count=len(urls))
+    if not budget.allowed:
+        print(f"[TAVILY EXTRACT] ✗ Refused {len(urls)} URLs ({budget.reason})")
+        return {"results": [], "failed_urls": urls, "error": f"BudgetExceeded: {budget.reason}"}
+    args.extract_depth = budget.depth
+
+    print(f"[TAVILY EXTRACT] Extracting {len(urls)} URLs...")
+    try:
+        result = get_search_provider().extract(**args.model_dump())
+        cache_extractions(result.get("results", []))
+        print(f"[TAVILY EXTRACT] ✓ Success for {len(urls)} URLs")
+        return result
+    except Exception as e:
+        get_accountant().refund(budget)
+        print(f"[TAVILY EXTRACT] ✗ Giving up on {len(urls)} URLs ({type(e).__name__})")
+        return {
+            "results": [],
+            "failed_urls": urls,
+            "error": f"{type(e).__name__}: {e}"
+        }
+
+# --- Extraction cache (two-phase search) ---
+
+_extraction_cache: "OrderedDict[str, str]" = OrderedDict()
+_extraction_lock = threading.Lock()
+
+def cache_extractions(results: List[Dict[str, Any]]) -> None:
+    """Remember raw page content by canonical URL (LRU, shared across subqueries and runs)."""
+    with _extraction_lock:
+        for r in results or []:
+            url, raw = r.get("url"), r.get("raw_content")
+            if not url or not raw:
+                continue
+            key = canonical_url(url)
+            if len(raw) >= len(_extraction_cache.get(key, "")):
+                _extraction_cache[key] = raw
+            _extraction_cache.move_to_end(key)
+        while len(_extraction_cache) > settings.EXTRACT_CACHE_SIZE:
+            _extraction_cache.popitem(last=False)
+
+def cached_extraction(url: str) -> Optional[str]:
+    with _extraction_lock:
+        raw = _extraction_cache.get(canonical_url(url))
+        if raw is not None:
+            _extraction_cache.move_to_end(canonical_url(url))
+        return raw
+
+def extract_pages(urls: List[str], extract_depth: str = "basic") -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    Phase two of two-phase search: full page text for the given URLs.
+    Cached pages are reused; the rest are fetched in ONE batched extract call.
+    Returns ({canonical_url: raw_content}, stats). Failures leave URLs out of the map.
+    """
+    pages: Dict[str, str] = {}
+    missing: List[str] = []
+    for url in dict.fromkeys(urls):
+        raw = cached_extraction(url)
+        if raw:
+            pages[canonical_url(url)] = raw
+        else:
+            missing.append(url)
+
+    stats = {"requested": len(pages) + len(missing), "cached": len(pages), "fetched": 0, "failed": []}
+    if missing:
+        print(f"[TAVILY EXTRACT] Batch-extracting {len(missing)} URLs ({len(pages)} cached)")
+        budget = get_accountant().reserve("extract", extract_depth, url_count=len(missing))
         try:
-            print(f"[TAVILY EXTRACT] Attempt {attempt + 1}/{max_retries} for {len(urls)} URLs...")
-            result = tavily_client.extract(**args.model_dump())
-            print(f"[TAVILY EXTRACT] ✓ Success on attempt {attempt + 1}")
-            return result
+            if not budget.allowed:
+                raise RuntimeError(budget.reason)
+            response = get_search_provider().extract(urls=missing, extract_depth=budget.depth, format="markdown")
         except Exception as e:
-            last_error = e
-            error_type = type(e).__name__
-            error_msg = str(e)
-            
-            if attempt < max_retries - 1:
-                delay = base_delay * (2 ** attempt)  # Exponential backoff: 2s, 4s, 8s
-                print(f"[TAVILY EXTRACT] ✗ Attempt {attempt + 1} failed ({error_type}: {error_msg}), retrying in {delay}s...")
-                time.sleep(delay)
-    
-    # All retries failed
-    error_type = type(last_error).__name__ if last_error else "Unknown"
-    error_msg = str(last_error) if last_error else "Unknown error"
-    print(f"[TAVILY EXTRACT] ✗ All {max_retries} attempts failed")
-    return {
-        "results": [],
-        "failed_urls": urls,
-        "error": f"{error_type}: {error_msg}"
-    }
+            get_accountant().refund(budget)
+            print(f"[TAVILY EXTRACT] ✗ Batch extract failed ({type(e).__name__}): {e}")
+            response = {"results": [], "failed_results": [{"url": u} for u in missing]}
+        fetched = response.get("results", []) or []
+        cache_extractions(fetched)
+        for r in fetched:
+            if r.get("url") and r.get("raw_content"):
+                pages[canonical_url(r["url"])] = r["raw_content"]
+        stats["fetched"] = len(fetched)
+        stats["failed"] = [u for u in missing if canonical_url(u) not in pages]
+    return pages, stats
 
 # --- Utils ---
 
 def parse_search_results(search_response: Dict[str, Any]) -> List[SearchResult]:
-    """Convert Tavily results into normalized SearchResult objects."""
+    """
+    Convert Tavily results into SearchResult objects.
+    Scores keep the provider's scale (clipped to [0, 1]) so results from different
+    responses stay comparable; run-wide normalization happens in utils/rerank.py.
+    """
     results = search_response.get("results", []) or []
-    if not results:
-        return []
-
-    scores = [r.get("score", 0.0) for r in results if r.get("score") is not None]
-    min_s, max_s = (min(scores), max(scores)) if scores else (0.0, 1.0)
-    rng = max_s - min_s if max_s > min_s else 1.0
-
     parsed = []
     for r in results:
-        raw = r.get("score", 0.0)
-        norm = (raw - min_s) / rng if rng > 0 else 0.0
         url = r.get("url", "")
-        stype = "web"
-        if any(k in url for k in ["news", "reuters", "cnn", "bbc", "ap"]):
-            stype = "news"
-        elif any(k in url for k in ["pubmed", "arxiv", "scholar", "doi"]):
-            stype = "academic"
         parsed.append(SearchResult(
             url=url,
             title=r.get("title", ""),
             content=r.get("content", ""),
             snippet=r.get("snippet", ""),
             published_date=r.get("published_date"),
-            score=round(norm, 3),
-            source_type=stype
+            score=round(min(1.0, max(0.0, float(r.get("score") or 0.0))), 3),
+            source_type=classify_source_type(url)
         ))
     return sorted(parsed, key=lambda x: x.score, reverse=True)
 
@@ -177,7 +218,7 @@ URL: {r.url}
 Type: {r.source_type}
 Published: {r.published_date or 'Unknown'}
 Score: {r.score}
-
+{format_alternate_urls(r)}
 Content:
 {r.content}
 
@@ -188,6 +229,10 @@ Snippet:
 """
     return out
 
+def format_alternate_urls(r: SearchResult) -> str:
+    """Storage line listing collapsed near-duplicate URLs (empty if none)."""
+    return f"Alternate URLs: {', '.join(r.alternate_urls)}\n" if r.alternate_urls else ""
+
 def extract_urls_from_results(results: List[SearchResult]) -> List[str]:
     """Get URLs from results."""
     return [r.url for r in results if r.url]
@@ -197,11 +242,7 @@ def filter_results_by_score(results: List[SearchResult], min_score: float = 0.3)
     return [r for r in results if r.score >= min_score]
 
 def rerank_results_by_source_type(results: List[SearchResult], preferred: Optional[List[str]] = None) -> List[SearchResult]:
-    """Boost scores for preferred source types."""
+    """Order results by combined rerank score with a prior for preferred source types."""
     if not preferred:
         return results
-    boosted = []
-    for r in results:
-        s = min(1.0, r.score * 1.2) if r.source_type in preferred else r.score
-        boosted.append(r.copy(update={"score": s}))
-    return sorted(boosted, key=lambda x: x.score, reverse=True)
+    return default_engine.rerank(results, preferred_sources=preferred, diversify=False)
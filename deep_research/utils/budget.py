@@ -0,0 +1,218 @@
+"""
+Search credit budgets per run and per tenant.
+
+Every search/extract call is priced in provider credits before it is made
+(Tavily: basic search 1, advanced search 2, extract 1 per 5 URLs basic /
+2 per 5 URLs advanced) and charged against two caps:
+
+- the run (one invocation / LangGraph thread) cap, DR_SEARCH_CREDITS_PER_RUN
+- the tenant cap over a rolling window, DR_SEARCH_CREDITS_PER_TENANT /
+  DR_SEARCH_CREDITS_TENANT_WINDOW
+
+When a call does not fit, an "advanced" call is first degraded to "basic";
+if that does not fit either the call is refused. A runaway ReAct loop therefore
+exhausts its own run's allowance instead of the tenant's shared quota. Calls that
+fail after their retries are refunded, so a provider outage does not use up the
+budget.
+
+Runs are told apart by run_context.current_run_id(), which is per invocation even
+without a thread_id; tenants come from the API key (tenant_for_api_key).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hmac
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config import settings
+from utils.run_context import DEFAULT_RUN_ID, DEFAULT_TENANT_ID, current_run_id, current_tenant_id
+
+# (call kind, depth) -> credits per unit; extract units are batches of 5 URLs
+CREDIT_COSTS: Dict[Tuple[str, str], int] = {
+    ("search", "basic"): 1,
+    ("search", "advanced"): 2,
+    ("extract", "basic"): 1,
+    ("extract", "advanced"): 2,
+}
+EXTRACT_URLS_PER_UNIT = 5
+
+
+def call_cost(kind: str, depth: str, url_count: int = 0) -> int:
+    per_unit = CREDIT_COSTS.get((kind, depth), CREDIT_COSTS[(kind, "basic")])
+    units = math.ceil(max(1, url_count) / EXTRACT_URLS_PER_UNIT) if kind == "extract" else 1
+    return per_unit * units
+
+
+@dataclass
+class BudgetDecision:
+    allowed: bool
+    depth: str
+    cost: int
+    degraded: bool = False
+    reason: Optional[str] = None
+    # Who was charged, for refund()
+    run_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+    kind: Optional[str] = None
+    charged_at: Optional[float] = None
+
+
+class RunSpend:
+    """Credits spent by one run."""
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.spent = 0
+        self.by_call: Dict[str, int] = defaultdict(int)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.degraded = 0
+        self.refused = 0
+        self.refunded = 0
+
+    def snapshot(self, cap: int) -> Dict[str, Any]:
+        return {
+            "tenant_id": self.tenant_id,
+            "credits_spent": self.spent,
+            "credits_cap": cap,
+            "credits_by_call": dict(self.by_call),
+            "calls": dict(self.calls),
+            "degraded_calls": self.degraded,
+            "refused_calls": self.refused,
+            "refunded_credits": self.refunded,
+        }
+
+
+class CreditAccountant:
+    """Thread-safe credit accounting shared by all runs in the process."""
+
+    def __init__(self, run_cap: int, tenant_cap: int, tenant_window: float, max_runs: int = 256):
+        self.run_cap = run_cap
+        self.tenant_cap = tenant_cap
+        self.tenant_window = tenant_window
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, RunSpend]" = OrderedDict()
+        # tenant -> deque of (timestamp, credits) inside the rolling window
+        self._tenants: Dict[str, Deque[Tuple[float, int]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _run(self, run_id: str, tenant_id: str) -> RunSpend:
+        spend = self._runs.get(run_id)
+        if spend is None:
+            spend = self._runs[run_id] = RunSpend(tenant_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+        self._runs.move_to_end(run_id)
+        return spend
+
+    def _tenant_spent(self, tenant_id: str, now: float) -> int:
+        window = self._tenants[tenant_id]
+        while window and now - window[0][0] > self.tenant_window:
+            window.popleft()
+        return sum(credits for _, credits in window)
+
+    def reserve(
+        self,
+        kind: str,
+        depth: str = "basic",
+        url_count: int = 0,
+        run_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> BudgetDecision:
+        """Charge a call up front: as requested, degraded to basic, or refused."""
+        run_id = run_id or current_run_id()
+        tenant_id = tenant_id or current_tenant_id()
+        now = time.monotonic()
+        with self._lock:
+            spend = self._run(run_id, tenant_id)
+            tenant_spent = self._tenant_spent(tenant_id, now)
+
+            def fits(cost: int) -> bool:
+                return spend.spent + cost <= self.run_cap and tenant_spent + cost <= self.tenant_cap
+
+            cost = call_cost(kind, depth, url_count)
+            charged = dict(run_id=run_id, tenant_id=tenant_id, kind=kind, charged_at=now)
+            decision = BudgetDecision(True, depth, cost, **charged)
+            if not fits(cost):
+                basic = call_cost(kind, "basic", url_count)
+                if depth != "basic" and fits(basic):
+                    decision = BudgetDecision(True, "basic", basic, degraded=True, **charged)
+                    spend.degraded += 1
+                else:
+                    scope = "run" if spend.spent + basic > self.run_cap else "tenant"
+                    spend.refused += 1
+                    return BudgetDecision(False, depth, 0, reason=f"{scope} search credit budget exhausted")
+
+            spend.spent += decision.cost
+            spend.by_call[f"{kind}:{decision.depth}"] += decision.cost
+            spend.calls[kind] += 1
+            self._tenants[tenant_id].append((now, decision.cost))
+            return decision
+
+    def refund(self, decision: BudgetDecision) -> None:
+        """Give back the credits of a call that failed; providers do not bill failed requests."""
+        if not decision.allowed or not decision.cost or decision.run_id is None:
+            return
+        with self._lock:
+            spend = self._runs.get(decision.run_id)
+            if spend is not None:
+                spend.spent -= decision.cost
+                spend.by_call[f"{decision.kind}:{decision.depth}"] -= decision.cost
+                spend.refunded += decision.cost
+            window = self._tenants.get(decision.tenant_id)
+            if window is not None:
+                try:
+                    window.remove((decision.charged_at, decision.cost))
+                except ValueError:
+                    pass  # already outside the rolling window
+
+    def run_spend(self, run_id: str = DEFAULT_RUN_ID) -> Dict[str, Any]:
+        with self._lock:
+            spend = self._runs.get(run_id)
+            return spend.snapshot(self.run_cap) if spend else RunSpend(current_tenant_id()).snapshot(self.run_cap)
+
+    def tenant_spend(self, tenant_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tenant_id": tenant_id,
+                "credits_spent": self._tenant_spent(tenant_id, time.monotonic()),
+                "credits_cap": self.tenant_cap,
+                "window_seconds": self.tenant_window,
+            }
+
+
+def tenant_for_api_key(api_key: Optional[str]) -> str:
+    """
+    The tenant an API key belongs to (DR_TENANT_API_KEYS, "key=tenant" pairs), or
+    DEFAULT_TENANT_ID. Tenants are only ever derived server-side, never taken from
+    the request, so a caller cannot escape its cap by naming a new tenant.
+    """
+    if api_key:
+        for entry in settings.TENANT_API_KEYS:
+            key, _, tenant = entry.partition("=")
+            if key and tenant and hmac.compare_digest(key.strip(), api_key):
+                return tenant.strip()
+    return DEFAULT_TENANT_ID
+
+
+_accountant: Optional[CreditAccountant] = None
+_accountant_lock = threading.Lock()
+
+
+def get_accountant() -> CreditAccountant:
+    """The process-wide accountant configured from config/settings.py."""
+    global _accountant
+    with _accountant_lock:
+        if _accountant is None:
+            _accountant = CreditAccountant(
+                settings.SEARCH_CREDITS_PER_RUN,
+                settings.SEARCH_CREDITS_PER_TENANT,
+                settings.SEARCH_CREDITS_TENANT_WINDOW,
+            )
+        return _accountant
@@ -0,0 +1,204 @@
+"""
+Model cascade with validation-based escalation.
+
+For structured-output calls that a small model usually gets right (summarizing
+one page, structuring scraper results), ModelCascade tries the cheapest tier
+first and only escalates to the component's regular model when the answer
+fails validation:
+
+- the call raises, or the output does not parse into the schema even after local
+  repair (utils/structured_output.py; only the last tier retries the model)
+- schema completeness: required string fields are blank
+- self-reported confidence (a `confidence` field) below DR_CASCADE_MIN_CONFIDENCE
+- a component-specific check (length heuristics, minimum result counts)
+
+ModelCascade mirrors the `with_structured_output(schema).invoke(messages)` call
+shape of a chat model, so nodes use it as a drop-in for get_model(). Escalation
+rates and the latency saved versus the top tier are logged per component and
+returned per run by cascade_report(run_id), which the API stores with each run.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from config import settings
+from utils.run_context import current_run_id
+from utils.structured_output import RepairingStructuredOutput
+
+# Returns a reason to escalate, or None if the answer is acceptable
+Validator = Callable[[BaseModel], Optional[str]]
+
+
+def check_completeness(result: BaseModel) -> Optional[str]:
+    """Required string fields must be non-blank."""
+    for name, field in type(result).model_fields.items():
+        value = getattr(result, name, None)
+        if field.is_required() and isinstance(value, str) and not value.strip():
+            return f"empty field '{name}'"
+    return None
+
+
+def check_confidence(result: BaseModel, minimum: float) -> Optional[str]:
+    confidence = getattr(result, "confidence", None)
+    if isinstance(confidence, (int, float)) and confidence < minimum:
+        return f"low confidence {confidence:.2f}"
+    return None
+
+
+def _empty_stats() -> Dict[str, Dict[str, Any]]:
+    return defaultdict(lambda: {
+        "calls": 0,
+        "escalations": 0,
+        "answered_by": defaultdict(int),
+        "escalation_reasons": defaultdict(int),
+        "tier_latency_ms": defaultdict(list),
+        "latency_saved_ms": 0,
+    })
+
+
+class CascadeStats:
+    """Per-component counters: which tier answered, escalations and latencies, for the process and per run."""
+
+    def __init__(self, max_runs: int = 256):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._stats = _empty_stats()
+        self._runs: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+
+    def record(self, component: str, answered_by: str, reasons: List[str], tier_latency: List[Tuple[str, int]], top_tier: str) -> None:
+        run_id = current_run_id()
+        with self._lock:
+            run = self._runs.setdefault(run_id, _empty_stats())
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            entries = (self._stats[component], run[component])
+            for s in entries:
+                s["calls"] += 1
+                s["answered_by"][answered_by] += 1
+                if reasons:
+                    s["escalations"] += 1
+                for reason in reasons:
+                    s["escalation_reasons"][re.sub(r"[\d.]+", "N", reason)] += 1
+                for tier, ms in tier_latency:
+                    history = s["tier_latency_ms"][tier]
+                    history.append(ms)
+                    del history[:-200]
+            # Saved latency: typical top-tier latency (process-wide) minus what this call actually took
+            top_history = self._stats[component]["tier_latency_ms"].get(top_tier)
+            if answered_by != top_tier and top_history:
+                typical = sum(top_history) / len(top_history)
+                for s in entries:
+                    s["latency_saved_ms"] += max(0, int(typical - sum(ms for _, ms in tier_latency)))
+
+    def report(self, run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Escalation counters for one run, or for the process lifetime if run_id is None."""
+        with self._lock:
+            source = self._stats if run_id is None else self._runs.get(run_id, {})
+            out = {}
+            for component, s in source.items():
+                out[component] = {
+                    "calls": s["calls"],
+                    "escalations": s["escalations"],
+                    "escalation_rate": round(s["escalations"] / s["calls"], 3) if s["calls"] else 0.0,
+                    "answered_by": dict(s["answered_by"]),
+                    "escalation_reasons": dict(s["escalation_reasons"]),
+                    "avg_latency_ms": {t: int(sum(v) / len(v)) for t, v in s["tier_latency_ms"].items() if v},
+                    "latency_saved_ms": s["latency_saved_ms"],
+                }
+            return out
+
+
+cascade_stats = CascadeStats()
+
+
+def cascade_report(run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Escalation rates and latency saved per component for a run (process lifetime if None)."""
+    return cascade_stats.report(run_id)
+
+
+class _StructuredCascade:
+    def __init__(self, cascade: "ModelCascade", schema: type):
+        self.cascade = cascade
+        self.schema = schema
+        # Cheaper tiers escalate instead of retrying when repair fails
+        last = len(cascade.tiers) - 1
+        self.tiers = [
+            (name, RepairingStructuredOutput(model, schema, cascade.component, retry=position == last))
+            for position, (name, model) in enumerate(cascade.tiers)
+        ]
+
+    def _check(self, result: Any) -> Optional[str]:
+        if not isinstance(result, BaseModel):
+            return "unparsed output"
+        for check in (
+            check_completeness,
+            lambda r: check_confidence(r, self.cascade.min_confidence),
+            self.cascade.validate,
+        ):
+            reason = check(result) if check else None
+            if reason:
+                return reason
+        return None
+
+    def invoke(self, messages: Sequence[Any], config: Optional[Dict[str, Any]] = None) -> Any:
+        component = self.cascade.component
+        reasons: List[str] = []
+        tier_latency: List[Tuple[str, int]] = []
+        last_error: Optional[BaseException] = None
+        result = None
+        for position, (name, runnable) in enumerate(self.tiers):
+            is_last = position == len(self.tiers) - 1
+            started = time.perf_counter()
+            try:
+                result = runnable.invoke(messages, config=config)
+            except Exception as e:
+                tier_latency.append((name, int((time.perf_counter() - started) * 1000)))
+                last_error = e
+                if is_last:
+                    break
+                reasons.append(f"error {type(e).__name__}")
+                continue
+            tier_latency.append((name, int((time.perf_counter() - started) * 1000)))
+            reason = None if is_last else self._check(result)
+            if reason is None:
+                last_error = None
+                break
+            reasons.append(reason)
+
+        answered_by = tier_latency[-1][0] if tier_latency else self.tiers[-1][0]
+        cascade_stats.record(component, answered_by, reasons, tier_latency, self.tiers[-1][0])
+        if reasons:
+            rate = cascade_stats.report()[component]["escalation_rate"]
+            print(f"[CASCADE] {component}: escalated to {answered_by} ({'; '.join(reasons)}); escalation rate {rate:.0%}")
+        if last_error is not None:
+            raise last_error
+        return result
+
+
+class ModelCascade:
+    """Ordered model tiers (cheapest first) for one component."""
+
+    def __init__(
+        self,
+        component: str,
+        tiers: Sequence[Tuple[str, Any]],
+        validate: Optional[Validator] = None,
+        min_confidence: Optional[float] = None,
+    ):
+        self.component = component
+        self.tiers = list(tiers)
+        self.validate = validate
+        self.min_confidence = settings.CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+
+    def with_structured_output(self, schema: type) -> _StructuredCascade:
+        return _StructuredCascade(self, schema)
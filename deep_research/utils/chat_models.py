@@ -0,0 +1,252 @@
+"""
+Chat model classes used by config/models.py.
+
+ResearchChatOpenAI is a drop-in ChatOpenAI whose provider calls go through the
+pipeline's shared call policies. Subclassing (rather than wrapping in a Runnable)
+keeps bind_tools / with_structured_output working for agents and nodes.
+CallPoliciesMixin holds those policies, so the offline FakeResearchChatModel
+(utils/fake_models.py) runs under the same limiter and resilience policy.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from config import settings
+from utils.rate_limit import get_limiter
+from utils.recording import get_recorder, get_replayer, message_key_view
+from utils.resilience import get_policy
+from utils.tokens import estimate_message_tokens
+
+
+def chat_result_to_fixture(result: ChatResult) -> Dict[str, Any]:
+    return {
+        "generations": [
+            {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+            for g in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }
+
+
+def _usage_tokens(result: ChatResult) -> Optional[int]:
+    total = 0
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None)
+        if not usage:
+            return None
+        total += int(usage.get("total_tokens") or 0)
+    return total
+
+
+def chat_result_from_fixture(data: Dict[str, Any]) -> ChatResult:
+    return ChatResult(
+        generations=[
+            ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g.get("generation_info"))
+            for g in data["generations"]
+        ],
+        llm_output=data.get("llm_output"),
+    )
+
+
+class CallPoliciesMixin:
+    """
+    The shared resilience policy applied to every call and the model's shared
+    RPM/TPM limiter applied to every attempt (see utils/rate_limit.py), for chat
+    models with `model_name` and `max_tokens`.
+    """
+
+    def _call_with_policies(self, generate: Any, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        # Each attempt (retries included) is charged against the model's rate limits
+        parent = self._rate_limited(generate, messages)
+        return get_policy("openai").call(parent, messages, label="OPENAI", **kwargs)
+
+    async def _acall_with_policies(self, agenerate: Any, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        parent = self._arate_limited(agenerate, messages)
+        return await get_policy("openai").acall(parent, messages, label="OPENAI", **kwargs)
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        # Providers count the completion allowance against TPM up front as well
+        completion = self.max_tokens or settings.RATE_LIMIT_COMPLETION_ESTIMATE
+        return estimate_message_tokens(messages) + completion
+
+    def _rate_limited(self, parent: Any, messages: List[BaseMessage]) -> Any:
+        limiter = get_limiter(self.model_name)
+        if limiter is None:
+            return parent
+        estimate = self._estimate_tokens(messages)
+
+        def attempt(*args: Any, **kwargs: Any) -> ChatResult:
+            reservation = limiter.acquire(estimate)
+            try:
+                result = parent(*args, **kwargs)
+            except BaseException:
+                limiter.reconcile(reservation, None)
+                raise
+            used = _usage_tokens(result)
+            limiter.reconcile(reservation, reservation.tokens if used is None else used)
+            return result
+
+        return attempt
+
+    def _arate_limited(self, parent: Any, messages: List[BaseMessage]) -> Any:
+        limiter = get_limiter(self.model_name)
+        if limiter is None:
+            return parent
+        estimate = self._estimate_tokens(messages)
+
+        async def attempt(*args: Any, **kwargs: Any) -> ChatResult:
+            reservation = await limiter.aacquire(estimate)
+            try:
+                result = await parent(*args, **kwargs)
+            except BaseException:
+                limiter.reconcile(reservation, None)
+                raise
+            used = _usage_tokens(result)
+            limiter.reconcile(reservation, reservation.tokens if used is None else used)
+            return result
+
+        return attempt
+
+    def _rate_limited_stream(self, parent: Any, messages: List[BaseMessage]) -> Any:
+        limiter = get_limiter(self.model_name)
+        if limiter is None:
+            return parent
+        estimate = self._estimate_tokens(messages)
+
+        def attempt(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+            reservation = limiter.acquire(estimate)
+            used = None
+            try:
+                for chunk in parent(*args, **kwargs):
+                    usage = getattr(chunk.message, "usage_metadata", None)
+                    if usage:
+                        used = (used or 0) + int(usage.get("total_tokens") or 0)
+                    yield chunk
+            except BaseException:
+                limiter.reconcile(reservation, None)
+                raise
+            limiter.reconcile(reservation, reservation.tokens if used is None else used)
+
+        return attempt
+
+    def _arate_limited_stream(self, parent: Any, messages: List[BaseMessage]) -> Any:
+        limiter = get_limiter(self.model_name)
+        if limiter is None:
+            return parent
+        estimate = self._estimate_tokens(messages)
+
+        async def attempt(*args: Any, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+            reservation = await limiter.aacquire(estimate)
+            used = None
+            try:
+                async for chunk in parent(*args, **kwargs):
+                    usage = getattr(chunk.message, "usage_metadata", None)
+                    if usage:
+                        used = (used or 0) + int(usage.get("total_tokens") or 0)
+                    yield chunk
+            except BaseException:
+                limiter.reconcile(reservation, None)
+                raise
+            limiter.reconcile(reservation, reservation.tokens if used is None else used)
+
+        return attempt
+
+
+class ResearchChatOpenAI(CallPoliciesMixin, ChatOpenAI):
+    """
+    ChatOpenAI with the shared call policies (CallPoliciesMixin) and record/replay
+    of calls when fixtures are enabled (see utils/recording.py).
+    """
+
+    # The SDK's own retries would bypass the shared budget and breaker
+    max_retries: Optional[int] = 0
+
+    def _fixture_request(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "params": self._get_invocation_params(stop=stop, **kwargs),
+            "messages": [message_key_view(m) for m in messages],
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        replayer = get_replayer()
+        if replayer is not None:
+            return chat_result_from_fixture(replayer.respond("chat", self._fixture_request(messages, stop, kwargs)))
+
+        started = time.perf_counter()
+        result = self._call_with_policies(super()._generate, messages, stop=stop, run_manager=run_manager, **kwargs)
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.record(
+                "chat",
+                self._fixture_request(messages, stop, kwargs),
+                chat_result_to_fixture(result),
+                int((time.perf_counter() - started) * 1000),
+            )
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        replayer = get_replayer()
+        if replayer is not None:
+            return chat_result_from_fixture(
+                await replayer.arespond("chat", self._fixture_request(messages, stop, kwargs))
+            )
+
+        started = time.perf_counter()
+        result = await self._acall_with_policies(
+            super()._agenerate, messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.record(
+                "chat",
+                self._fixture_request(messages, stop, kwargs),
+                chat_result_to_fixture(result),
+                int((time.perf_counter() - started) * 1000),
+            )
+        return result
+
+    # Streaming ("messages" stream mode) gets the same policy and limiter; an attempt is
+    # only retried while it has not produced a chunk yet
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        parent = self._rate_limited_stream(super()._stream, messages)
+        yield from get_policy("openai").stream(
+            parent, messages, stop=stop, run_manager=run_manager, label="OPENAI", **kwargs
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        parent = self._arate_limited_stream(super()._astream, messages)
+        async for chunk in get_policy("openai").astream(
+            parent, messages, stop=stop, run_manager=run_manager, label="OPENAI", **kwargs
+        ):
+            yield chunk
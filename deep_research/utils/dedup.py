@@ -0,0 +1,154 @@
+"""
+Near-duplicate detection for search results.
+
+Syndicated articles, mirrors and AMP/print variants rarely share a URL but share
+almost all of their text. Each result gets a 64-bit SimHash over word shingles of
+its title and content; results within a small Hamming distance are collapsed into
+one canonical result that keeps the other URLs as alternates.
+
+Detection runs per subquery (collapse_near_duplicates) and across the whole run
+(RunDuplicateIndex), so the same article found by two researchers is only
+summarized once. The run-wide index is keyed by the invocation's run id
+(utils/run_context.py), never shared between runs; if it is missing (e.g. after a
+process restart) a duplicate may be stored twice, but nothing is skipped wrongly.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+SIMHASH_BITS = 64
+# Max differing bits for two fingerprints to count as the same document
+DEFAULT_MAX_DISTANCE = 3
+# Below this many shingles the fingerprint is too noisy; fall back to URL identity
+MIN_SHINGLES = 8
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "outputtype", "amp", "print", "output"}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so AMP/print/mobile/tracking variants map to the same key."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = re.sub(r"/(amp|print)/?$", "", parts.path.rstrip("/"))
+    path = re.sub(r"\.amp(\.html)?$", r"\1", path)
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    canonical = f"{host}{path}"
+    return f"{canonical}?{urlencode(sorted(query))}" if query else canonical
+
+
+def _shingles(text: str) -> List[str]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return words
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of the text's word shingles, or None if the text is too short."""
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    weights = [0] * SIMHASH_BITS
+    for shingle in set(shingles):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def result_fingerprint(result) -> Tuple[str, Optional[int]]:
+    """(canonical URL, SimHash) for a SearchResult-like object."""
+    text = f"{getattr(result, 'title', '')}\n{getattr(result, 'content', '')}"
+    return canonical_url(result.url), simhash(text)
+
+
+def _is_duplicate(a: Tuple[str, Optional[int]], b: Tuple[str, Optional[int]], max_distance: int) -> bool:
+    if a[0] == b[0]:
+        return True
+    if a[1] is None or b[1] is None:
+        return False
+    return hamming_distance(a[1], b[1]) <= max_distance
+
+
+def collapse_near_duplicates(results: List, max_distance: int = DEFAULT_MAX_DISTANCE) -> List:
+    """
+    Collapse near-duplicate results, keeping the first (highest-ranked) as canonical.
+    The canonical result's alternate_urls collects the URLs of the collapsed copies.
+    """
+    kept, fingerprints = [], []
+    for r in results:
+        fp = result_fingerprint(r)
+        match = next((i for i, other in enumerate(fingerprints) if _is_duplicate(fp, other, max_distance)), None)
+        if match is None:
+            kept.append(r)
+            fingerprints.append(fp)
+            continue
+        canonical = kept[match]
+        alternates = list(canonical.alternate_urls)
+        for url in [r.url, *r.alternate_urls]:
+            if url != canonical.url and url not in alternates:
+                alternates.append(url)
+        kept[match] = canonical.model_copy(update={"alternate_urls": alternates})
+    return kept
+
+
+class RunDuplicateIndex:
+    """Fingerprints of every result kept so far in one run, shared across subqueries."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._entries: List[Tuple[Tuple[str, Optional[int]], str]] = []
+        self._lock = threading.Lock()
+
+    def claim(self, result, owner: str) -> Optional[str]:
+        """
+        Register a result as owned by `owner` (e.g. its raw_data path).
+        Returns the existing owner if an earlier result in the run is a near-duplicate.
+        """
+        fp = result_fingerprint(result)
+        with self._lock:
+            for other, other_owner in self._entries:
+                if _is_duplicate(fp, other, self.max_distance):
+                    return other_owner
+            self._entries.append((fp, owner))
+        return None
+
+
+# Bounded so long-lived API workers do not keep an index for every past run
+_MAX_TRACKED_RUNS = 64
+_run_indexes: "OrderedDict[str, RunDuplicateIndex]" = OrderedDict()
+_run_indexes_lock = threading.Lock()
+
+
+def get_run_index(run_id: str) -> RunDuplicateIndex:
+    """Return the duplicate index for a run (see run_context.current_run_id), creating it on first use."""
+    with _run_indexes_lock:
+        index = _run_indexes.get(run_id)
+        if index is None:
+            index = RunDuplicateIndex()
+            _run_indexes[run_id] = index
+            while len(_run_indexes) > _MAX_TRACKED_RUNS:
+                _run_indexes.popitem(last=False)
+        else:
+            _run_indexes.move_to_end(run_id)
+        return index
@@ -0,0 +1,508 @@
+"""
+Deterministic fake chat model for offline runs and performance tests.
+
+With DR_MODEL_PROVIDER=fake, config/models.py builds FakeResearchChatModel
+instead of OpenAI clients, so the full workflow runs without keys or network
+(pair it with DR_SEARCH_PROVIDER=fake, see tools/fake_search.py). The model:
+
+- supports invoke/ainvoke, bind_tools with tool calls, and with_structured_output
+  (through LangChain's tool-calling implementation); the schemas of the nodes
+  and structured stages are filled from the tool results / files in the prompt,
+  other schemas from their JSON schema
+- plays a scripted behavior per component when tools are bound: the scraper
+  searches, and each deep agent reads its inputs and writes the files the next
+  stage expects (clarified_query.md, subqueries.json, research_plan.json, ...)
+- sleeps for a log-normally distributed latency and writes free text of a
+  log-normally distributed token length (DR_FAKE_LLM_* settings)
+- reports usage_metadata, so usage and LLM-cache accounting still work, and runs
+  its calls under the same rate limiter and resilience policy as
+  ResearchChatOpenAI (utils/chat_models.CallPoliciesMixin)
+
+Everything is seeded from DR_FAKE_SEED and the request content, so a given
+prompt always produces the same answer.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from config import settings
+from utils.chat_models import CallPoliciesMixin
+from utils.tokens import estimate_message_tokens, estimate_tokens
+
+# --- Deterministic text ---
+
+_WORDS = (
+    "analysis adoption impact market policy growth evidence study report data trend "
+    "framework model performance cost risk regulation deployment outcome benchmark "
+    "survey capacity efficiency investment research industry sector technology review"
+).split()
+_DOMAINS = (
+    "arxiv.org", "nature.com", "reuters.com", "nih.gov", "worldbank.org",
+    "techcrunch.com", "mckinsey.com", "wikipedia.org", "medium.com", "ieee.org",
+)
+
+
+def rng_for(*parts: Any) -> random.Random:
+    """A Random seeded from DR_FAKE_SEED and the given parts (stable across processes)."""
+    digest = hashlib.sha256("\x00".join([str(settings.FAKE_SEED), *map(str, parts)]).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def sample_lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    return median * rng.lognormvariate(0.0, sigma) if median > 0 else 0.0
+
+
+_STOPWORDS = {"what", "which", "that", "this", "with", "from", "have", "been", "does", "into", "about", "their", "there", "these", "those"}
+
+
+def keywords(text: str, limit: int = 6) -> List[str]:
+    words = [w for w in re.findall(r"[A-Za-z][A-Za-z0-9-]{3,}", text.lower()) if w not in _STOPWORDS]
+    return list(dict.fromkeys(words))[:limit] or ["research"]
+
+
+def sentence(rng: random.Random, topic: Sequence[str]) -> str:
+    words = [rng.choice(topic) if rng.random() < 0.35 else rng.choice(_WORDS) for _ in range(rng.randint(8, 16))]
+    if rng.random() < 0.4:
+        words.insert(rng.randint(1, len(words) - 1), f"{rng.randint(2, 98)}.{rng.randint(0, 9)}%")
+    if rng.random() < 0.3:
+        words.append(f"in {rng.randint(2015, 2025)}")
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph_text(rng: random.Random, topic: Sequence[str], tokens: int) -> str:
+    """Roughly `tokens` tokens of deterministic prose about `topic`."""
+    sentences, size = [], 0
+    while size < tokens:
+        s = sentence(rng, topic)
+        sentences.append(s)
+        size += estimate_tokens(s)
+    return " ".join(sentences)
+
+
+def sleep_latency(rng: random.Random, median_ms: float, sigma: float) -> float:
+    seconds = sample_lognormal(rng, median_ms, sigma) / 1000.0
+    if seconds > 0:
+        time.sleep(seconds)
+    return seconds
+
+
+# --- Reading the conversation ---
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _section(text: str, label: str) -> str:
+    """Value of a PromptBuilder section ("Label:\\nvalue") in a human message."""
+    match = re.search(rf"(?:^|\n\n){re.escape(label)}:\n(.*?)(?=\n\n[A-Z][^\n]*:\n|\Z)", text, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def _strip_line_numbers(text: str) -> str:
+    # read_file returns `cat -n` style output
+    return "\n".join(re.sub(r"^\s*\d+\t", "", line) for line in text.splitlines())
+
+
+def _tool_results(messages: Sequence[BaseMessage]) -> Dict[str, str]:
+    """read_file outputs by path (later reads win), plus other tool outputs by tool name."""
+    calls = {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            for call in message.tool_calls or []:
+                calls[call.get("id")] = call
+    results = {}
+    for message in messages:
+        if not isinstance(message, ToolMessage):
+            continue
+        call = calls.get(message.tool_call_id) or {}
+        if call.get("name") == "read_file":
+            path = str((call.get("args") or {}).get("file_path", "")).lstrip("/")
+            if _text(message).startswith("Error: File '"):
+                # Missing file: the tool's error text is not the file's content
+                continue
+            results[path] = _strip_line_numbers(_text(message))
+        else:
+            results[call.get("name") or message.name or "tool"] = _text(message)
+    return results
+
+
+def _turn(messages: Sequence[BaseMessage]) -> int:
+    return sum(1 for m in messages if isinstance(m, AIMessage))
+
+
+def _request_text(messages: Sequence[BaseMessage]) -> str:
+    human = [m for m in messages if isinstance(m, HumanMessage)]
+    return _text(human[0]) if human else ""
+
+
+def _json_or(text: str, default: Any) -> Any:
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return default
+
+
+# --- Scripted agent behaviors ---
+
+ToolCalls = List[Dict[str, Any]]
+Script = Callable[[Sequence[BaseMessage], random.Random, "FakeResearchChatModel"], Optional[ToolCalls]]
+
+
+def _call(name: str, **args: Any) -> Dict[str, Any]:
+    return {"name": name, "args": args}
+
+
+def _query(files: Dict[str, str]) -> str:
+    text = files.get("clarified_query.md") or files.get("query.txt") or "research topic"
+    objective = re.search(r"## Refined Research Objective\n(.+)", text)
+    return (objective.group(1) if objective else text.strip().splitlines()[0]).strip()
+
+
+def _scraper_script(messages, rng, model) -> Optional[ToolCalls]:
+    subquery = _section(_request_text(messages), "Subquery") or "research"
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("tavily_search", query=subquery, max_results=5)]
+    if turn == 1:
+        return [_call("tavily_search", query=f"{subquery} {rng.choice(_WORDS)} data", max_results=5)]
+    return None
+
+
+def _clarifier_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("read_file", file_path="query.txt")]
+    if turn == 1:
+        if "query.txt" in files:
+            query = _query(files)
+        else:
+            # Run started from messages rather than query.txt: the user's last message is the query
+            human = [_text(m).strip() for m in messages if isinstance(m, HumanMessage) and _text(m).strip()]
+            if not human:
+                raise ValueError("fake clarifier: no query.txt and no user message to take the research query from")
+            query = human[-1]
+        topic = keywords(query)
+        return [_call(
+            "finalize_clarified_query",
+            original_query=query,
+            clarifications="No clarification needed.",
+            refined_query=query,
+            scope=f"Recent developments in {' '.join(topic[:3])}.",
+            key_questions=[f"What is known about {word}?" for word in topic[:3]],
+        )]
+    return None
+
+
+def _fake_subqueries(query: str) -> List[Dict[str, Any]]:
+    aspects = ["current state", "key drivers", "risks and limitations", "market and adoption", "outlook", "case studies"]
+    return [
+        {
+            "id": i + 1,
+            "query": f"{query} - {aspects[i % len(aspects)]}",
+            "priority": "high" if i == 0 else "medium",
+            "freshness": "recent" if i % 2 else "any",
+            "description": f"Covers the {aspects[i % len(aspects)]} of the topic.",
+        }
+        for i in range(settings.FAKE_SUBQUERIES)
+    ]
+
+
+def _fake_plan(subqueries: List[Any]) -> Dict[str, Any]:
+    subqueries = [sq for sq in subqueries if isinstance(sq, dict)]
+    return {
+        "executive_summary": "Search each subquery with its key terms, preferring recent and authoritative sources.",
+        "subqueries": [
+            {
+                **sq,
+                "search_strategy": {
+                    "primary_terms": keywords(sq.get("query", ""), 3),
+                    "alternative_terms": [],
+                    "max_results": 5,
+                    "search_depth": "basic",
+                    "time_range": None,
+                    "preferred_sources": ["web", "academic"],
+                    "include_domains": [],
+                    "exclude_domains": [],
+                    "backup_strategy": "Broaden the terms.",
+                },
+                "expected_results": 5,
+                "dependencies": [],
+                "can_run_parallel": True,
+            }
+            for sq in subqueries
+        ],
+        "execution_order": [sq.get("id") for sq in subqueries],
+        "quality_criteria": ["Validate claims with multiple sources"],
+    }
+
+
+def _decomposer_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("read_file", file_path="clarified_query.md")]
+    if turn == 1:
+        subqueries = _fake_subqueries(_query(files))
+        return [_call("write_file", file_path="subqueries.json", content=json.dumps(subqueries, indent=2))]
+    return None
+
+
+def _strategist_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("read_file", file_path="subqueries.json")]
+    if turn == 1:
+        plan = _fake_plan(_json_or(files.get("subqueries.json"), []))
+        return [_call("write_file", file_path="research_plan.json", content=json.dumps(plan, indent=2))]
+    return None
+
+
+def _report(rng: random.Random, model: "FakeResearchChatModel", title: str, topic: Sequence[str], sections: Sequence[str]) -> str:
+    per_section = max(20, model.completion_tokens(rng) // max(1, len(sections)))
+    body = "\n\n".join(f"## {name}\n\n{paragraph_text(rng, topic, per_section)}" for name in sections)
+    return f"# {title}\n\n{body}\n"
+
+
+def _factchecker_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("ls")]
+    if turn == 1:
+        summaries = re.findall(r"summaries/[^'\",\]\s]+", files.get("ls", ""))[:2]
+        return [_call("read_file", file_path=p) for p in summaries] or [_call("read_file", file_path="clarified_query.md")]
+    if turn == 2:
+        topic = keywords(" ".join(files.values()))
+        return [_call("write_file", file_path="factcheck_notes.md", content=_report(
+            rng, model, "Fact-Check Notes", topic, ["Verified Claims", "Contradictions", "Weak Sources"]))]
+    return None
+
+
+def _synthesizer_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("read_file", file_path="clarified_query.md"), _call("read_file", file_path="factcheck_notes.md")]
+    if turn == 1:
+        topic = keywords(_query(files))
+        return [_call("write_file", file_path="draft_report.md", content=_report(
+            rng, model, _query(files), topic,
+            ["Executive Summary", "Introduction", "Findings", "Conclusions", "Limitations", "References"]))]
+    return None
+
+
+def _reviewer_script(messages, rng, model) -> Optional[ToolCalls]:
+    files = _tool_results(messages)
+    turn = _turn(messages)
+    if turn == 0:
+        return [_call("read_file", file_path="draft_report.md"), _call("read_file", file_path="subqueries.json")]
+    if turn == 1:
+        draft = files.get("draft_report.md") or "# Report\n"
+        gaps = {"gaps": [], "coverage": "complete", "subqueries_checked": len(_json_or(files.get("subqueries.json"), []))}
+        return [
+            _call("write_file", file_path="final_paper.md", content=draft),
+            _call("write_file", file_path="gap_list.json", content=json.dumps(gaps, indent=2)),
+        ]
+    return None
+
+
+AGENT_SCRIPTS: Dict[str, Script] = {
+    "scraper_node": _scraper_script,
+    "clarifier": _clarifier_script,
+    "decomposer": _decomposer_script,
+    "strategist": _strategist_script,
+    "factchecker": _factchecker_script,
+    "synthesizer": _synthesizer_script,
+    "reviewer": _reviewer_script,
+}
+
+
+# --- Structured outputs ---
+
+def _scraper_output(messages, rng, model) -> Dict[str, Any]:
+    request = _request_text(messages)
+    results = []
+    for chunk in _section(request, "Tool Results").split("\n\n"):
+        item = _json_or(chunk, None)
+        if isinstance(item, dict) and item.get("url"):
+            results.append({
+                "url": item["url"],
+                "title": item.get("title", ""),
+                "snippet": item.get("snippet", ""),
+                "content": item.get("content") or item.get("snippet", ""),
+                "published_date": item.get("published_date"),
+                "score": float(item.get("score") or 0.5),
+            })
+    subquery = _section(request, "Original subquery")
+    return {"results": results, "terms_used": [subquery] if subquery else []}
+
+
+def _summary_analysis(messages, rng, model) -> Dict[str, Any]:
+    request = _request_text(messages)
+    return _analysis(_section(request, "Raw Content") or request, _section(request, "Research Question"), rng, model)
+
+
+def _batch_summary_analysis(messages, rng, model) -> Dict[str, Any]:
+    request = _request_text(messages)
+    question = _section(request, "Research Question")
+    indices = [int(n) for n in re.findall(r"(?:^|\n\n)Result (\d+):\n", request)]
+    return {"summaries": [
+        dict(_analysis(_section(request, f"Result {i}"), question, rng, model), result_index=i) for i in indices
+    ]}
+
+
+def _analysis(raw: str, question: str, rng, model) -> Dict[str, Any]:
+    url = re.search(r"URL:\s*(\S+)", raw)
+    title = re.search(r"Title:\s*(.+)", raw)
+    topic = keywords(question or raw)
+    findings = [sentence(rng, topic) for _ in range(rng.randint(2, 4))]
+    return {
+        "key_findings": findings,
+        "main_arguments": [sentence(rng, topic)],
+        "data_points": [s for s in findings if "%" in s] or [sentence(rng, topic)],
+        "conclusions": [sentence(rng, topic)],
+        "relevance_to_query": "high" if rng.random() < 0.7 else "medium",
+        "source_reliability": rng.choice(["high", "medium"]),
+        "summary_text": paragraph_text(rng, topic, max(40, model.completion_tokens(rng) // 3)),
+        "extracted_url": url.group(1) if url else "",
+        "extracted_title": title.group(1).strip() if title else "",
+        "confidence": round(rng.uniform(0.5, 0.95), 2),
+    }
+
+
+def _subquery_list(messages, rng, model) -> Dict[str, Any]:
+    return {"subqueries": _fake_subqueries(_query({"clarified_query.md": _section(_request_text(messages), "clarified_query.md")}))}
+
+
+def _research_plan(messages, rng, model) -> Dict[str, Any]:
+    return _fake_plan(_json_or(_section(_request_text(messages), "subqueries.json"), []))
+
+
+STRUCTURED_OUTPUTS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "ScraperOutput": _scraper_output,
+    "SummaryAnalysis": _summary_analysis,
+    "BatchSummaryAnalysis": _batch_summary_analysis,
+    "SubQueryList": _subquery_list,
+    "ResearchPlan": _research_plan,
+}
+
+
+def fill_schema(schema: Dict[str, Any], rng: random.Random, topic: Sequence[str], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Generic value for a JSON schema (used for schemas without a dedicated generator)."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fill_schema(defs.get(schema["$ref"].split("/")[-1], {}), rng, topic, defs)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return fill_schema(options[0], rng, topic, defs)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type", "string")
+    if kind == "object":
+        return {name: fill_schema(prop, rng, topic, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fill_schema(schema.get("items", {}), rng, topic, defs) for _ in range(rng.randint(1, 3))]
+    if kind == "integer":
+        return rng.randint(1, 10)
+    if kind == "number":
+        return round(rng.uniform(0.5, 1.0), 2)
+    if kind == "boolean":
+        return True
+    return sentence(rng, topic)
+
+
+# --- The model ---
+
+class FakeResearchChatModel(CallPoliciesMixin, BaseChatModel):
+    """Offline stand-in for ResearchChatOpenAI (see module docstring)."""
+
+    model_name: str = "fake"
+    # Set per component by config/models.py; selects the scripted agent behavior
+    component: str = "default"
+    temperature: Optional[float] = 0
+    max_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-research-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "component": self.component, "seed": settings.FAKE_SEED}
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def completion_tokens(self, rng: random.Random) -> int:
+        tokens = int(sample_lognormal(rng, settings.FAKE_COMPLETION_TOKENS, settings.FAKE_COMPLETION_SIGMA))
+        return max(1, min(tokens, self.max_tokens or tokens))
+
+    def _rng(self, messages: Sequence[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> random.Random:
+        names = [t["function"]["name"] for t in tools or []]
+        return rng_for(self.model_name, self.component, names, *[_text(m) for m in messages])
+
+    def _respond(self, messages: Sequence[BaseMessage], rng: random.Random, tools: Optional[List[Dict[str, Any]]], tool_choice: Any) -> AIMessage:
+        tools = tools or []
+        forced = tool_choice not in (None, "auto", "none")
+        if forced and len(tools) == 1:
+            function = tools[0]["function"]
+            generator = STRUCTURED_OUTPUTS.get(function["name"])
+            topic = keywords(_request_text(messages))
+            args = generator(messages, rng, self) if generator else fill_schema(function.get("parameters", {}), rng, topic)
+            return AIMessage(content="", tool_calls=[{"name": function["name"], "args": args, "id": f"call_{rng.getrandbits(48):x}"}])
+
+        script = AGENT_SCRIPTS.get(self.component)
+        available = {t["function"]["name"] for t in tools}
+        calls = script(messages, rng, self) if script and tools else None
+        calls = [c for c in calls or [] if c["name"] in available]
+        if calls:
+            return AIMessage(content="", tool_calls=[{**c, "id": f"call_{rng.getrandbits(48):x}"} for c in calls])
+
+        topic = keywords(" ".join(_text(m) for m in messages if not isinstance(m, SystemMessage))[:2000])
+        return AIMessage(content=paragraph_text(rng, topic, self.completion_tokens(rng)))
+
+    def _result(self, messages: Sequence[BaseMessage], message: AIMessage) -> ChatResult:
+        input_tokens = estimate_message_tokens(messages)
+        output_tokens = estimate_tokens(_text(message)) + estimate_message_tokens([{"content": "", "tool_calls": message.tool_calls}])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model_name})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return self._call_with_policies(self._fake_generate, messages, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return await self._acall_with_policies(self._afake_generate, messages, **kwargs)
+
+    def _fake_generate(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        rng = self._rng(messages, kwargs.get("tools"))
+        sleep_latency(rng, settings.FAKE_LLM_LATENCY_MS, settings.FAKE_LLM_LATENCY_SIGMA)
+        return self._result(messages, self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice")))
+
+    async def _afake_generate(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        rng = self._rng(messages, kwargs.get("tools"))
+        delay = sample_lognormal(rng, settings.FAKE_LLM_LATENCY_MS, settings.FAKE_LLM_LATENCY_SIGMA) / 1000.0
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._result(messages, self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice")))
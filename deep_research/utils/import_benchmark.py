@@ -0,0 +1,98 @@
+"""
+Import-time benchmark for the workflow entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and checks
+the result against a budget, so regressions in startup time (an agent compiled at
+import again, a provider SDK imported eagerly) are caught before they ship:
+
+    python utils/import_benchmark.py                       # graphs.workflow
+    python utils/import_benchmark.py api.server --overhead-ms 800 --top 15
+    python utils/import_benchmark.py --budget-ms 1500      # fixed budget instead
+
+A fixed 1000 ms budget cannot be met: the workflow needs StateGraph, and importing
+langgraph.graph alone (langchain_core messages, tracers, langsmith) takes about
+1 s on a typical machine. By default the budget is therefore measured: the import
+time of BASELINE_MODULE on the same machine plus --overhead-ms for this package's
+own modules. Each import is timed --repeat times and the fastest run counts.
+
+Besides the total, it fails if any module from HEAVY_MODULES was imported; those
+must only load when a run first needs a model, agent or search client.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily on first use; seeing them at import time means something is built eagerly
+HEAVY_MODULES = ("langchain_openai", "openai", "tavily", "langchain.agents")
+# Import floor every entry point pays; the default budget is relative to it
+BASELINE_MODULE = "langgraph.graph"
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int]]:
+    """Total import time of `module` in microseconds, and the cumulative time per imported module."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    # Importing must not require credentials
+    env.setdefault("OPENAI_API_KEY", "import-benchmark")
+    env.setdefault("TAVILY_API_KEY", "import-benchmark")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cum.isdigit():
+            cumulative[name] = int(cum)
+    return cumulative.get(module, 0), cumulative
+
+
+def measure_best(module: str, repeat: int) -> Tuple[int, Dict[str, int]]:
+    """The fastest of `repeat` measurements, to keep scheduler noise out of the budget check."""
+    return min((measure(module) for _ in range(max(1, repeat))), key=lambda result: result[0])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check import time against a budget")
+    parser.add_argument("module", nargs="?", default="graphs.workflow")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fixed budget (default: baseline + overhead)")
+    parser.add_argument("--overhead-ms", type=float, default=400.0, help=f"allowed time on top of importing {BASELINE_MODULE}")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per module; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        baseline_us, _ = measure_best(BASELINE_MODULE, args.repeat)
+        budget_ms = baseline_us / 1000 + args.overhead_ms
+        print(f"[IMPORT] {BASELINE_MODULE}: {baseline_us / 1000:.0f} ms baseline + {args.overhead_ms:.0f} ms overhead")
+
+    total_us, cumulative = measure_best(args.module, args.repeat)
+    print(f"[IMPORT] {args.module}: {total_us / 1000:.0f} ms (budget {budget_ms:.0f} ms)")
+    for name, us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[1:args.top + 1]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    ok = True
+    heavy = [m for m in HEAVY_MODULES if m in cumulative]
+    if heavy:
+        print(f"[IMPORT] ✗ Eagerly imported: {', '.join(heavy)}")
+        ok = False
+    if total_us / 1000 > budget_ms:
+        print(f"[IMPORT] ✗ Over budget by {total_us / 1000 - budget_ms:.0f} ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
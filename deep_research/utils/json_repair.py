@@ -0,0 +1,181 @@
+"""
+Local repair of almost-valid structured model output.
+
+Most structured-output failures are mechanical: the JSON is wrapped in a Markdown
+fence or prose, has a trailing comma, was cut off at max_tokens, or a field has
+the wrong scalar type. Those are fixed here without another model call:
+
+- repair_json(text): strips fences and surrounding prose, drops trailing commas,
+  maps Python literals (True/False/None), and closes truncated strings, arrays
+  and objects, cutting back to the last complete element if needed
+- coerce_to_schema(data, schema): coerces values against a pydantic model
+  (numbers to strings, "0.8" to floats, "80%" to 0.8, a scalar to a one-element
+  list) and salvages the valid elements of lists of sub-models instead of
+  rejecting the whole answer. Missing or null required fields are never
+  invented: the answer fails validation and goes back to the model
+
+Both raise ValueError when the output cannot be made valid.
+"""
+
+import json
+import re
+from typing import Any, List, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|\Z)", re.S)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _close(text: str, stack: List[str]) -> str:
+    return text.rstrip().rstrip(",:") + "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def repair_json(text: str) -> Any:
+    """Parse `text` as JSON, repairing common damage. Raises ValueError if unrecoverable."""
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        pass
+
+    fenced = _FENCE.search(text or "")
+    body = fenced.group(1) if fenced else (text or "")
+    starts = [i for i in (body.find("{"), body.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object or array in output")
+    body = body[min(starts):]
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (length of `out`, open containers) at points where everything before is complete
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escaped = False
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            i += 1
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(ch)
+            out.append(ch)
+            cuts.append((len(out), list(stack)))
+            i += 1
+            continue
+        elif ch in "}]":
+            # Trailing comma before a closer
+            while out and out[-1] in " \t\r\n,":
+                out.pop()
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                break
+            stack.pop()
+            out.append(ch)
+            i += 1
+            if not stack:
+                break
+            continue
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+        else:
+            literal = next((k for k in _LITERALS if body.startswith(k, i)), None)
+            if literal:
+                out.append(_LITERALS[literal])
+                i += len(literal)
+                continue
+        out.append(ch)
+        i += 1
+
+    text = "".join(out)
+    candidates = [_close(text + ('"' if in_string else ""), stack)]
+    candidates += [_close(text[:length], open_) for length, open_ in reversed(cuts[-20:])]
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    raise ValueError("could not repair JSON output")
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _coerce(value: Any, annotation: Any, notes: List[str], path: str) -> Any:
+    origin = get_origin(annotation)
+    if origin is Union:
+        options = [a for a in get_args(annotation) if a is not type(None)]
+        if value is None or len(options) != 1:
+            return value
+        return _coerce(value, options[0], notes, path)
+    if _is_model(annotation):
+        return _coerce_model(value, annotation, notes, path)
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (Any,)
+        if value is None:
+            return value
+        if not isinstance(value, list):
+            notes.append(f"{path}: wrapped scalar in list")
+            value = [value]
+        if not _is_model(item):
+            return [_coerce(v, item, notes, f"{path}[{n}]") for n, v in enumerate(value)]
+        kept = []
+        for n, element in enumerate(value):
+            try:
+                kept.append(item.model_validate(_coerce_model(element, item, notes, f"{path}[{n}]")))
+            except (ValueError, ValidationError):
+                notes.append(f"{path}[{n}]: dropped invalid element")
+        return kept
+    if annotation is str:
+        if isinstance(value, (int, float, bool)):
+            return str(value)
+        if isinstance(value, list):
+            return "; ".join(str(v) for v in value)
+        if isinstance(value, dict):
+            return json.dumps(value)
+    if annotation in (int, float) and isinstance(value, str):
+        text = value.strip()
+        try:
+            number = float(text.rstrip("%"))
+        except ValueError:
+            return value
+        if text.endswith("%") and annotation is float:
+            # Fractions (confidence, relevance) are 0-1: "80%" is 0.8
+            number /= 100
+            notes.append(f"{path}: converted percentage to fraction")
+        return int(number) if annotation is int else number
+    return value
+
+
+def _coerce_model(data: Any, schema: Type[BaseModel], notes: List[str], path: str) -> dict:
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], dict):
+        data = data[0]
+    if not isinstance(data, dict):
+        raise ValueError(f"{path or schema.__name__}: expected an object")
+    out = {}
+    for name, field in schema.model_fields.items():
+        if name in data:
+            out[name] = _coerce(data[name], field.annotation, notes, f"{path}.{name}".lstrip("."))
+    return out
+
+
+def coerce_to_schema(data: Any, schema: Type[BaseModel]) -> Tuple[BaseModel, List[str]]:
+    """Validate `data` against `schema` after coercion and salvage. Returns the model and what was changed."""
+    try:
+        return schema.model_validate(data), []
+    except ValidationError:
+        pass
+    notes: List[str] = []
+    try:
+        return schema.model_validate(_coerce_model(data, schema, notes, "")), notes
+    except ValidationError as e:
+        raise ValueError(str(e)) from e
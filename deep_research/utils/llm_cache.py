@@ -0,0 +1,169 @@
+"""
+Persistent LLM response cache.
+
+SQLiteLLMCache implements LangChain's BaseCache, so it plugs into a chat model's
+`cache=` field: BaseChatModel looks responses up before calling the provider and
+stores them afterwards. LangChain keys each entry on
+
+    prompt     -> the serialized messages
+    llm_string -> model id and invocation parameters, including bound tools and
+                  the structured-output schema
+
+which are hashed together into the row key here. Entries live in a local SQLite
+file and the least recently used ones are evicted once the file's payload grows
+past DR_LLM_CACHE_MAX_MB.
+
+config/models.get_model attaches the cache per component (DR_LLM_CACHE_COMPONENTS,
+summarizer_node by default) when DR_LLM_CACHE is on and the model samples
+deterministically; DR_LLM_CACHE_BYPASS opts components out again. The gpt-5
+models sample, so with them a listed component is only cached when
+DR_LLM_CACHE_ALLOW_SAMPLING is set: a cached answer is then one valid sample,
+replayed for every identical request. Otherwise get_model warns that the
+component stays uncached.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from config import settings
+
+
+_ALLOWED_OBJECTS = [ChatGeneration, AIMessage]
+
+# OpenAI reasoning models (o-series, gpt-5 except gpt-5-chat) ignore temperature and always sample
+_SAMPLING_OPENAI_MODELS = re.compile(r"^(o\d|gpt-5(?!-chat))")
+
+
+class SQLiteLLMCache(BaseCache):
+    """LRU, size-bounded LLM cache in a single SQLite file (safe across threads)."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                # Only chat generations are ever stored; refuse to revive anything else
+                return loads(row[0], allowed_objects=_ALLOWED_OBJECTS)
+        except Exception as e:
+            # Entries written by an incompatible LangChain version are treated as misses
+            print(f"[LLM CACHE] Dropping unreadable entry ({type(e).__name__})")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = dumps(list(return_val))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, len(value), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until the payload is back under 90% of the cap
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        print(f"[LLM CACHE] Evicted {evicted} entries (size cap {self.max_bytes} bytes)")
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[SQLiteLLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> SQLiteLLMCache:
+    """The process-wide cache backed by DR_LLM_CACHE_PATH."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteLLMCache(settings.LLM_CACHE_PATH, settings.LLM_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
+
+
+def cache_enabled_for(component_name: str, components: Optional[Sequence[str]] = None) -> bool:
+    """Whether a component's model should read and write the persistent cache."""
+    if not settings.LLM_CACHE_ENABLED or settings.FIXTURE_MODE != "off":
+        # Cache hits would bypass fixture recording and replay
+        return False
+    if component_name in settings.LLM_CACHE_BYPASS:
+        return False
+    components = settings.LLM_CACHE_COMPONENTS if components is None else components
+    return component_name in components
+
+
+def samples_deterministically(model: Any) -> bool:
+    """
+    Whether the model answers a repeated request the same way, so a cached answer is
+    as good as a fresh one. Only zero-temperature sampling qualifies; langchain-openai
+    reports None for models that drop the temperature parameter.
+    """
+    if getattr(model, "temperature", None) != 0:
+        return False
+    from langchain_openai import ChatOpenAI
+    if isinstance(model, ChatOpenAI) and _SAMPLING_OPENAI_MODELS.match(model.model_name or ""):
+        return False
+    return True
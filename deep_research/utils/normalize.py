@@ -0,0 +1,174 @@
+"""
+Content normalization for raw search results before they are stored.
+
+Raw page text (Tavily raw_content / extract output, local corpus pages) carries
+cookie banners, navigation menus, share widgets, repeated site headers/footers
+and link farms. Everything stored under raw_data/ ends up in LLM prompts, so the
+scraper runs each kept result through normalize_documents():
+
+1. strip_boilerplate  - drop whole-line chrome (consent/nav/share/subscribe
+                        labels, cookie banners, copyright footers), nav bars and
+                        runs of short link lines (menus), collapse whitespace
+2. shared lines       - drop lines repeated across results from the same domain
+                        (site chrome that survived step 1)
+3. size cap           - truncate each document at a paragraph boundary
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from utils.rerank import hostname
+from utils.tokens import estimate_tokens
+
+# Whole lines of site chrome (after list/heading markers and trailing punctuation are
+# stripped). Matching whole lines only: "Read more about the methodology" or a sentence
+# that mentions signing up is content, a bare "Read more" link label is not.
+_CHROME_LINE_RE = re.compile(
+    r"(accept( all)?( cookies)?|reject( all)?( cookies)?|cookie (policy|settings|preferences)"
+    r"|manage (consent|preferences|cookies)|privacy policy|terms (of use|of service|and conditions)"
+    r"|sign (in|up)|log ?(in|out)|register|create (an )?account|my account"
+    r"|subscribe( now| today| to our newsletter)?|sign up for our newsletter"
+    r"|share( (this|on (facebook|twitter|x|linkedin|email|whatsapp|reddit)))?|follow us( on \w+)?"
+    r"|skip to (main )?(content|navigation)|back to top|advertisement|sponsored( content)?"
+    r"|related (articles|posts|stories)|you may also like|read more|most (popular|read)|trending now"
+    r"|print|email|comments?|menu|search|home)",
+    re.IGNORECASE,
+)
+# Cookie banners and copyright footers, which do have free text after the phrase
+_CHROME_PREFIX_RE = re.compile(
+    r"(we use cookies|this (web)?site uses cookies|by (continuing|using this (web)?site), you (agree|accept)"
+    r"|(©|\(c\)|copyright ©?) ?\d{4})",
+    re.IGNORECASE,
+)
+_MD_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_BARE_URL_RE = re.compile(r"https?://\S+")
+_WS_RE = re.compile(r"[ \t\u00a0]+")
+_BLANKS_RE = re.compile(r"\n{3,}")
+
+# Link labels up to this many words are navigation-sized
+_SHORT_LINE_WORDS = 6
+# A run of this many consecutive short link lines is treated as a menu
+_MENU_RUN = 5
+# Share of a line's characters inside links above which it counts as a link line
+_LINK_DENSITY = 0.6
+# Links on one link-dominated line that make it a nav bar ("Home | News | About")
+_NAV_BAR_LINKS = 3
+# Prefix-matched chrome lines longer than this are treated as content
+_CHROME_PREFIX_MAX_WORDS = 40
+
+
+def _link_ratio(line: str) -> float:
+    """Share of a line's characters that sit inside links or bare URLs."""
+    linked = sum(len(m.group(0)) for m in _MD_LINK_RE.finditer(line))
+    linked += sum(len(m.group(0)) for m in _BARE_URL_RE.finditer(_MD_LINK_RE.sub("", line)))
+    return linked / max(1, len(line))
+
+
+def _bare(line: str) -> str:
+    """The line without list/heading/table markers and trailing punctuation."""
+    return line.strip("*-#|>•· \t").rstrip(".:!»›→ ").strip()
+
+
+def _is_chrome(line: str) -> bool:
+    bare = _bare(_MD_LINK_RE.sub(lambda m: m.group(1), line))
+    if _CHROME_LINE_RE.fullmatch(bare):
+        return True
+    if _CHROME_PREFIX_RE.match(bare) and len(bare.split()) <= _CHROME_PREFIX_MAX_WORDS:
+        return True
+    # Several links and little else on one line: a nav bar or breadcrumb
+    links = len(_MD_LINK_RE.findall(line)) + len(_BARE_URL_RE.findall(_MD_LINK_RE.sub("", line)))
+    return links >= _NAV_BAR_LINKS and _link_ratio(line) > _LINK_DENSITY
+
+
+def _is_menu_link(line: str) -> bool:
+    """A short line that is (almost) only a link: one entry of a menu, if many follow."""
+    if _link_ratio(line) <= _LINK_DENSITY:
+        return False
+    label = _bare(_BARE_URL_RE.sub("", _MD_LINK_RE.sub(lambda m: m.group(1), line)))
+    return len(label.split()) <= _SHORT_LINE_WORDS
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Remove chrome lines, nav bars and menus (runs of short link lines); collapse
+    whitespace and blank lines. Plain lists, headings and sentences are kept even
+    when they mention chrome phrases.
+    """
+    lines = [_WS_RE.sub(" ", line).strip() for line in (text or "").splitlines()]
+    kept: List[str] = []
+    menu_run: List[str] = []
+
+    def flush_menu():
+        # A few links in a row are content (references, a "see also" list); many are a menu
+        if len(menu_run) < _MENU_RUN:
+            kept.extend(menu_run)
+        menu_run.clear()
+
+    for line in lines:
+        if not line:
+            flush_menu()
+            kept.append("")
+            continue
+        if _is_chrome(line):
+            continue
+        if _is_menu_link(line):
+            menu_run.append(line)
+            continue
+        flush_menu()
+        kept.append(line)
+    flush_menu()
+    return _BLANKS_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+def cap_length(text: str, max_chars: int) -> str:
+    """Truncate at the last paragraph (or sentence) boundary before max_chars."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = text.rfind(". ", 0, max_chars) + 1
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + "\n\n[... truncated ...]"
+
+
+def normalize_documents(docs: List[Tuple[str, str]], max_chars: Optional[int] = None) -> Tuple[List[str], List[Dict[str, int]]]:
+    """
+    Normalize (url, text) pairs that belong together (one subquery's results).
+    Returns the normalized texts and per-document reduction stats.
+    """
+    max_chars = settings.NORMALIZE_MAX_CHARS if max_chars is None else max_chars
+    stripped = [strip_boilerplate(text) for _, text in docs]
+
+    # Lines that appear in 2+ documents of the same domain are site chrome
+    by_domain: Dict[str, List[int]] = defaultdict(list)
+    for i, (url, _) in enumerate(docs):
+        by_domain[hostname(url)].append(i)
+    for indices in by_domain.values():
+        if len(indices) < 2:
+            continue
+        counts = Counter(line for i in indices for line in set(stripped[i].splitlines()) if line)
+        shared = {line for line, n in counts.items() if n >= 2}
+        if shared:
+            for i in indices:
+                text = "\n".join(line for line in stripped[i].splitlines() if line not in shared)
+                stripped[i] = _BLANKS_RE.sub("\n\n", text).strip()
+
+    texts, stats = [], []
+    for (_, original), text in zip(docs, stripped):
+        # Never replace real content with nothing because every line looked like chrome
+        text = cap_length(text or _WS_RE.sub(" ", original or "").strip(), max_chars)
+        texts.append(text)
+        stats.append({
+            "bytes_before": len((original or "").encode("utf-8")),
+            "bytes_after": len(text.encode("utf-8")),
+            "tokens_before": estimate_tokens(original or ""),
+            "tokens_after": estimate_tokens(text),
+        })
+    return texts, stats
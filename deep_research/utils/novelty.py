@@ -0,0 +1,176 @@
+"""
+Novelty-based early stopping for the scraper's search rounds.
+
+A "round" is one model turn that issued tavily_search calls, together with the
+results those calls returned. Each round is scored against everything gathered
+in earlier rounds:
+
+    novelty = mean(new domains / domains, new shingles / shingles, new entities / entities)
+
+NoveltyStopMiddleware ends the ReAct loop (before the next model call) once the
+latest round's novelty falls below DR_NOVELTY_THRESHOLD or enough distinct
+results have been gathered, instead of letting the agent search until it
+decides to stop or hits the recursion limit. Everything is recomputed from the
+message history, so one middleware instance is safe to share across parallel
+subqueries.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware, hook_config
+from langchain_core.messages import AIMessage, ToolMessage
+
+from config import settings
+from utils.dedup import canonical_url
+from utils.rerank import hostname
+
+SEARCH_TOOL = "tavily_search"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_ENTITY_RE = re.compile(r"\b(?:[A-Z][\w&.-]+(?:\s+[A-Z][\w&.-]+)*|\d+(?:[.,]\d+)*%?)")
+_SHINGLE_SIZE = 5
+
+
+def _shingles(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + _SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - _SHINGLE_SIZE + 1)
+    }
+
+
+def _entities(text: str) -> set:
+    return {m.group(0).lower() for m in _ENTITY_RE.finditer(text) if len(m.group(0)) >= 3}
+
+
+def _fraction_new(current: set, seen: set) -> Optional[float]:
+    return len(current - seen) / len(current) if current else None
+
+
+def search_rounds(messages: List[Any]) -> List[List[Dict[str, Any]]]:
+    """Group search results by the model turn that requested them."""
+    call_round: Dict[str, int] = {}
+    rounds: List[List[Dict[str, Any]]] = []
+    for msg in messages:
+        if isinstance(msg, AIMessage):
+            ids = [tc.get("id") for tc in (msg.tool_calls or []) if tc.get("name") == SEARCH_TOOL]
+            if ids:
+                rounds.append([])
+                for call_id in ids:
+                    call_round[call_id] = len(rounds) - 1
+        elif isinstance(msg, ToolMessage) and msg.tool_call_id in call_round:
+            try:
+                data = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
+            except (TypeError, ValueError):
+                continue
+            if isinstance(data, dict):
+                rounds[call_round[msg.tool_call_id]].extend(data.get("results", []) or [])
+    return rounds
+
+
+def round_novelty(rounds: List[List[Dict[str, Any]]], min_score: float = 0.2) -> List[Dict[str, Any]]:
+    """Per-round novelty against all earlier rounds, plus running count of distinct results."""
+    seen_domains, seen_shingles, seen_entities, seen_urls = set(), set(), set(), set()
+    report = []
+    for results in rounds:
+        domains, shingles, entities, urls = set(), set(), set(), set()
+        for r in results:
+            url = r.get("url") or ""
+            text = f"{r.get('title', '')} {r.get('content', '')}"
+            domains.add(hostname(url))
+            shingles |= _shingles(text)
+            entities |= _entities(text)
+            if url and (r.get("score") or 0.0) >= min_score:
+                urls.add(canonical_url(url))
+        fractions = {
+            "new_domains": _fraction_new(domains, seen_domains),
+            "new_shingles": _fraction_new(shingles, seen_shingles),
+            "new_entities": _fraction_new(entities, seen_entities),
+        }
+        parts = [f for f in fractions.values() if f is not None]
+        seen_domains |= domains
+        seen_shingles |= shingles
+        seen_entities |= entities
+        seen_urls |= urls
+        report.append({
+            "results": len(results),
+            "novelty": round(sum(parts) / len(parts), 3) if parts else 0.0,
+            **{k: round(v or 0.0, 3) for k, v in fractions.items()},
+            "distinct_results": len(seen_urls),
+        })
+    return report
+
+
+def should_stop(report: List[Dict[str, Any]], threshold: float, quota: int) -> Optional[str]:
+    """Reason to stop searching, or None to keep going."""
+    if not report:
+        return None
+    if report[-1]["distinct_results"] >= quota:
+        return "quota"
+    # The first round is always fully novel; judge from the second one on
+    if len(report) > 1 and report[-1]["novelty"] < threshold:
+        return "novelty"
+    return None
+
+
+def novelty_metrics(messages: List[Any], max_rounds: int) -> Dict[str, Any]:
+    """
+    Search-round metrics for the scraper metadata. max_searches_avoided is an upper
+    bound: the searches the remaining rounds up to the `max_rounds` cap would have
+    run, whether or not the agent would have gone on searching without the stop.
+    """
+    rounds = search_rounds(messages)
+    report = round_novelty(rounds)
+    searches = sum(
+        1 for m in messages if isinstance(m, AIMessage)
+        for tc in (m.tool_calls or []) if tc.get("name") == SEARCH_TOOL
+    )
+    reason = should_stop(report, settings.NOVELTY_THRESHOLD, settings.NOVELTY_RESULT_QUOTA)
+    # Stopped by the middleware = the loop ended on tool output, not on a final model answer
+    stopped_early = bool(reason) and bool(messages) and isinstance(messages[-1], ToolMessage)
+    avoided = 0
+    if stopped_early and report:
+        per_round = searches / len(report)
+        avoided = round(max(0, max_rounds - len(report)) * per_round)
+    return {
+        "rounds": report,
+        "searches_run": searches,
+        "stopped_early": stopped_early,
+        "stop_reason": reason if stopped_early else None,
+        # Upper bound (see docstring), not a measured saving
+        "max_rounds": max_rounds,
+        "max_searches_avoided": avoided,
+    }
+
+
+class NoveltyStopMiddleware(AgentMiddleware):
+    """Ends the scraper's ReAct loop once further searches stop finding new material."""
+
+    def __init__(self, threshold: Optional[float] = None, quota: Optional[int] = None):
+        super().__init__()
+        self.threshold = settings.NOVELTY_THRESHOLD if threshold is None else threshold
+        self.quota = settings.NOVELTY_RESULT_QUOTA if quota is None else quota
+
+    @hook_config(can_jump_to=["end"])
+    def before_model(self, state, runtime) -> Optional[Dict[str, Any]]:
+        if not settings.NOVELTY_STOP_ENABLED:
+            return None
+        report = round_novelty(search_rounds(state.get("messages", [])))
+        reason = should_stop(report, self.threshold, self.quota)
+        if reason is None:
+            return None
+        last = report[-1]
+        print(
+            f"[SCRAPER NODE] Stopping search after {len(report)} rounds ({reason}: "
+            f"novelty={last['novelty']}, distinct results={last['distinct_results']})"
+        )
+        return {"jump_to": "end"}
@@ -0,0 +1,159 @@
+"""
+Passage-level relevance selection for summarizer prompts.
+
+Raw pages are mostly navigation, boilerplate and tangents. Instead of sending the
+whole page, split it into passages, score each passage against the subquery and
+its search terms with BM25 (vectorized with NumPy), and keep the best passages
+that fit a token budget, in their original order.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.tokens import estimate_tokens
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Search terms are hints, the subquery itself is the primary signal
+SEARCH_TERM_WEIGHT = 0.5
+# Target passage size in tokens when splitting
+PASSAGE_TARGET_TOKENS = 120
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "which",
+    "who", "why", "with", "within", "over", "into", "about",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def split_passages(text: str, target_tokens: int = PASSAGE_TARGET_TOKENS) -> List[str]:
+    """Split text into roughly target-sized passages along paragraph and sentence boundaries."""
+    pieces: List[str] = []
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if estimate_tokens(para) <= target_tokens * 2:
+            pieces.append(para)
+        else:
+            pieces.extend(s.strip() for s in _SENTENCE_RE.split(para) if s.strip())
+
+    passages: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > target_tokens:
+            passages.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def bm25_scores(passages: Sequence[str], query_terms: Dict[str, float]) -> np.ndarray:
+    """BM25 score of every passage against weighted query terms, in one vectorized pass."""
+    if not passages or not query_terms:
+        return np.zeros(len(passages))
+    terms = list(query_terms)
+    column = {t: j for j, t in enumerate(terms)}
+    weights = np.array([query_terms[t] for t in terms])
+
+    tf = np.zeros((len(passages), len(terms)))
+    lengths = np.zeros(len(passages))
+    for i, passage in enumerate(passages):
+        tokens = tokenize(passage)
+        lengths[i] = len(tokens)
+        for tok in tokens:
+            j = column.get(tok)
+            if j is not None:
+                tf[i, j] += 1
+
+    n = len(passages)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+    avgdl = lengths.mean() or 1.0
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avgdl)
+    saturated = tf * (BM25_K1 + 1.0) / (tf + norm[:, None])
+    return saturated @ (idf * weights)
+
+
+def build_query_terms(query: str, search_terms: Sequence[str] = ()) -> Dict[str, float]:
+    """Weighted term set: subquery words at weight 1, extra search-term words at SEARCH_TERM_WEIGHT."""
+    weighted: Dict[str, float] = {}
+    for term in search_terms:
+        for tok in tokenize(term):
+            weighted[tok] = max(weighted.get(tok, 0.0), SEARCH_TERM_WEIGHT)
+    for tok in tokenize(query):
+        weighted[tok] = 1.0
+    return weighted
+
+
+def select_passages(
+    text: str,
+    query: str,
+    search_terms: Sequence[str] = (),
+    token_budget: int = 1500,
+    top_k: int = 8,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Return the most relevant passages of `text` within `token_budget`, plus stats.
+
+    Text already within budget is returned unchanged. Selected passages keep their
+    original order and are joined with "[...]" markers where content was skipped.
+    """
+    tokens_before = estimate_tokens(text)
+    stats = {"tokens_before": tokens_before, "tokens_after": tokens_before, "passages_total": 1, "passages_selected": 1}
+    if tokens_before <= token_budget:
+        return text, stats
+
+    passages = split_passages(text)
+    scores = bm25_scores(passages, build_query_terms(query, search_terms))
+    # Stable order: best score first, earlier passage wins ties (intros tend to matter)
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        if len(chosen) >= top_k:
+            break
+        cost = estimate_tokens(passages[i])
+        if used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen and passages:
+        # Budget smaller than any passage: truncate the best one
+        best = ranked[0]
+        chosen = [best]
+        passages[best] = passages[best][: token_budget * 4]
+
+    chosen.sort()
+    parts: List[str] = []
+    previous = -1
+    for i in chosen:
+        if i != previous + 1:
+            parts.append("[...]")
+        parts.append(passages[i])
+        previous = i
+    if previous != len(passages) - 1:
+        parts.append("[...]")
+    selected = "\n\n".join(parts)
+
+    stats.update({
+        "tokens_after": estimate_tokens(selected),
+        "passages_total": len(passages),
+        "passages_selected": len(chosen),
+    })
+    return selected, stats
@@ -0,0 +1,120 @@
+"""
+Prompt assembly with byte-stable static prefixes, and provider prompt-cache stats.
+
+Providers cache the longest previously seen prompt prefix (OpenAI: automatically,
+from 1024 tokens, in 128-token steps) and bill cached input tokens at a discount.
+That only works if everything static - instructions, few-shot blocks, output
+format - comes first and is byte-identical on every call, with per-request text
+(subquery, raw content) after it. PromptBuilder enforces that layout for the
+nodes that build prompts by hand:
+
+    SystemMessage(static instructions)   <- identical for every call of a component
+    HumanMessage(dynamic sections)       <- subquery, content, ...
+
+The layout only pays off when the static part reaches the provider minimum
+(PROVIDER_CACHE_MIN_TOKENS). The structured stages' prompts do; the summarizer's
+and the scraper's extraction prompt are far shorter and never hit the cache
+(PromptBuilder.cacheable is False for them), so their components are not tracked.
+Deep agents already send `instructions + BASE_AGENT_PROMPT` as a constant system
+prompt, and their later turns repeat the whole conversation so far, so they only
+need the measurement side.
+
+PromptCacheTracker is a callback handler attached per component by
+config/models.get_model. It reads `usage_metadata["input_token_details"]["cache_read"]`
+from every response and accumulates cached vs. uncached input tokens per run
+and component; prompt_cache_report() returns the hit ratios.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+
+from utils.run_context import DEFAULT_RUN_ID, current_run_id
+from utils.tokens import estimate_tokens
+
+# Shortest prompt prefix the provider caches (OpenAI)
+PROVIDER_CACHE_MIN_TOKENS = 1024
+
+
+class PromptBuilder:
+    """Builds [static system, dynamic human] message pairs for one component."""
+
+    def __init__(self, component: str, static_prompt: str):
+        self.component = component
+        self.static_prompt = static_prompt
+        # Built once and reused, so the static prefix cannot drift between calls
+        self._system = SystemMessage(content=static_prompt)
+        # Tool/schema definitions also count toward the prefix, so this is a lower bound
+        self.cacheable = estimate_tokens(static_prompt) >= PROVIDER_CACHE_MIN_TOKENS
+
+    def messages(self, *sections: Tuple[str, Any]) -> List[BaseMessage]:
+        """Static system message followed by the dynamic (label, value) sections, in order."""
+        body = "\n\n".join(f"{label}:\n{value}" if label else str(value) for label, value in sections)
+        return [self._system, HumanMessage(content=body)]
+
+
+def cache_read_tokens(usage: Dict[str, Any]) -> int:
+    details = usage.get("input_token_details") or {}
+    return int(details.get("cache_read") or 0)
+
+
+class PromptCacheStats:
+    """Cached vs. uncached input tokens per (run, component)."""
+
+    def __init__(self, max_runs: int = 256):
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, Dict[str, Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, run_id: str, component: str, usage: Dict[str, Any]) -> None:
+        input_tokens = int(usage.get("input_tokens") or 0)
+        cached = cache_read_tokens(usage)
+        with self._lock:
+            run = self._runs.setdefault(run_id, defaultdict(lambda: {"calls": 0, "input_tokens": 0, "cached_tokens": 0}))
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            entry = run[component]
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["cached_tokens"] += cached
+
+    def report(self, run_id: str = DEFAULT_RUN_ID) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            run = {k: dict(v) for k, v in self._runs.get(run_id, {}).items()}
+        for entry in run.values():
+            entry["uncached_tokens"] = entry["input_tokens"] - entry["cached_tokens"]
+            entry["hit_ratio"] = round(entry["cached_tokens"] / entry["input_tokens"], 3) if entry["input_tokens"] else 0.0
+        return run
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+class PromptCacheTracker(BaseCallbackHandler):
+    """Records provider prompt-cache usage for every call made by one component's model."""
+
+    def __init__(self, component: str, stats: Optional[PromptCacheStats] = None):
+        self.component = component
+        self.stats = stats or prompt_cache_stats
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        run_id = current_run_id()
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.stats.record(run_id, self.component, usage)
+
+
+def prompt_cache_report(run_id: str = DEFAULT_RUN_ID) -> Dict[str, Dict[str, Any]]:
+    """Per-component cached/uncached input tokens and hit ratio for a run."""
+    return prompt_cache_stats.report(run_id)
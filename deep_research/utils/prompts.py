@@ -508,6 +508,21 @@ For every research plan:
 """
 
 
+# ------------------------------------------------------------------------------
+# Single-shot mode for the decomposer and strategist (agents/structured_stages.py)
+# ------------------------------------------------------------------------------
+
+# Appended to the agent prompt; {output_file} is the file the agent would write
+STRUCTURED_STAGE_NOTE = """
+
+---
+
+## Single-shot Mode
+You have no tools in this mode. The input files are included in the user message under their file names.
+Do not call read_file or write_file: answer directly with the complete content of '{output_file}' in the requested structure.
+"""
+
+
 # ------------------------------------------------------------------------------
 # Scraper Agent Prompt
 # ------------------------------------------------------------------------------
@@ -521,7 +536,7 @@ SCRAPER_PROMPT = """You are a research assistant. Your job is to gather reliable
 ## Rules
 1. Always start with Tavily Search.
 2. If the first results are weak, irrelevant, or too few, refine the query and search again.
-3. If you find good URLs but need more detail, call Tavily Extract on them.
+3. Judge relevance from titles and snippets; only call Tavily Extract when a snippet is too thin to decide (full text of the kept results is fetched afterwards).
 4. Avoid duplicates or junk results.
 5. Stop once you have at least 5 strong, relevant results that directly address the subquery.
 
@@ -548,9 +563,37 @@ When you are finished, return a JSON object matching this schema:
 - **results**: list of at least 5 strong results, each with all required fields.  
 - **terms_used**: the queries you actually ran (the first must be the original subquery).  
 
-Subquery: {subquery}
+The subquery is given in the user message.
 """
 
+# Second scraper pass: turns the collected tool results into ScraperOutput.
+# Static on purpose: the subquery and tool results go in the user message after it.
+SCRAPER_EXTRACTION_PROMPT = """Based on the search results provided by the user, extract and structure the information.
+
+Create a structured output with:
+- A list of the best 5-8 search results (URL, title, snippet, content, published date if available, and relevance score)
+- The search terms that were actually used
+
+Focus on the most relevant, high-quality results."""
+
+
+# ------------------------------------------------------------------------------
+# Summarizer Node Prompt
+# ------------------------------------------------------------------------------
+
+# Static on purpose: the research question and raw content go in the user message after it.
+SUMMARIZER_NODE_PROMPT = """Analyze the search result provided by the user for the research question it states.
+
+Return key findings, arguments, data, conclusions, relevance, reliability, and a short summary.
+Also extract the URL and title if present, and rate your confidence (0-1) that the content supports the analysis."""
+
+SUMMARIZER_BATCH_PROMPT = """Analyze each search result provided by the user for the research question it states.
+Results are given as "Result N" sections; analyze each one independently and never mix facts between results.
+
+Return one analysis per result, with `result_index` set to that result's N.
+For each: key findings, arguments, data, conclusions, relevance, reliability, and a short summary.
+Also extract the URL and title if present, and rate your confidence (0-1) that the content supports the analysis."""
+
 
 # ------------------------------------------------------------------------------
 # Fact-Checker Agent Prompt
@@ -569,6 +612,7 @@ Your single deliverable is a structured Markdown file: `factcheck_notes.md`.
 # Inputs
 - Directory: `/summaries/` → human-readable, source-linked summaries produced by the Summarizer node.
 - Directory: `/raw_data/` → raw captures (HTML/text/JSON) for primary verification.
+- File: `/raw_data/global_ranking.json` → all stored sources ranked across subqueries (relevance, authority, recency, diversity); open top-ranked raw files first when verifying.
 
 # Available Tools
 - `ls <path>` — list files
@@ -752,6 +796,7 @@ Your single deliverable is a publication-ready academic-style report: `draft_rep
 - `/summaries/*` → primary content.
 - `factcheck_notes.md` → validation layer (Verified/Contradicted/Weak).
 - `/raw_data/*` → fallback evidence (never override factcheck findings).
+- `/raw_data/global_ranking.json` → run-wide source ranking; prefer higher-ranked sources when several support the same claim.
 
 # Available Tools
 - `ls <path>` — list files
@@ -0,0 +1,220 @@
+"""
+Client-side rate limiting for LLM providers: per-model RPM/TPM token buckets.
+
+All component models share one ModelRateLimiter per provider model name, so
+concurrent runs draw from the same requests-per-minute and tokens-per-minute
+allowances instead of discovering the limits through 429s:
+
+- before each provider attempt (retries included) the request's tokens are
+  estimated (prompt + expected completion) and reserved from both buckets
+- afterwards the reservation is reconciled with the reported usage; an
+  underestimate leaves the TPM bucket in debt, which delays later callers
+- waiters are served round-robin across runs (the run served least recently
+  goes next), so one run with many parallel researchers cannot starve another;
+  runs are told apart by run_context.current_run_id(), which is set per
+  invocation even without a thread_id
+
+Disabled unless DR_RATE_LIMIT is set: the buckets only help when they match the
+account's real limits (DR_RATE_LIMITS), and otherwise slow every call down.
+
+headroom() reports the currently available requests and tokens per model.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config import settings
+from utils.run_context import current_run_id
+
+# Poll interval for async waiters, which cannot block on the condition variable
+_ASYNC_POLL_SECONDS = 0.05
+
+
+class TokenBucket:
+    """Refills `capacity` units per minute, continuously; may go negative (debt)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        missing = amount - self.available
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+@dataclass
+class Reservation:
+    model: str
+    run_id: str
+    tokens: int
+    waited: float
+
+
+class ModelRateLimiter:
+    """RPM/TPM limits for one model, with a run-fair waiting queue."""
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        # run_id -> tickets waiting for that run, in arrival order
+        self._waiting: "OrderedDict[str, Deque[int]]" = OrderedDict()
+        self._last_served: Dict[str, float] = {}
+        self._tickets = itertools.count()
+
+    def _next_run(self) -> Optional[str]:
+        # Least recently served run goes first; ties keep arrival order
+        return min(self._waiting, key=lambda run: self._last_served.get(run, 0.0), default=None)
+
+    def _try_grant(self, ticket: int, run_id: str, tokens: int) -> float:
+        """Grant the reservation if it is this ticket's turn and both buckets allow it; else return a wait."""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if self._next_run() != run_id or self._waiting[run_id][0] != ticket:
+            return _ASYNC_POLL_SECONDS
+        wait = max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+        if wait > 0:
+            return wait
+        self.requests.available -= 1
+        self.tokens.available -= tokens
+        self._waiting[run_id].popleft()
+        if not self._waiting[run_id]:
+            del self._waiting[run_id]
+        self._last_served[run_id] = now
+        if len(self._last_served) > 1024:
+            for stale in sorted(self._last_served, key=self._last_served.get)[:512]:
+                del self._last_served[stale]
+        return 0.0
+
+    def _enqueue(self, run_id: str, tokens: int) -> Tuple[int, int]:
+        # A request larger than the whole TPM allowance could never be granted
+        tokens = int(min(max(1, tokens), self.tokens.capacity))
+        ticket = next(self._tickets)
+        self._waiting.setdefault(run_id, deque()).append(ticket)
+        return ticket, tokens
+
+    def _dequeue(self, run_id: str, ticket: int) -> None:
+        queue = self._waiting.get(run_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._waiting[run_id]
+        self._cond.notify_all()
+
+    def acquire(self, tokens: int, run_id: Optional[str] = None) -> Reservation:
+        """Block until one request and `tokens` tokens can be spent, in fair order."""
+        run_id = run_id or current_run_id()
+        started = time.monotonic()
+        with self._cond:
+            ticket, tokens = self._enqueue(run_id, tokens)
+            try:
+                while True:
+                    wait = self._try_grant(ticket, run_id, tokens)
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._dequeue(run_id, ticket)
+                raise
+            self._cond.notify_all()
+        return self._granted(run_id, tokens, started)
+
+    async def aacquire(self, tokens: int, run_id: Optional[str] = None) -> Reservation:
+        """Async acquire(); polls instead of blocking the event loop."""
+        run_id = run_id or current_run_id()
+        started = time.monotonic()
+        with self._cond:
+            ticket, tokens = self._enqueue(run_id, tokens)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_grant(ticket, run_id, tokens)
+                    if wait == 0:
+                        self._cond.notify_all()
+                        break
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            with self._cond:
+                self._dequeue(run_id, ticket)
+            raise
+        return self._granted(run_id, tokens, started)
+
+    def _granted(self, run_id: str, tokens: int, started: float) -> Reservation:
+        waited = time.monotonic() - started
+        if waited >= 1.0:
+            print(f"[RATE LIMIT] {self.model}: waited {waited:.1f}s for {tokens} tokens (run {run_id})")
+        return Reservation(self.model, run_id, tokens, waited)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: Optional[int]) -> None:
+        """Correct the TPM bucket once the provider reports real usage (None: call failed, refund)."""
+        actual = 0 if actual_tokens is None else actual_tokens
+        with self._cond:
+            self.tokens.refill(time.monotonic())
+            self.tokens.available = min(self.tokens.capacity, self.tokens.available + reservation.tokens - actual)
+            self._cond.notify_all()
+
+    def headroom(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm_limit": int(self.requests.capacity),
+                "tpm_limit": int(self.tokens.capacity),
+                "requests_available": int(self.requests.available),
+                "tokens_available": int(self.tokens.available),
+                "waiting_requests": sum(len(q) for q in self._waiting.values()),
+                "waiting_runs": len(self._waiting),
+            }
+
+
+def _limits_for(model: str) -> Tuple[int, int]:
+    # DR_RATE_LIMITS entries look like "gpt-5=500:30000" (model=rpm:tpm)
+    for entry in settings.RATE_LIMITS:
+        name, _, limits = entry.partition("=")
+        rpm, _, tpm = limits.partition(":")
+        if name.strip() == model:
+            try:
+                return int(rpm), int(tpm)
+            except ValueError:
+                print(f"[RATE LIMIT] Ignoring malformed DR_RATE_LIMITS entry '{entry}'")
+    return settings.RATE_LIMIT_RPM, settings.RATE_LIMIT_TPM
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> Optional[ModelRateLimiter]:
+    """The shared limiter for a provider model, or None when rate limiting is disabled."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        if model not in _limiters:
+            _limiters[model] = ModelRateLimiter(model, *_limits_for(model))
+        return _limiters[model]
+
+
+def headroom() -> Dict[str, Dict[str, Any]]:
+    """Currently available requests/tokens per model that has been called in this process."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.headroom() for model, limiter in limiters.items()}
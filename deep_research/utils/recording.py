@@ -0,0 +1,232 @@
+"""
+Record/replay fixtures for search and LLM traffic.
+
+With DR_FIXTURE_MODE=record every search/extract call and every chat-model call
+made during a real run is captured, with its latency, into a gzip'd JSON bundle
+(DR_FIXTURE_PATH). With DR_FIXTURE_MODE=replay the same calls are answered from
+the bundle without touching the network, so scheduler, caching and concurrency
+changes can be benchmarked against identical inputs.
+
+Requests are keyed by a hash of their content (model parameters, messages with
+volatile ids stripped, search arguments), not by call order; repeated identical
+requests are served their recorded responses in order. A replay matches the
+recording only if every request is made again with the same content. Parallel
+subqueries share state (the run's duplicate index in utils/dedup.py, the
+process-wide extract cache in tools/web_search.py): if they interleave differently
+from the recorded run, a later request can differ and its lookup fails with
+FixtureMissError. Record and replay each in a fresh process, and expect misses
+when researchers finish in a different order than they did while recording.
+
+Replay latency is controlled by DR_FIXTURE_LATENCY:
+    none                  -> answer immediately (default)
+    recorded              -> sleep for the latency observed while recording
+    fixed:<ms>            -> constant latency
+    lognormal:<ms>,<sigma> -> seeded log-normal latency with the given median
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import atexit
+import gzip
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+
+FIXTURE_FORMAT_VERSION = 1
+
+
+class FixtureMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _json_default(obj: Any) -> Any:
+    # Structured-output schemas arrive as pydantic classes; key on their JSON schema
+    if isinstance(obj, type) and hasattr(obj, "model_json_schema"):
+        return obj.model_json_schema()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    # Never repr(): memory addresses would make keys differ between runs
+    return f"<{type(obj).__name__}>"
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def message_key_view(message: Any) -> Dict[str, Any]:
+    """The parts of a chat message that determine the model's answer (no random ids)."""
+    view = {"type": getattr(message, "type", None), "content": getattr(message, "content", None)}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        view["tool_calls"] = [{"name": tc["name"], "args": tc["args"], "id": tc.get("id")} for tc in tool_calls]
+    for attr in ("tool_call_id", "name"):
+        value = getattr(message, attr, None)
+        if value:
+            view[attr] = value
+    return view
+
+
+class FixtureRecorder:
+    """Collects request/response pairs and writes them to a bundle."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, request: Dict[str, Any], response: Any, latency_ms: int) -> None:
+        entry = {
+            "kind": kind,
+            "key": request_key(kind, request),
+            "request": json.loads(json.dumps(request, default=_json_default)),
+            "response": response,
+            "latency_ms": latency_ms,
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.entries:
+                return
+            bundle = {"version": FIXTURE_FORMAT_VERSION, "entries": list(self.entries)}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(bundle, f, separators=(",", ":"), default=_json_default)
+        print(f"[FIXTURES] Saved {len(bundle['entries'])} recorded calls to {self.path}")
+
+
+class FixtureReplayer:
+    """Serves recorded responses by request key, with optional simulated latency."""
+
+    def __init__(self, path: str, latency: str = "none", seed: int = 0):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            bundle = json.load(f)
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in bundle.get("entries", []):
+            self._entries[entry["key"]].append(entry)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._latency = self._parse_latency(latency)
+        print(f"[FIXTURES] Replaying {sum(len(v) for v in self._entries.values())} calls from {path}")
+
+    def _parse_latency(self, spec: str) -> Callable[[Dict[str, Any]], float]:
+        mode, _, args = (spec or "none").partition(":")
+        if mode == "recorded":
+            return lambda entry: entry.get("latency_ms", 0) / 1000.0
+        if mode == "fixed":
+            seconds = float(args or 0) / 1000.0
+            return lambda entry: seconds
+        if mode == "lognormal":
+            median_ms, _, sigma = args.partition(",")
+            mu, sig = math.log(float(median_ms) / 1000.0), float(sigma or 0.5)
+            return lambda entry: self._rng.lognormvariate(mu, sig)
+        return lambda entry: 0.0
+
+    def lookup(self, kind: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the next recorded entry for this request (the last one repeats)."""
+        key = request_key(kind, request)
+        with self._lock:
+            candidates = self._entries.get(key)
+            if not candidates:
+                raise FixtureMissError(f"No recorded {kind} call matches this request (key {key[:12]})")
+            entry = candidates[min(self._served[key], len(candidates) - 1)]
+            self._served[key] += 1
+            delay = self._latency(entry)
+        return {**entry, "simulated_latency": delay}
+
+    def respond(self, kind: str, request: Dict[str, Any]) -> Any:
+        entry = self.lookup(kind, request)
+        if entry["simulated_latency"] > 0:
+            time.sleep(entry["simulated_latency"])
+        return entry["response"]
+
+    async def arespond(self, kind: str, request: Dict[str, Any]) -> Any:
+        import asyncio
+
+        entry = self.lookup(kind, request)
+        if entry["simulated_latency"] > 0:
+            await asyncio.sleep(entry["simulated_latency"])
+        return entry["response"]
+
+
+_recorder: Optional[FixtureRecorder] = None
+_replayer: Optional[FixtureReplayer] = None
+_init_lock = threading.Lock()
+
+
+def get_recorder() -> Optional[FixtureRecorder]:
+    """The process-wide recorder when DR_FIXTURE_MODE=record, else None."""
+    global _recorder
+    if settings.FIXTURE_MODE != "record":
+        return None
+    with _init_lock:
+        if _recorder is None:
+            _recorder = FixtureRecorder(settings.FIXTURE_PATH)
+            atexit.register(_recorder.save)
+        return _recorder
+
+
+def get_replayer() -> Optional[FixtureReplayer]:
+    """The process-wide replayer when DR_FIXTURE_MODE=replay, else None."""
+    global _replayer
+    if settings.FIXTURE_MODE != "replay":
+        return None
+    with _init_lock:
+        if _replayer is None:
+            _replayer = FixtureReplayer(settings.FIXTURE_PATH, settings.FIXTURE_LATENCY)
+        return _replayer
+
+
+def save_fixtures() -> None:
+    """Flush recorded calls to disk (no-op unless recording)."""
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.save()
+
+
+class RecordingSearchProvider:
+    """Wraps a SearchProvider and records every call and its latency."""
+
+    def __init__(self, inner, recorder: FixtureRecorder):
+        self.inner = inner
+        self.recorder = recorder
+        self.name = f"recording:{inner.name}"
+
+    def _call(self, kind: str, fn: Callable[..., Any], request: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        response = fn(**request)
+        self.recorder.record(kind, request, response, int((time.perf_counter() - started) * 1000))
+        return response
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        return self._call("search", self.inner.search, {"query": query, **kwargs})
+
+    def extract(self, urls: List[str], **kwargs) -> Dict[str, Any]:
+        return self._call("extract", self.inner.extract, {"urls": urls, **kwargs})
+
+
+class ReplaySearchProvider:
+    """SearchProvider that answers only from recorded fixtures."""
+
+    name = "replay"
+
+    def __init__(self, replayer: FixtureReplayer):
+        self.replayer = replayer
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        return self.replayer.respond("search", {"query": query, **kwargs})
+
+    def extract(self, urls: List[str], **kwargs) -> Dict[str, Any]:
+        return self.replayer.respond("extract", {"urls": urls, **kwargs})
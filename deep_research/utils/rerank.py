@@ -0,0 +1,223 @@
+"""
+Run-wide reranking engine for search results.
+
+All candidates are scored in one vectorized pass (NumPy) from:
+- provider relevance score (normalized across the whole candidate set, not per response)
+- domain authority from a lookup table (suffix match on the hostname)
+- recency decay from published_date (exponential, configurable half-life)
+- a source-type prior from the subquery's preferred_sources
+and then selected greedily with MMR so near-identical coverage is penalized.
+
+The same engine ranks results inside the scraper (one subquery) and across
+subqueries in the researcher hub (global source ranking).
+"""
+
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Hostname suffix -> authority in [0, 1]; longest matching suffix wins
+DOMAIN_AUTHORITY: Dict[str, float] = {
+    ".gov": 0.95, ".gov.uk": 0.95, ".europa.eu": 0.9, ".int": 0.9, ".edu": 0.85, ".ac.uk": 0.85,
+    "nature.com": 0.95, "science.org": 0.95, "nih.gov": 0.95, "who.int": 0.95,
+    "ncbi.nlm.nih.gov": 0.95, "pubmed.ncbi.nlm.nih.gov": 0.95, "doi.org": 0.9,
+    "sciencedirect.com": 0.9, "springer.com": 0.9, "ieee.org": 0.9, "acm.org": 0.9,
+    "arxiv.org": 0.8, "ssrn.com": 0.75, "scholar.google.com": 0.75,
+    "imf.org": 0.9, "worldbank.org": 0.9, "oecd.org": 0.9, "bis.org": 0.9, "federalreserve.gov": 0.95,
+    "reuters.com": 0.9, "apnews.com": 0.9, "bbc.co.uk": 0.85, "bbc.com": 0.85, "ft.com": 0.85,
+    "bloomberg.com": 0.85, "wsj.com": 0.85, "nytimes.com": 0.85, "economist.com": 0.85,
+    "theguardian.com": 0.8, "washingtonpost.com": 0.8, "cnbc.com": 0.75, "cnn.com": 0.75,
+    "forbes.com": 0.65, "techcrunch.com": 0.65, "wired.com": 0.7, "mckinsey.com": 0.75,
+    "wikipedia.org": 0.65, "investopedia.com": 0.6,
+    "medium.com": 0.35, "substack.com": 0.4, "reddit.com": 0.3, "quora.com": 0.25,
+}
+DEFAULT_AUTHORITY = 0.5
+
+# Hostname suffix -> source type
+SOURCE_TYPES: Dict[str, str] = {
+    "reuters.com": "news", "apnews.com": "news", "bbc.co.uk": "news", "bbc.com": "news",
+    "cnn.com": "news", "nytimes.com": "news", "ft.com": "news", "bloomberg.com": "news",
+    "wsj.com": "news", "theguardian.com": "news", "washingtonpost.com": "news", "cnbc.com": "news",
+    "economist.com": "news", "forbes.com": "news", "techcrunch.com": "news",
+    "arxiv.org": "academic", "pubmed.ncbi.nlm.nih.gov": "academic", "ncbi.nlm.nih.gov": "academic",
+    "doi.org": "academic", "scholar.google.com": "academic", "nature.com": "academic",
+    "science.org": "academic", "sciencedirect.com": "academic", "springer.com": "academic",
+    "ieee.org": "academic", "acm.org": "academic", "ssrn.com": "academic",
+    ".edu": "academic", ".ac.uk": "academic",
+    ".gov": "government", ".gov.uk": "government", ".europa.eu": "government", ".int": "government",
+}
+_NEWS_HOST_RE = re.compile(r"(^|\.)news\.|(^|\.)news[a-z]*\.")
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Hashing-trick width for MMR similarity vectors
+SIMILARITY_DIM = 2048
+
+
+def hostname(url: str) -> str:
+    host = urlsplit(url).netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def _suffix_lookup(host: str, table: Dict[str, object]):
+    best, best_len = None, -1
+    for suffix, value in table.items():
+        matches = host == suffix.lstrip(".") or host.endswith(suffix if suffix.startswith(".") else "." + suffix)
+        if matches and len(suffix) > best_len:
+            best, best_len = value, len(suffix)
+    return best
+
+
+def domain_authority(url: str) -> float:
+    value = _suffix_lookup(hostname(url), DOMAIN_AUTHORITY)
+    return DEFAULT_AUTHORITY if value is None else float(value)
+
+
+def classify_source_type(url: str) -> str:
+    """Source type from the hostname: news, academic, government or web."""
+    host = hostname(url)
+    value = _suffix_lookup(host, SOURCE_TYPES)
+    if value is not None:
+        return value
+    if _NEWS_HOST_RE.search(host):
+        return "news"
+    return "web"
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", value)
+    if match:
+        try:
+            return datetime(*map(int, match.groups()), tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    for fmt in ("%a, %d %b %Y %H:%M:%S %Z", "%d %b %Y", "%B %d, %Y"):
+        try:
+            return datetime.strptime(value.strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass
+class RerankWeights:
+    relevance: float = 0.55
+    authority: float = 0.20
+    recency: float = 0.15
+    source_prior: float = 0.10
+    # MMR trade-off: 1.0 = pure score, lower = more diversity
+    mmr_lambda: float = 0.75
+    # Age at which the recency component halves; undated results get a neutral 0.5
+    recency_half_life_days: float = 365.0
+
+
+class RerankEngine:
+    """Scores and selects SearchResult-like candidates (url, title, content, score, published_date)."""
+
+    def __init__(self, weights: Optional[RerankWeights] = None):
+        self.weights = weights or RerankWeights()
+
+    def feature_matrix(self, candidates: Sequence, preferred_sources: Sequence[str] = (), now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """Per-candidate feature vectors, each in [0, 1]."""
+        now = now or datetime.now(timezone.utc)
+        raw = np.array([float(getattr(c, "score", 0.0) or 0.0) for c in candidates])
+        span = raw.max() - raw.min() if len(raw) else 0.0
+        relevance = (raw - raw.min()) / span if span > 0 else np.ones(len(raw))
+
+        authority = np.array([domain_authority(c.url) for c in candidates])
+
+        ages = np.array([
+            (now - d).days if (d := _parse_date(getattr(c, "published_date", None))) else np.nan
+            for c in candidates
+        ], dtype=float)
+        recency = np.where(
+            np.isnan(ages), 0.5, np.power(0.5, np.clip(ages, 0, None) / self.weights.recency_half_life_days)
+        )
+
+        preferred = set(preferred_sources or ())
+        source_types = [getattr(c, "source_type", None) or classify_source_type(c.url) for c in candidates]
+        source_prior = np.array([1.0 if t in preferred else 0.0 for t in source_types]) if preferred else np.zeros(len(candidates))
+
+        return {"relevance": relevance, "authority": authority, "recency": recency, "source_prior": source_prior}
+
+    def score(self, candidates: Sequence, preferred_sources: Sequence[str] = (), now: Optional[datetime] = None) -> np.ndarray:
+        """Combined score per candidate."""
+        if not candidates:
+            return np.zeros(0)
+        f = self.feature_matrix(candidates, preferred_sources, now)
+        w = self.weights
+        return (
+            w.relevance * f["relevance"]
+            + w.authority * f["authority"]
+            + w.recency * f["recency"]
+            + w.source_prior * f["source_prior"]
+        )
+
+    @staticmethod
+    def similarity_matrix(candidates: Sequence) -> np.ndarray:
+        """Cosine similarity of hashed bag-of-words vectors over title + content."""
+        X = np.zeros((len(candidates), SIMILARITY_DIM))
+        for i, c in enumerate(candidates):
+            text = f"{getattr(c, 'title', '')} {getattr(c, 'content', '')}".lower()
+            for word in _WORD_RE.findall(text):
+                X[i, zlib.crc32(word.encode("utf-8")) % SIMILARITY_DIM] += 1.0
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        X = X / np.where(norms == 0, 1.0, norms)
+        return X @ X.T
+
+    def select(
+        self,
+        candidates: Sequence,
+        k: Optional[int] = None,
+        preferred_sources: Sequence[str] = (),
+        diversify: bool = True,
+        now: Optional[datetime] = None,
+    ) -> Tuple[List[int], np.ndarray]:
+        """
+        Indices of the top-k candidates, best first (MMR-diversified unless diversify=False),
+        plus the combined score of every candidate (indexed like `candidates`).
+        """
+        n = len(candidates)
+        if n == 0:
+            return [], np.zeros(0)
+        k = n if k is None else min(k, n)
+        scores = self.score(candidates, preferred_sources, now)
+        if not diversify or n == 1:
+            return [int(i) for i in np.argsort(-scores, kind="stable")[:k]], scores
+
+        sim = self.similarity_matrix(candidates)
+        lam = self.weights.mmr_lambda
+        selected: List[int] = []
+        max_sim = np.zeros(n)
+        remaining = np.ones(n, dtype=bool)
+        for _ in range(k):
+            mmr = np.where(remaining, lam * scores - (1.0 - lam) * max_sim, -np.inf)
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            remaining[best] = False
+            max_sim = np.maximum(max_sim, sim[best])
+        return selected, scores
+
+    def rank(self, candidates: Sequence, k: Optional[int] = None, preferred_sources: Sequence[str] = (), diversify: bool = True) -> List[int]:
+        """Indices of the top-k candidates, best first."""
+        return self.select(candidates, k, preferred_sources, diversify)[0]
+
+    def rerank(self, candidates: Sequence, k: Optional[int] = None, preferred_sources: Sequence[str] = (), diversify: bool = True) -> List:
+        """The candidates themselves in ranked order (no copies)."""
+        return [candidates[i] for i in self.rank(candidates, k, preferred_sources, diversify)]
+
+
+default_engine = RerankEngine()
+
+
+def engine_for(freshness: Optional[str] = None) -> RerankEngine:
+    """Engine for a subquery's plan: 'recent' freshness weights recency higher and decays faster."""
+    if freshness == "recent":
+        return RerankEngine(RerankWeights(relevance=0.5, recency=0.25, authority=0.15, recency_half_life_days=90.0))
+    return default_engine
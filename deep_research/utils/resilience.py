@@ -0,0 +1,371 @@
+"""
+Shared resilience policy for external calls (Tavily, LLM providers).
+
+Every call to a provider goes through a ResiliencePolicy that combines:
+- retryable-error classification (429/5xx/timeouts retry, auth/validation errors do not)
+- decorrelated-jitter backoff so parallel researchers do not retry in lockstep
+- Retry-After support when the provider tells us how long to wait
+- a per-run retry budget so one run cannot spend unbounded time retrying
+- a circuit breaker that fails fast while the provider is unhealthy
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from config import settings
+from utils.run_context import current_run_id
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+    def __init__(self, service: str, retry_in: float):
+        super().__init__(f"Circuit open for {service}, failing fast (retry in {retry_in:.1f}s)")
+        self.service = service
+        self.retry_in = retry_in
+
+
+class RetryBudgetExhausted(Exception):
+    """Raised when a run has used up its retry budget for a service."""
+
+    def __init__(self, service: str, run_id: str, last_error: Exception):
+        super().__init__(
+            f"Retry budget exhausted for {service} in run {run_id}: "
+            f"{type(last_error).__name__}: {last_error}"
+        )
+        self.service = service
+        self.run_id = run_id
+        self.last_error = last_error
+
+
+# --- Error classification ---
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Matched against the exception's class hierarchy so we do not need to import every SDK
+RETRYABLE_ERROR_NAMES = {
+    "TimeoutError",
+    "Timeout",
+    "ReadTimeout",
+    "ConnectTimeout",
+    "ConnectionError",
+    "ChunkedEncodingError",
+    "RemoteDisconnected",
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ServiceUnavailableError",
+    "UsageLimitExceededError",
+}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return True if the error is transient and the call may succeed on retry."""
+    if isinstance(exc, (CircuitOpenError, RetryBudgetExhausted)):
+        return False
+    code = _status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read the provider's requested wait time from the error, if any."""
+    explicit = getattr(exc, "retry_after_seconds", None)
+    if explicit is not None:
+        return float(explicit)
+
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms is not None:
+            return float(ms) / 1000.0
+        value = headers.get("retry-after")
+    except Exception:
+        return None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Backoff, budget, breaker ---
+
+class DecorrelatedJitterBackoff:
+    """Decorrelated jitter: sleep = min(cap, uniform(base, previous * 3))."""
+
+    def __init__(self, base: float, cap: float):
+        self.base = base
+        self.cap = cap
+        self._previous = base
+
+    def next_delay(self) -> float:
+        self._previous = min(self.cap, random.uniform(self.base, self._previous * 3))
+        return self._previous
+
+
+class RetryBudget:
+    """Caps the number of retries a single run may spend on a service (latest `max_runs` runs kept)."""
+
+    def __init__(self, retries_per_run: int, max_runs: int = 256):
+        self.retries_per_run = retries_per_run
+        self.max_runs = max_runs
+        self._spent: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_consume(self, service: str, run_id: str) -> bool:
+        with self._lock:
+            run = self._spent.setdefault(run_id, {})
+            self._spent.move_to_end(run_id)
+            while len(self._spent) > self.max_runs:
+                self._spent.popitem(last=False)
+            spent = run.get(service, 0)
+            if spent >= self.retries_per_run:
+                return False
+            run[service] = spent + 1
+            return True
+
+    def spent(self, service: str, run_id: str) -> int:
+        with self._lock:
+            return self._spent.get(run_id, {}).get(service, 0)
+
+    def reset_run(self, run_id: str) -> None:
+        with self._lock:
+            self._spent.pop(run_id, None)
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed    -> calls pass; consecutive transient failures are counted
+    open      -> calls fail fast with CircuitOpenError until reset_timeout elapses
+    half_open -> a single trial call is let through; success closes, failure reopens
+    """
+
+    def __init__(self, service: str, failure_threshold: int, reset_timeout: float):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self.state == "open" and elapsed >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(self.service, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"[RESILIENCE] Circuit for {self.service} opened after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+# --- Policy ---
+
+class ResiliencePolicy:
+    """Retry/backoff/breaker policy for one external service."""
+
+    def __init__(
+        self,
+        service: str,
+        max_attempts: int = settings.RETRY_MAX_ATTEMPTS,
+        base_delay: float = settings.RETRY_BASE_DELAY,
+        max_delay: float = settings.RETRY_MAX_DELAY,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.service = service
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget(settings.RETRY_BUDGET_PER_RUN)
+        self.breaker = breaker or CircuitBreaker(
+            service, settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT
+        )
+
+    def _next_delay(self, exc: Exception, attempt: int, backoff: DecorrelatedJitterBackoff, label: str) -> Optional[float]:
+        """Decide whether to retry after a failure; return the delay or None to give up."""
+        if not is_retryable(exc):
+            # The provider answered (e.g. 400/401), so it is healthy even though we failed
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.max_attempts:
+            return None
+        run_id = current_run_id()
+        if not self.budget.try_consume(self.service, run_id):
+            print(f"[{label}] ✗ Retry budget exhausted for run {run_id}")
+            raise RetryBudgetExhausted(self.service, run_id, exc) from exc
+
+        delay = backoff.next_delay()
+        requested = retry_after_seconds(exc)
+        if requested is not None:
+            if requested > self.max_delay:
+                print(f"[{label}] ✗ Provider asked to wait {requested:.1f}s (> {self.max_delay:.1f}s cap), giving up")
+                return None
+            delay = max(delay, requested)
+        print(
+            f"[{label}] ✗ Attempt {attempt}/{self.max_attempts} failed "
+            f"({type(exc).__name__}: {exc}), retrying in {delay:.1f}s..."
+        )
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> Any:
+        """Call fn with retries; raises the last error when the policy gives up."""
+        label = label or self.service.upper()
+        backoff = DecorrelatedJitterBackoff(self.base_delay, self.max_delay)
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, backoff, label)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> Any:
+        """Async variant of call(); fn must return an awaitable."""
+        label = label or self.service.upper()
+        backoff = DecorrelatedJitterBackoff(self.base_delay, self.max_delay)
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, backoff, label)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+
+    def stream(self, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> Iterator[Any]:
+        """
+        Iterate fn(...) with retries until its first item arrives. Once an item has
+        been yielded the attempt cannot be repeated without duplicating output, so
+        later errors propagate unchanged.
+        """
+        label = label or self.service.upper()
+        backoff = DecorrelatedJitterBackoff(self.base_delay, self.max_delay)
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            iterator = iter(fn(*args, **kwargs))
+            try:
+                first = next(iterator)
+            except StopIteration:
+                self.breaker.record_success()
+                return
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, backoff, label)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            yield first
+            yield from iterator
+            return
+
+    async def astream(self, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> AsyncIterator[Any]:
+        """Async variant of stream(); fn must return an async iterator."""
+        label = label or self.service.upper()
+        backoff = DecorrelatedJitterBackoff(self.base_delay, self.max_delay)
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            iterator = fn(*args, **kwargs).__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.breaker.record_success()
+                return
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, backoff, label)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            yield first
+            async for item in iterator:
+                yield item
+            return
+
+
+# Policies are shared process-wide so every researcher sees the same breaker state
+_policies: Dict[str, ResiliencePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(service: str) -> ResiliencePolicy:
+    """Return the shared policy for a service (e.g. "tavily", "openai")."""
+    with _policies_lock:
+        if service not in _policies:
+            _policies[service] = ResiliencePolicy(service)
+        return _policies[service]
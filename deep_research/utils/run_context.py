@@ -0,0 +1,64 @@
+"""
+Helpers to identify the run (LangGraph thread) the current code is executing in.
+
+LangGraph propagates the runnable config through context variables, so nodes, tools
+and model calls can find their thread_id without it being threaded through state.
+
+Runs invoked without a thread_id (scripts, benchmarks, tests) still get their own id:
+the first workflow node mints one into the graph state (`run_id`), and the node
+runners open run_scope() so everything called beneath them sees it. Per-run state
+(duplicate index, search budget, rate-limit queues) is therefore never shared by
+two invocations, and a resumed run keeps its id from the checkpoint.
+"""
+
+import contextvars
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+DEFAULT_RUN_ID = "default"
+DEFAULT_TENANT_ID = "default"
+
+_scoped_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("run_id", default=None)
+
+
+def current_config() -> Dict[str, Any]:
+    """Return the active runnable config, or an empty dict outside a graph run."""
+    try:
+        from langgraph.config import get_config
+        return get_config() or {}
+    except Exception:
+        return {}
+
+
+def current_thread_id() -> Optional[str]:
+    """Return the thread_id of the active run, or None."""
+    configurable = current_config().get("configurable", {}) or {}
+    thread_id = configurable.get("thread_id")
+    return str(thread_id) if thread_id else None
+
+
+def current_run_id() -> str:
+    """Return the thread_id of the active run, else its scoped run id, else DEFAULT_RUN_ID."""
+    return current_thread_id() or _scoped_run_id.get() or DEFAULT_RUN_ID
+
+
+@contextmanager
+def run_scope(state: Optional[Mapping[str, Any]] = None) -> Iterator[str]:
+    """
+    Make the state's run_id the current run for the block, minting one (the
+    thread_id, or a fresh uuid) if the state has none yet. Yields the run id so
+    the node can return it as a state update.
+    """
+    run_id = (state or {}).get("run_id") or current_thread_id() or _scoped_run_id.get() or uuid.uuid4().hex
+    token = _scoped_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _scoped_run_id.reset(token)
+
+
+def current_tenant_id() -> str:
+    """Return the tenant_id of the active run (configurable.tenant_id), or DEFAULT_TENANT_ID."""
+    configurable = current_config().get("configurable", {}) or {}
+    return str(configurable.get("tenant_id") or DEFAULT_TENANT_ID)
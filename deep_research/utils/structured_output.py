@@ -0,0 +1,159 @@
+"""
+Structured output with local repair before any retry.
+
+`llm.with_structured_output(schema).invoke(...)` raises on the first malformed
+answer, and the nodes used to drop the whole result when it did. RepairingStructuredOutput
+keeps the raw answer (include_raw=True) and, when parsing fails:
+
+1. repairs it locally (utils/json_repair.py): fences, trailing commas, truncation,
+   type coercion against the schema, salvage of valid list elements
+2. only if that fails, asks the model once more with a targeted correction prompt
+   (the validation errors plus its previous answer), then repairs that answer too
+
+Counts of parsed / repaired / retried / failed answers are kept per component,
+for the process and per run; structured_output_report(run_id) returns the repair
+and retry rates (the API stores them with each run).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Sequence, Type
+
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+from utils.json_repair import coerce_to_schema, repair_json
+from utils.run_context import current_run_id
+
+# Previous answer quoted back in the correction prompt
+MAX_QUOTED_CHARS = 4000
+
+
+class StructuredOutputError(ValueError):
+    """The answer could not be parsed into the schema, even after repair and a retry."""
+
+    def __init__(self, message: str, raw_text: str = ""):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+def _empty_counts() -> Dict[str, Dict[str, int]]:
+    return defaultdict(lambda: {
+        "calls": 0, "parsed": 0, "repaired": 0, "retried": 0, "retry_succeeded": 0, "failed": 0,
+    })
+
+
+class StructuredOutputStats:
+    """Answer counts per component, for the process and per (run, component)."""
+
+    def __init__(self, max_runs: int = 256):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._counts = _empty_counts()
+        self._runs: "OrderedDict[str, Dict[str, Dict[str, int]]]" = OrderedDict()
+
+    def record(self, component: str, **increments: int) -> None:
+        run_id = current_run_id()
+        with self._lock:
+            run = self._runs.setdefault(run_id, _empty_counts())
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            for counts in (self._counts[component], run[component]):
+                for key, value in increments.items():
+                    counts[key] += value
+
+    def report(self, run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Counts and rates for one run, or for the process lifetime if run_id is None."""
+        with self._lock:
+            source = self._counts if run_id is None else self._runs.get(run_id, {})
+            out = {}
+            for component, counts in source.items():
+                calls = counts["calls"] or 1
+                out[component] = dict(
+                    counts,
+                    repair_rate=round(counts["repaired"] / calls, 3),
+                    retry_rate=round(counts["retried"] / calls, 3),
+                )
+            return out
+
+
+structured_output_stats = StructuredOutputStats()
+
+
+def structured_output_report(run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Parse, repair and retry counts per component for a run (process lifetime if None)."""
+    return structured_output_stats.report(run_id)
+
+
+def _raw_text(message: Any) -> str:
+    """The structured answer as text: tool-call arguments, or the message content."""
+    if not isinstance(message, AIMessage):
+        return str(message or "")
+    for call in message.tool_calls or []:
+        return json.dumps(call.get("args") or {})
+    for call in message.invalid_tool_calls or []:
+        return str(call.get("args") or "")
+    content = message.content
+    if isinstance(content, list):
+        content = "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return content or ""
+
+
+class RepairingStructuredOutput:
+    """`llm.with_structured_output(schema)` that repairs before it retries."""
+
+    def __init__(self, llm: Any, schema: Type[BaseModel], component: str, retry: bool = True):
+        self.schema = schema
+        self.component = component
+        self.retry = retry
+        self._runnable = llm.with_structured_output(schema, include_raw=True)
+
+    def _parse(self, result: Dict[str, Any]) -> tuple:
+        """(model or None, raw text, error text, repaired?)"""
+        parsed = result.get("parsed")
+        raw_text = _raw_text(result.get("raw"))
+        if isinstance(parsed, self.schema):
+            return parsed, raw_text, "", False
+        try:
+            model, notes = coerce_to_schema(repair_json(raw_text), self.schema)
+        except ValueError as e:
+            return None, raw_text, str(result.get("parsing_error") or e), False
+        print(f"[STRUCTURED] {self.component}: repaired {self.schema.__name__} locally ({'; '.join(notes[:3]) or 'JSON syntax'})")
+        return model, raw_text, "", True
+
+    def invoke(self, messages: Sequence[Any], config: Optional[Dict[str, Any]] = None) -> BaseModel:
+        model, raw_text, error, repaired = self._parse(self._runnable.invoke(messages, config=config))
+        if model is not None:
+            structured_output_stats.record(self.component, calls=1, parsed=int(not repaired), repaired=int(repaired))
+            return model
+        if not self.retry:
+            structured_output_stats.record(self.component, calls=1, failed=1)
+            raise StructuredOutputError(f"{self.schema.__name__}: {error}", raw_text)
+
+        print(f"[STRUCTURED] {self.component}: repair failed, asking for a corrected {self.schema.__name__}")
+        correction = HumanMessage(content=(
+            f"Your previous answer could not be parsed as {self.schema.__name__}:\n{error[:1500]}\n\n"
+            f"Previous answer:\n{raw_text[:MAX_QUOTED_CHARS]}\n\n"
+            "Return the complete corrected answer. Keep every valid item and fix only what the errors name."
+        ))
+        model, raw_text, error, _ = self._parse(self._runnable.invoke(list(messages) + [correction], config=config))
+        structured_output_stats.record(
+            self.component, calls=1, retried=1, retry_succeeded=int(model is not None), failed=int(model is None)
+        )
+        if model is None:
+            raise StructuredOutputError(f"{self.schema.__name__} after retry: {error}", raw_text)
+        return model
+
+
+def structured_output(llm: Any, schema: Type[BaseModel], component: str):
+    """Repairing structured runnable for a chat model or a ModelCascade (whose tiers repair themselves)."""
+    from utils.cascade import ModelCascade
+    if isinstance(llm, ModelCascade):
+        return llm.with_structured_output(schema)
+    return RepairingStructuredOutput(llm, schema, component)
@@ -0,0 +1,103 @@
+"""
+Tests for search credit budgets (utils/budget.py).
+
+Usage:
+    python utils/test_budget.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+from config import settings
+from utils.budget import CreditAccountant, call_cost, tenant_for_api_key
+
+
+def test_call_costs():
+    """Advanced calls cost double; extracts are priced per batch of 5 URLs."""
+    assert call_cost("search", "basic") == 1
+    assert call_cost("search", "advanced") == 2
+    assert call_cost("extract", "basic", url_count=5) == 1
+    assert call_cost("extract", "advanced", url_count=6) == 4
+    print("✓ Call costs")
+
+
+def test_degrade_then_refuse():
+    """An advanced call that no longer fits runs as basic; once basic does not fit either it is refused."""
+    accountant = CreditAccountant(run_cap=5, tenant_cap=100, tenant_window=60)
+    assert accountant.reserve("search", "advanced", run_id="r", tenant_id="t").depth == "advanced"
+    assert accountant.reserve("search", "advanced", run_id="r", tenant_id="t").cost == 2
+
+    degraded = accountant.reserve("search", "advanced", run_id="r", tenant_id="t")
+    assert degraded.allowed and degraded.degraded and degraded.depth == "basic" and degraded.cost == 1
+
+    refused = accountant.reserve("search", "basic", run_id="r", tenant_id="t")
+    assert not refused.allowed and refused.reason == "run search credit budget exhausted"
+    spend = accountant.run_spend("r")
+    assert spend["credits_spent"] == 5
+    assert (spend["degraded_calls"], spend["refused_calls"]) == (1, 1)
+    print("✓ Degrade, then refuse")
+
+
+def test_runs_are_capped_separately():
+    """One run exhausting its cap does not affect another run of the same tenant."""
+    accountant = CreditAccountant(run_cap=2, tenant_cap=100, tenant_window=60)
+    accountant.reserve("search", "advanced", run_id="a", tenant_id="t")
+    assert not accountant.reserve("search", "basic", run_id="a", tenant_id="t").allowed
+    assert accountant.reserve("search", "basic", run_id="b", tenant_id="t").allowed
+    print("✓ Runs capped separately")
+
+
+def test_refund_returns_credits():
+    """A failed call's credits go back to both the run and the tenant window."""
+    accountant = CreditAccountant(run_cap=2, tenant_cap=2, tenant_window=60)
+    decision = accountant.reserve("search", "advanced", run_id="r", tenant_id="t")
+    assert not accountant.reserve("search", "basic", run_id="r", tenant_id="t").allowed
+    accountant.refund(decision)
+    spend = accountant.run_spend("r")
+    assert spend["credits_spent"] == 0 and spend["refunded_credits"] == 2
+    assert accountant.tenant_spend("t")["credits_spent"] == 0
+    assert accountant.reserve("search", "advanced", run_id="r", tenant_id="t").allowed
+
+    accountant.refund(accountant.reserve("search", "basic", run_id="r", tenant_id="t"))  # refused: nothing to refund
+    assert accountant.run_spend("r")["credits_spent"] == 2
+    print("✓ Refunds return credits")
+
+
+def test_tenant_rolling_window():
+    """The tenant cap spans runs and frees up as charges leave the rolling window."""
+    accountant = CreditAccountant(run_cap=100, tenant_cap=2, tenant_window=0.2)
+    accountant.reserve("search", "advanced", run_id="a", tenant_id="t")
+    refused = accountant.reserve("search", "basic", run_id="b", tenant_id="t")
+    assert not refused.allowed and refused.reason == "tenant search credit budget exhausted"
+    assert accountant.reserve("search", "basic", run_id="b", tenant_id="other").allowed
+
+    time.sleep(0.3)
+    assert accountant.tenant_spend("t")["credits_spent"] == 0
+    assert accountant.reserve("search", "basic", run_id="b", tenant_id="t").allowed
+    print("✓ Tenant rolling window")
+
+
+def test_tenant_from_api_key():
+    """Tenants come from configured API keys; unknown or missing keys share the default tenant."""
+    configured = settings.TENANT_API_KEYS
+    settings.TENANT_API_KEYS = ["k1=acme", "k2=globex"]
+    try:
+        assert tenant_for_api_key("k2") == "globex"
+        assert tenant_for_api_key("nope") == "default"
+        assert tenant_for_api_key(None) == "default"
+    finally:
+        settings.TENANT_API_KEYS = configured
+    print("✓ Tenants derived from API keys")
+
+
+if __name__ == "__main__":
+    test_call_costs()
+    test_degrade_then_refuse()
+    test_runs_are_capped_separately()
+    test_refund_returns_credits()
+    test_tenant_rolling_window()
+    test_tenant_from_api_key()
+    print("✓ ALL TESTS PASSED")
@@ -0,0 +1,121 @@
+"""
+Tests for near-duplicate detection (utils/dedup.py).
+
+Usage:
+    python utils/test_dedup.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.web_search import SearchResult
+from utils.dedup import (
+    DEFAULT_MAX_DISTANCE,
+    RunDuplicateIndex,
+    canonical_url,
+    collapse_near_duplicates,
+    get_run_index,
+    hamming_distance,
+    simhash,
+)
+
+ARTICLE = (
+    "Researchers at the institute trained a protein language model on two hundred million sequences "
+    "and used it to design enzymes that break down plastic waste at room temperature. The team reports "
+    "that three of the designed enzymes outperformed natural variants in laboratory tests, and plans "
+    "to publish the model weights together with the training data later this year. "
+    "The work builds on a decade of efforts to engineer PET hydrolases, which until now needed "
+    "temperatures above sixty degrees to work at useful speeds. Heating large volumes of waste is "
+    "expensive, so enzymes that act at ambient temperature could make biological recycling far cheaper "
+    "for municipal plants. In the study, the model proposed several thousand candidate sequences, of "
+    "which the group synthesised one hundred and twenty for screening. Each candidate was expressed in "
+    "bacteria, purified, and incubated with shredded bottles for forty eight hours before the remaining "
+    "mass was weighed. The best performer degraded almost half of the sample in that time, roughly four "
+    "times the rate of the strongest natural enzyme measured under the same conditions. Independent "
+    "chemists who reviewed the paper cautioned that laboratory results often fail to carry over to "
+    "industrial reactors, where contaminants, dyes and mixed plastics slow the reaction considerably. "
+    "The authors acknowledge this and say a pilot with a regional recycling company is planned, with "
+    "results expected within eighteen months. Funding for the project came from a public research grant "
+    "and a partnership with a packaging manufacturer that hopes to close the loop on its own products."
+)
+OTHER = (
+    "Central banks in several economies kept interest rates unchanged this quarter, citing slowing "
+    "inflation and uncertain labour markets. Analysts expect the first cuts next spring if wage growth "
+    "continues to ease and energy prices remain stable through the winter months."
+)
+
+
+def result(url, content, title="Enzymes for plastic"):
+    return SearchResult(url=url, title=title, content=content, snippet=content[:80], score=0.5)
+
+
+def test_canonical_url():
+    """AMP, print, mobile and tracking variants map to one key; meaningful query params are kept."""
+    key = canonical_url("https://example.com/news/story")
+    for variant in (
+        "https://www.example.com/news/story/",
+        "https://m.example.com/news/story",
+        "https://amp.example.com/news/story",
+        "https://example.com/news/story/amp",
+        "https://example.com/news/story/print/",
+        "https://example.com/news/story?utm_source=x&fbclid=y",
+    ):
+        assert canonical_url(variant) == key, variant
+    assert canonical_url("https://example.com/page.amp.html") == canonical_url("https://example.com/page.html")
+    assert canonical_url("https://example.com/search?q=b&p=2") == canonical_url("https://example.com/search?p=2&q=b")
+    assert canonical_url("https://example.com/search?q=a") != canonical_url("https://example.com/search?q=b")
+    print("✓ Canonical URLs")
+
+
+def test_simhash_threshold():
+    """Lightly edited copies stay within the threshold; different articles are far apart."""
+    base = simhash(ARTICLE)
+    edited = simhash(ARTICLE.replace("almost half", "nearly half").replace("forty eight", "forty-eight"))
+    assert hamming_distance(base, simhash(ARTICLE)) == 0
+    assert hamming_distance(base, edited) <= DEFAULT_MAX_DISTANCE
+    assert hamming_distance(base, simhash(OTHER)) > DEFAULT_MAX_DISTANCE
+    assert simhash("too short to fingerprint") is None
+    print("✓ SimHash threshold")
+
+
+def test_collapse_keeps_first_with_alternate_urls():
+    """Near-duplicates collapse into the first result, which lists the other URLs as alternates."""
+    results = [
+        result("https://nature.com/articles/enzymes", ARTICLE),
+        result("https://mirror.org/enzymes-copy", ARTICLE + " Republished with permission."),
+        result("https://www.nature.com/articles/enzymes/amp", "Short AMP page."),
+        result("https://reuters.com/markets/rates", OTHER, title="Rates on hold"),
+    ]
+    kept = collapse_near_duplicates(results)
+    assert [r.url for r in kept] == ["https://nature.com/articles/enzymes", "https://reuters.com/markets/rates"]
+    assert kept[0].alternate_urls == ["https://mirror.org/enzymes-copy", "https://www.nature.com/articles/enzymes/amp"]
+    assert kept[1].alternate_urls == []
+    print("✓ Collapse keeps the first result with alternate URLs")
+
+
+def test_run_index_claims_across_subqueries():
+    """The first owner of a document keeps it; later near-duplicates in the run point to it."""
+    index = RunDuplicateIndex()
+    assert index.claim(result("https://nature.com/a", ARTICLE), "raw_data/subquery0_result0.txt") is None
+    owner = index.claim(result("https://mirror.org/a", ARTICLE), "raw_data/subquery1_result2.txt")
+    assert owner == "raw_data/subquery0_result0.txt"
+    assert index.claim(result("https://reuters.com/b", OTHER), "raw_data/subquery1_result3.txt") is None
+    print("✓ Run index claims across subqueries")
+
+
+def test_run_indexes_are_per_run():
+    """Each run id gets its own index, so one run never skips results because of another."""
+    get_run_index("test-run-a").claim(result("https://nature.com/a", ARTICLE), "a")
+    assert get_run_index("test-run-b").claim(result("https://nature.com/a", ARTICLE), "b") is None
+    assert get_run_index("test-run-a") is get_run_index("test-run-a")
+    print("✓ Run indexes are per run")
+
+
+if __name__ == "__main__":
+    test_canonical_url()
+    test_simhash_threshold()
+    test_collapse_keeps_first_with_alternate_urls()
+    test_run_index_claims_across_subqueries()
+    test_run_indexes_are_per_run()
+    print("✓ ALL TESTS PASSED")
@@ -0,0 +1,152 @@
+"""
+Tests for structured-output repair (utils/json_repair.py, utils/structured_output.py).
+
+Usage:
+    python utils/test_json_repair.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from utils.json_repair import coerce_to_schema, repair_json
+from utils.structured_output import RepairingStructuredOutput, StructuredOutputError
+
+
+class Finding(BaseModel):
+    claim: str
+    confidence: float
+
+
+class Analysis(BaseModel):
+    url: str
+    summary: str
+    findings: List[Finding]
+    note: Optional[str] = None
+
+
+class ScriptedLLM:
+    """Returns the given raw answers in order, as with_structured_output(include_raw=True) would."""
+
+    def __init__(self, *answers: str):
+        self.answers = list(answers)
+        self.requests = []
+
+    def with_structured_output(self, schema, include_raw=False):
+        return self
+
+    def invoke(self, messages, config=None):
+        self.requests.append(messages)
+        return {"raw": AIMessage(content=self.answers.pop(0)), "parsed": None, "parsing_error": "invalid JSON"}
+
+
+def expect_value_error(fn, *args):
+    try:
+        fn(*args)
+    except ValueError:
+        return
+    raise AssertionError(f"{fn.__name__} accepted {args!r}")
+
+
+def test_repair_fenced_json():
+    """JSON wrapped in a Markdown fence and prose is extracted."""
+    text = 'Here you go:\n```json\n{"url": "u", "findings": []}\n```\nAnything else?'
+    assert repair_json(text) == {"url": "u", "findings": []}
+    print("✓ Fenced JSON repaired")
+
+
+def test_repair_trailing_commas_and_literals():
+    """Trailing commas are dropped and Python literals mapped to JSON."""
+    assert repair_json('{"a": [1, 2,], "b": True, "c": None,}') == {"a": [1, 2], "b": True, "c": None}
+    print("✓ Trailing commas and Python literals repaired")
+
+
+def test_repair_truncated_json():
+    """Output cut off at max_tokens keeps its complete elements."""
+    data = repair_json('{"url": "u", "summary": "s", "findings": [{"claim": "a", "confidence": 0.9}, {"claim": "b", "conf')
+    assert data["url"] == "u"
+    assert data["findings"][0] == {"claim": "a", "confidence": 0.9}
+    assert repair_json('{"summary": "cut mid-str') == {"summary": "cut mid-str"}
+    expect_value_error(repair_json, "no json here")
+    print("✓ Truncated JSON repaired")
+
+
+def test_coerce_types_and_salvage_list_elements():
+    """Scalars are coerced to the schema types; invalid list elements are dropped, valid ones kept."""
+    model, notes = coerce_to_schema(
+        {"url": "u", "summary": 42, "findings": [{"claim": "a", "confidence": "0.8"}, {"claim": "b"}]},
+        Analysis,
+    )
+    assert model.summary == "42"
+    assert [f.claim for f in model.findings] == ["a"]
+    assert model.findings[0].confidence == 0.8
+    assert any("dropped invalid element" in note for note in notes)
+    print("✓ Types coerced and valid list elements salvaged")
+
+
+def test_coerce_percentage_to_fraction():
+    """'80%' for a 0-1 float field becomes 0.8, not 80."""
+    model, _ = coerce_to_schema({"url": "u", "summary": "s", "findings": [{"claim": "a", "confidence": "80%"}]}, Analysis)
+    assert model.findings[0].confidence == 0.8
+    print("✓ Percentages coerced to fractions")
+
+
+def test_missing_required_fields_are_not_invented():
+    """A missing or null required field fails instead of being filled with an empty value."""
+    expect_value_error(coerce_to_schema, {"summary": "s", "findings": []}, Analysis)
+    expect_value_error(coerce_to_schema, {"url": None, "summary": "s", "findings": []}, Analysis)
+    expect_value_error(coerce_to_schema, {"url": "u", "summary": "s"}, Analysis)
+    model, _ = coerce_to_schema({"url": "u", "summary": "s", "findings": []}, Analysis)
+    assert model.note is None
+    print("✓ Missing required fields refused, optional ones left unset")
+
+
+def test_local_repair_avoids_retry():
+    """A repairable answer is returned without asking the model again."""
+    llm = ScriptedLLM('```json\n{"url": "u", "summary": "s", "findings": [],}\n```')
+    model = RepairingStructuredOutput(llm, Analysis, "test_repair").invoke(["question"])
+    assert model.url == "u"
+    assert len(llm.requests) == 1
+    print("✓ Local repair needs no retry")
+
+
+def test_retry_with_correction_prompt():
+    """An unrepairable answer is retried once with the errors and the previous answer quoted."""
+    llm = ScriptedLLM('{"summary": "no url"}', '{"url": "u", "summary": "fixed", "findings": []}')
+    model = RepairingStructuredOutput(llm, Analysis, "test_retry").invoke(["question"])
+    assert model.summary == "fixed"
+    assert len(llm.requests) == 2
+    correction = llm.requests[1][-1].content
+    assert "could not be parsed as Analysis" in correction
+    assert '{"summary": "no url"}' in correction
+    print("✓ Retry with correction prompt")
+
+
+def test_retry_failure_raises():
+    """If the retry is unusable too, StructuredOutputError carries the last raw answer."""
+    llm = ScriptedLLM('{"summary": "no url"}', '{"summary": "still no url"}')
+    try:
+        RepairingStructuredOutput(llm, Analysis, "test_retry_fail").invoke(["question"])
+    except StructuredOutputError as e:
+        assert "still no url" in e.raw_text
+    else:
+        raise AssertionError("expected StructuredOutputError")
+    print("✓ Failed retry raises StructuredOutputError")
+
+
+if __name__ == "__main__":
+    test_repair_fenced_json()
+    test_repair_trailing_commas_and_literals()
+    test_repair_truncated_json()
+    test_coerce_types_and_salvage_list_elements()
+    test_coerce_percentage_to_fraction()
+    test_missing_required_fields_are_not_invented()
+    test_local_repair_avoids_retry()
+    test_retry_with_correction_prompt()
+    test_retry_failure_raises()
+    print("✓ ALL TESTS PASSED")
@@ -0,0 +1,93 @@
+"""
+Tests for content normalization (utils/normalize.py).
+
+Usage:
+    python utils/test_normalize.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.normalize import normalize_documents, strip_boilerplate
+
+
+ARTICLE = """Skip to main content
+[Home](/) | [News](/news) | [Science](/science) | [About](/about)
+Sign in
+Accept all cookies
+
+## Read more about the methodology
+
+Researchers must sign up for trial registries before enrolment, per FDA rules.
+The newsletter of the society covered the sponsored trials in detail.
+
+Companies in the study:
+- Recursion
+- Insilico Medicine
+- Exscientia
+- Isomorphic Labs
+- BenevolentAI
+- Schrodinger
+
+* [Politics](/politics)
+* [Business](/business)
+* [Health](/health)
+* [Technology](/tech)
+* [Sport](/sport)
+
+Share on Twitter
+Read more
+© 2024 Example News Ltd. All rights reserved.
+"""
+
+
+def test_content_mentioning_chrome_phrases_survives():
+    """Lists, headings and sentences are kept even when they mention chrome phrases."""
+    text = strip_boilerplate(ARTICLE)
+    assert "## Read more about the methodology" in text
+    assert "Researchers must sign up for trial registries before enrolment, per FDA rules." in text
+    assert "The newsletter of the society covered the sponsored trials in detail." in text
+    for company in ("Recursion", "Insilico Medicine", "Exscientia", "Isomorphic Labs", "BenevolentAI", "Schrodinger"):
+        assert f"- {company}" in text
+    print("✓ Headings, sentences and plain lists survive")
+
+
+def test_page_chrome_is_removed():
+    """Whole-line chrome, nav bars, link menus and footers are dropped."""
+    text = strip_boilerplate(ARTICLE)
+    for chrome in ("Skip to main content", "[News](/news)", "Sign in", "Accept all cookies",
+                   "[Politics](/politics)", "Share on Twitter", "All rights reserved"):
+        assert chrome not in text, chrome
+    assert "\nRead more\n" not in f"\n{text}\n"
+    print("✓ Page chrome removed")
+
+
+def test_short_link_lists_survive():
+    """A few links in a row (references, see also) are content, not a menu."""
+    text = strip_boilerplate("See also:\n- [AlphaFold](https://example.org/af)\n- [RoseTTAFold](https://example.org/rf)\n")
+    assert "[AlphaFold](https://example.org/af)" in text
+    assert "[RoseTTAFold](https://example.org/rf)" in text
+    print("✓ Short link lists survive")
+
+
+def test_lines_repeated_across_same_domain_are_removed():
+    """Site chrome that survives the line rules is caught by cross-document repetition."""
+    footer = "Example News is published by Example Media Group"
+    docs = [
+        ("https://news.example.com/a", f"First article body about protein folding.\n\n{footer}"),
+        ("https://news.example.com/b", f"Second article body about drug screening.\n\n{footer}"),
+        ("https://other.org/c", f"Unrelated page.\n\n{footer}"),
+    ]
+    texts, _ = normalize_documents(docs, max_chars=0)
+    assert footer not in texts[0] and footer not in texts[1]
+    assert footer in texts[2]
+    print("✓ Repeated same-domain lines removed")
+
+
+if __name__ == "__main__":
+    test_content_mentioning_chrome_phrases_survives()
+    test_page_chrome_is_removed()
+    test_short_link_lists_survive()
+    test_lines_repeated_across_same_domain_are_removed()
+    print("✓ ALL TESTS PASSED")
@@ -0,0 +1,180 @@
+"""
+Tests for the shared resilience policy (utils/resilience.py).
+
+Usage:
+    python utils/test_resilience.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+from utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResiliencePolicy,
+    RetryBudget,
+    RetryBudgetExhausted,
+    is_retryable,
+    retry_after_seconds,
+)
+from utils.run_context import run_scope
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after_seconds = retry_after
+
+
+class Flaky:
+    """Fails with the given errors in order, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def policy(**overrides):
+    options = dict(
+        max_attempts=3, base_delay=0.001, max_delay=0.05,
+        budget=RetryBudget(100), breaker=CircuitBreaker("test", failure_threshold=100, reset_timeout=60),
+    )
+    options.update(overrides)
+    return ResiliencePolicy("test", **options)
+
+
+def expect(error_type, fn, *args):
+    try:
+        fn(*args)
+    except error_type as e:
+        return e
+    raise AssertionError(f"expected {error_type.__name__}")
+
+
+def test_classification():
+    """429/5xx and connection errors retry; auth and validation errors do not."""
+    assert is_retryable(ProviderError(429)) and is_retryable(ProviderError(503))
+    assert not is_retryable(ProviderError(400)) and not is_retryable(ProviderError(401))
+    assert is_retryable(TimeoutError()) and is_retryable(type("APIConnectionError", (Exception,), {})())
+    assert not is_retryable(ValueError("bad input"))
+    print("✓ Error classification")
+
+
+def test_retries_until_success():
+    """Transient failures are retried up to max_attempts; permanent ones are raised at once."""
+    flaky = Flaky(ProviderError(503), ProviderError(429))
+    assert policy().call(flaky) == "ok" and flaky.calls == 3
+
+    flaky = Flaky(ProviderError(503), ProviderError(503), ProviderError(503))
+    expect(ProviderError, policy().call, flaky)
+    assert flaky.calls == 3
+
+    flaky = Flaky(ProviderError(401))
+    expect(ProviderError, policy().call, flaky)
+    assert flaky.calls == 1
+    print("✓ Retries until success or max_attempts")
+
+
+def test_retry_after_honoured_and_capped():
+    """A Retry-After within max_delay is waited out; a longer one gives up instead of sleeping."""
+    flaky = Flaky(ProviderError(429, retry_after=0.03))
+    started = time.monotonic()
+    assert policy().call(flaky) == "ok"
+    assert time.monotonic() - started >= 0.03
+
+    flaky = Flaky(ProviderError(429, retry_after=30))
+    started = time.monotonic()
+    expect(ProviderError, policy(max_delay=0.05).call, flaky)
+    assert flaky.calls == 1 and time.monotonic() - started < 1
+    print("✓ Retry-After honoured up to the cap")
+
+
+def test_retry_after_header():
+    """retry-after-ms and retry-after headers are read from the error's response."""
+    response = type("Response", (), {"headers": {"retry-after": "7"}})()
+    assert retry_after_seconds(type("E", (Exception,), {"response": response})()) == 7.0
+    response.headers = {"retry-after-ms": "1500"}
+    assert retry_after_seconds(type("E", (Exception,), {"response": response})()) == 1.5
+    print("✓ Retry-After headers parsed")
+
+
+def test_retry_budget_per_run():
+    """A run that used up its retries fails fast; another run still retries."""
+    budget = RetryBudget(1)
+    with run_scope({"run_id": "run-a"}):
+        assert policy(budget=budget).call(Flaky(ProviderError(503))) == "ok"
+        error = expect(RetryBudgetExhausted, policy(budget=budget).call, Flaky(ProviderError(503)))
+        assert error.run_id == "run-a"
+    with run_scope({"run_id": "run-b"}):
+        assert policy(budget=budget).call(Flaky(ProviderError(503))) == "ok"
+    assert budget.spent("test", "run-a") == 1 and budget.spent("test", "run-b") == 1
+
+    bounded = RetryBudget(1, max_runs=2)
+    for run_id in ("r1", "r2", "r3"):
+        bounded.try_consume("test", run_id)
+    assert bounded.spent("test", "r1") == 0 and bounded.spent("test", "r3") == 1
+    print("✓ Retry budget per run, bounded to recent runs")
+
+
+def test_breaker_open_half_open_closed():
+    """The breaker opens after the threshold, lets one trial through after the timeout, and closes on success."""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    guarded = policy(max_attempts=1, breaker=breaker)
+    for _ in range(2):
+        expect(ProviderError, guarded.call, Flaky(ProviderError(503)))
+    assert breaker.state == "open"
+    untouched = Flaky()
+    expect(CircuitOpenError, guarded.call, untouched)
+    assert untouched.calls == 0
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    expect(CircuitOpenError, breaker.before_call)  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert guarded.call(Flaky()) == "ok"
+    assert breaker.state == "closed"
+    print("✓ Breaker open, half-open and closed")
+
+
+def test_stream_retries_only_before_first_item():
+    """A stream is retried until its first item; errors after that propagate."""
+    attempts = []
+
+    def stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ProviderError(503)
+        yield "a"
+        if len(attempts) == 2:
+            raise ProviderError(503)
+        yield "b"
+
+    items = []
+    error = expect(ProviderError, lambda: items.extend(policy().stream(stream)))
+    assert items == ["a"] and len(attempts) == 2 and error.status_code == 503
+    print("✓ Streams retried only before the first item")
+
+
+if __name__ == "__main__":
+    test_classification()
+    test_retries_until_success()
+    test_retry_after_honoured_and_capped()
+    test_retry_after_header()
+    test_retry_budget_per_run()
+    test_breaker_open_half_open_closed()
+    test_stream_retries_only_before_first_item()
+    print("✓ ALL TESTS PASSED")
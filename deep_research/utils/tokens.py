@@ -0,0 +1,29 @@
+"""
+Cheap token estimates for budgeting prompts.
+
+Uses the same ~4 characters per token heuristic the nodes already log with. It is
+deliberately tokenizer-free so it works offline and costs nothing per call.
+"""
+
+from typing import Any, Iterable
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a string."""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: Iterable[Any]) -> int:
+    """Approximate token count of a list of messages (LangChain objects or dicts)."""
+    total = 0
+    for msg in messages:
+        content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
+        total += estimate_tokens(content if isinstance(content, str) else str(content))
+        tool_calls = msg.get("tool_calls") if isinstance(msg, dict) else getattr(msg, "tool_calls", None)
+        if tool_calls:
+            total += estimate_tokens(str(tool_calls))
+    return total
@@ -0,0 +1,208 @@
+"""
+Token, cost and latency accounting per run, node, subquery and agent.
+
+UsageTracker is a callback handler that config/models.get_model attaches to every
+component model (nodes and deep agents alike). For each model call it records
+prompt, completion and cached tokens, latency and an estimated cost, attributed to
+
+    run        -> thread_id of the active run (utils/run_context.py)
+    node       -> the top-level workflow node the call happened under
+    subquery   -> the subquery index, set by the researcher hub via usage_scope()
+    agent      -> the component whose model made the call (clarifier, scraper_node, ...)
+
+Answers replayed from the LLM response cache (utils/llm_cache.py) cost nothing:
+they are counted as llm_cache_hits, with the cost they avoided in
+llm_cache_saved_usd, and add no calls, tokens or cost_usd.
+
+usage_report(thread_id) aggregates the records; the API stores it with the run
+and serves it from /api/research/usage/{thread_id}.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.run_context import DEFAULT_RUN_ID, current_run_id
+
+# USD per 1M tokens: (uncached input, cached input, output)
+MODEL_PRICES: Dict[str, tuple] = {
+    "gpt-5": (1.25, 0.125, 10.0),
+    "gpt-5-mini": (0.25, 0.025, 2.0),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+}
+
+_subquery_index: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("usage_subquery_index", default=None)
+
+
+@contextmanager
+def usage_scope(subquery_index: Optional[int]):
+    """Attribute model calls made inside the block to a subquery."""
+    token = _subquery_index.set(subquery_index)
+    try:
+        yield
+    finally:
+        _subquery_index.reset(token)
+
+
+def estimate_cost(model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    uncached, cached, output = prices
+    return ((input_tokens - cached_tokens) * uncached + cached_tokens * cached + output_tokens * output) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cached_tokens": 0,
+        "latency_ms": 0,
+        "cost_usd": 0.0,
+        # Answers served by the LLM response cache (utils/llm_cache.py): not billed
+        "llm_cache_hits": 0,
+        "llm_cache_saved_usd": 0.0,
+    }
+
+
+def _add(totals: Dict[str, Any], record: Dict[str, Any]) -> None:
+    for key in _empty_totals():
+        totals[key] += record.get(key, 0)
+
+
+def _is_llm_cache_hit(usage: Dict[str, Any]) -> bool:
+    # LangChain replays cached generations with their original usage_metadata and
+    # only sets total_cost to 0; provider responses never carry total_cost
+    return "total_cost" in usage and not usage["total_cost"]
+
+
+class UsageLedger:
+    """Per-run list of model call records (bounded to the most recent runs)."""
+
+    def __init__(self, max_runs: int = 256):
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, run_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            records = self._runs.setdefault(run_id, [])
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            records.append(record)
+
+    def report(self, run_id: str = DEFAULT_RUN_ID) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self._runs.get(run_id, []))
+
+        totals = _empty_totals()
+        groups: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "by_node": defaultdict(_empty_totals),
+            "by_agent": defaultdict(_empty_totals),
+            "by_subquery": defaultdict(_empty_totals),
+            "by_model": defaultdict(_empty_totals),
+        }
+        for record in records:
+            _add(totals, record)
+            _add(groups["by_node"][record["node"]], record)
+            _add(groups["by_agent"][record["agent"]], record)
+            _add(groups["by_model"][record["model"]], record)
+            if record["subquery_index"] is not None:
+                _add(groups["by_subquery"][str(record["subquery_index"])], record)
+
+        def finish(entry: Dict[str, Any]) -> Dict[str, Any]:
+            entry["cost_usd"] = round(entry["cost_usd"], 6)
+            entry["llm_cache_saved_usd"] = round(entry["llm_cache_saved_usd"], 6)
+            return entry
+
+        report = {"run_id": run_id, "totals": finish(totals)}
+        for name, group in groups.items():
+            # Most expensive first, so the stages worth fixing are on top
+            ordered = sorted(group.items(), key=lambda kv: (kv[1]["cost_usd"], kv[1]["input_tokens"]), reverse=True)
+            report[name] = {key: finish(entry) for key, entry in ordered}
+        return report
+
+
+usage_ledger = UsageLedger()
+
+
+def _top_level_node(metadata: Dict[str, Any]) -> str:
+    # "run_researcher:<task id>|scraper:<task id>|model:<task id>" -> "run_researcher"
+    namespace = metadata.get("langgraph_checkpoint_ns") or ""
+    if namespace:
+        return namespace.split("|")[0].split(":")[0]
+    return metadata.get("langgraph_node") or "unknown"
+
+
+class UsageTracker(BaseCallbackHandler):
+    """Records tokens, latency and cost for every call made by one component's model."""
+
+    def __init__(self, component: str, model_name: str, ledger: Optional[UsageLedger] = None):
+        self.component = component
+        self.model_name = model_name
+        self.ledger = ledger or usage_ledger
+        # LangChain run id -> (start time, node, subquery index)
+        self._pending: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        with self._lock:
+            self._pending[run_id] = (time.perf_counter(), _top_level_node(metadata or {}), _subquery_index.get())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started, node, subquery_index = self._pending.pop(run_id, (None, "unknown", _subquery_index.get()))
+        latency_ms = int((time.perf_counter() - started) * 1000) if started is not None else 0
+
+        input_tokens = output_tokens = cached_tokens = 0
+        cache_hit = False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                cache_hit = cache_hit or _is_llm_cache_hit(usage)
+                input_tokens += int(usage.get("input_tokens") or 0)
+                output_tokens += int(usage.get("output_tokens") or 0)
+                cached_tokens += int((usage.get("input_token_details") or {}).get("cache_read") or 0)
+
+        cost = estimate_cost(self.model_name, input_tokens, cached_tokens, output_tokens)
+        record = {
+            "node": node,
+            "subquery_index": subquery_index,
+            "agent": self.component,
+            "model": self.model_name,
+            "latency_ms": latency_ms,
+        }
+        if cache_hit:
+            # No provider call was made: nothing billed, the avoided cost is reported apart
+            record.update(llm_cache_hits=1, llm_cache_saved_usd=cost)
+        else:
+            record.update(
+                calls=1,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cached_tokens=cached_tokens,
+                cost_usd=cost,
+            )
+        self.ledger.record(current_run_id(), record)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+
+def usage_report(run_id: str = DEFAULT_RUN_ID) -> Dict[str, Any]:
+    """Token, latency and cost totals for a run, broken down by node, agent, subquery and model."""
+    return usage_ledger.report(run_id)
@@ -1,9 +1,46 @@
-from deepagents.graph import create_deep_agent, async_create_deep_agent
-from deepagents.interrupt import ToolInterruptConfig
-from deepagents.state import DeepAgentState
-from deepagents.sub_agent import SubAgent
-from deepagents.model import get_default_model
-from deepagents.builder import (
-    create_configurable_agent,
-    async_create_configurable_agent,
-)
+"""Deep agents: planning, a virtual file system and sub-agents on top of LangGraph.
+
+Public names are imported on first access, so importing a light submodule such as
+`deepagents.state` does not pull in the agent builders and model providers.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+_EXPORTS = {
+    "create_deep_agent": "deepagents.graph",
+    "async_create_deep_agent": "deepagents.graph",
+    "ToolInterruptConfig": "deepagents.interrupt",
+    "DeepAgentState": "deepagents.state",
+    "SubAgent": "deepagents.sub_agent",
+    "get_default_model": "deepagents.model",
+    "create_configurable_agent": "deepagents.builder",
+    "async_create_configurable_agent": "deepagents.builder",
+    "create_compaction_hook": "deepagents.compaction",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from deepagents.graph import create_deep_agent, async_create_deep_agent
+    from deepagents.interrupt import ToolInterruptConfig
+    from deepagents.state import DeepAgentState
+    from deepagents.sub_agent import SubAgent
+    from deepagents.model import get_default_model
+    from deepagents.builder import (
+        create_configurable_agent,
+        async_create_configurable_agent,
+    )
+    from deepagents.compaction import create_compaction_hook
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'deepagents' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,8 +1,12 @@
 from deepagents import create_deep_agent, async_create_deep_agent, SubAgent
 from langchain_core.tools import BaseTool, tool
 from pydantic import BaseModel
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from typing_extensions import TypedDict, NotRequired
+from collections import OrderedDict
+import hashlib
+import json
+import threading
 
 
 class SerializableSubAgent(TypedDict):
@@ -14,15 +18,58 @@ class SerializableSubAgent(TypedDict):
     model: NotRequired[dict[str, Any]]
 
 
+def _stable(value: Any) -> Any:
+    """JSON-able stand-in for values that are not JSON (schemas, models, hooks)."""
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    # LangChain models expose their settings (model name, temperature, ...)
+    params = getattr(value, "_identifying_params", None)
+    if isinstance(params, dict):
+        return {"type": type(value).__qualname__, "params": json.loads(json.dumps(params, default=repr))}
+    # Hooks, checkpointers, ...: the same object within this process
+    return f"{type(value).__qualname__}@{id(value)}"
+
+
+def agent_cache_key(**parts: Any) -> str:
+    """Stable hash of everything that shapes a compiled agent."""
+    blob = json.dumps(parts, sort_keys=True, default=_stable)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _AgentCache:
+    """Small LRU of compiled agents; compiling the graph dominates build_agent()."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._agents: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: str, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._agents:
+                self._agents.move_to_end(key)
+                return self._agents[key]
+        agent = build()
+        with self._lock:
+            agent = self._agents.setdefault(key, agent)
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.maxsize:
+                self._agents.popitem(last=False)
+        return agent
+
+
 def create_configurable_agent(
     default_instructions: str,
     default_sub_agents: list[SerializableSubAgent],
     tools,
     agent_config: Optional[dict] = None,
+    cache_size: int = 32,
     **kwargs,
 ):
     tools = [t if isinstance(t, BaseTool) else tool(t) for t in tools]
     tool_names = [t.name for t in tools]
+    # Compiled agents by configuration, so per-request builds reuse the graph
+    cache = _AgentCache(cache_size)
 
     class AgentConfig(BaseModel):
         instructions: str = default_instructions
@@ -38,13 +85,21 @@ def create_configurable_agent(
             k: v for k, v in config.items() if k in ["instructions", "subagents"]
         }
         config = AgentConfig(**config_fields)
-        return create_deep_agent(
+        key = agent_cache_key(
+            builder="create_deep_agent",
+            instructions=config.instructions,
+            subagents=config.subagents,
+            tools=sorted(config.tools),
+            agent_config=agent_config or {},
+            options=kwargs,
+        )
+        return cache.get_or_build(key, lambda: create_deep_agent(
             instructions=config.instructions,
             tools=[t for t in tools if t.name in config.tools],
             subagents=config.subagents,
             config_schema=AgentConfig,
             **kwargs,
-        ).with_config(agent_config or {})
+        ).with_config(agent_config or {}))
 
     return build_agent
 
@@ -54,10 +109,13 @@ def async_create_configurable_agent(
     default_sub_agents: list[SerializableSubAgent],
     tools,
     agent_config: Optional[dict] = None,
+    cache_size: int = 32,
     **kwargs,
 ):
     tools = [t if isinstance(t, BaseTool) else tool(t) for t in tools]
     tool_names = [t.name for t in tools]
+    # Compiled agents by configuration, so per-request builds reuse the graph
+    cache = _AgentCache(cache_size)
 
     class AgentConfig(BaseModel):
         instructions: str = default_instructions
@@ -73,12 +131,20 @@ def async_create_configurable_agent(
             k: v for k, v in config.items() if k in ["instructions", "subagents"]
         }
         config = AgentConfig(**config_fields)
-        return async_create_deep_agent(
+        key = agent_cache_key(
+            builder="async_create_deep_agent",
+            instructions=config.instructions,
+            subagents=config.subagents,
+            tools=sorted(config.tools),
+            agent_config=agent_config or {"recursion_limit": 1000},
+            options=kwargs,
+        )
+        return cache.get_or_build(key, lambda: async_create_deep_agent(
             instructions=config.instructions,
             tools=[t for t in tools if t.name in config.tools],
             subagents=config.subagents,
             config_schema=AgentConfig,
             **kwargs,
-        ).with_config(agent_config or {"recursion_limit": 1000})
+        ).with_config(agent_config or {"recursion_limit": 1000}))
 
     return build_agent
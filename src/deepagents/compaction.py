@@ -0,0 +1,148 @@
+"""Context compaction for long-running deep agents.
+
+`create_compaction_hook` builds a `pre_model_hook` for `create_deep_agent`. The
+graph state keeps the full message history; only the messages sent to the model
+(`llm_input_messages`) are compacted, so each turn stays under a token budget:
+
+1. Tool outputs the model has already responded to are replaced by short stubs.
+   `read_file` stubs name the VFS path, so the agent can read it again.
+2. If that is not enough, older turns are folded into one extractive summary
+   message. The first user message and the most recent turns are always kept.
+
+The system prompt is added by `create_react_agent` after the hook runs, so it is
+never affected.
+"""
+
+from typing import Any, Callable, Optional, Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+
+# Tool outputs shorter than this are left alone; stubbing them saves nothing
+MIN_ELIDE_CHARS = 400
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Rough token count (~4 characters per token) of message contents and tool calls."""
+    chars = 0
+    for message in messages:
+        chars += len(str(message.content))
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            chars += len(str(tool_call.get("args", "")))
+    return chars // 4
+
+
+def _tool_calls_by_id(messages: Sequence[BaseMessage]) -> dict[str, dict[str, Any]]:
+    calls = {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            for tool_call in message.tool_calls or []:
+                calls[tool_call.get("id")] = tool_call
+    return calls
+
+
+def _stub(message: ToolMessage, tool_call: Optional[dict[str, Any]]) -> ToolMessage:
+    name = (tool_call or {}).get("name") or message.name or "tool"
+    args = (tool_call or {}).get("args") or {}
+    size = len(str(message.content))
+    if name == "read_file" and args.get("file_path"):
+        text = (
+            f"[Elided: read_file output for '{args['file_path']}' ({size} chars) was already used. "
+            f"Call read_file('{args['file_path']}') again if you need it.]"
+        )
+    else:
+        text = f"[Elided: {name} output ({size} chars) was already used.]"
+    return message.model_copy(update={"content": text})
+
+
+def _summarize_turns(messages: Sequence[BaseMessage], max_chars: int = 200) -> str:
+    lines = ["[Summary of earlier turns, compacted to save context]"]
+    for message in messages:
+        if isinstance(message, AIMessage):
+            if message.content:
+                lines.append(f"- You noted: {str(message.content)[:max_chars]}")
+            for tool_call in message.tool_calls or []:
+                args = ", ".join(f"{k}={str(v)[:60]!r}" for k, v in (tool_call.get("args") or {}).items())
+                lines.append(f"- You called {tool_call.get('name')}({args})")
+        elif isinstance(message, HumanMessage):
+            lines.append(f"- User said: {str(message.content)[:max_chars]}")
+    return "\n".join(lines)
+
+
+def compact_messages(
+    messages: Sequence[AnyMessage],
+    max_tokens: int,
+    keep_recent: int = 6,
+    summarize: Optional[Callable[[Sequence[BaseMessage]], str]] = None,
+) -> list[AnyMessage]:
+    """Return a copy of `messages` that fits `max_tokens` where possible (see module docstring)."""
+    messages = list(messages)
+    if estimate_tokens(messages) <= max_tokens:
+        return messages
+
+    # 1. Stub tool outputs that a later model turn has already consumed
+    recent_start = max(0, len(messages) - keep_recent)
+    compacted = _stub_consumed(messages, before=recent_start)
+    if estimate_tokens(compacted) <= max_tokens:
+        return compacted
+
+    # 2. Fold older turns into one summary; keep the task and the recent window intact.
+    # The window must not start with a ToolMessage whose tool call would be cut off.
+    first_human = next((i for i, m in enumerate(compacted) if isinstance(m, HumanMessage)), None)
+    cut = recent_start
+    while 0 < cut < len(compacted) and isinstance(compacted[cut], ToolMessage):
+        cut -= 1
+    head = [compacted[first_human]] if first_human is not None and first_human < cut else []
+    older = [m for i, m in enumerate(compacted[:cut]) if i != first_human]
+    if older:
+        summary = (summarize or _summarize_turns)(older)
+        compacted = head + [HumanMessage(content=summary)] + compacted[cut:]
+    if estimate_tokens(compacted) <= max_tokens:
+        return compacted
+
+    # 3. Still too large: stub consumed outputs inside the recent window as well.
+    # Outputs the model has not seen yet (after its last turn) are always kept.
+    return _stub_consumed(compacted, before=len(compacted))
+
+
+def _stub_consumed(messages: Sequence[AnyMessage], before: int) -> list[AnyMessage]:
+    """Stub large tool outputs at positions < `before` that a later AI turn has already seen."""
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    calls = _tool_calls_by_id(messages)
+    result = []
+    for i, message in enumerate(messages):
+        if (
+            isinstance(message, ToolMessage)
+            and i < last_ai
+            and i < before
+            and len(str(message.content)) >= MIN_ELIDE_CHARS
+        ):
+            message = _stub(message, calls.get(message.tool_call_id))
+        result.append(message)
+    return result
+
+
+def create_compaction_hook(
+    max_tokens: int,
+    keep_recent: int = 6,
+    summarize: Optional[Callable[[Sequence[BaseMessage]], str]] = None,
+) -> Callable[[dict], dict]:
+    """Build a pre_model_hook that keeps the model input under `max_tokens`.
+
+    Args:
+        max_tokens: Token budget for the message history sent to the model.
+        keep_recent: Number of most recent messages that are never compacted.
+        summarize: Optional function that turns the older messages into summary text
+            (for example with a cheap model). By default an extractive summary is used.
+    """
+
+    def compaction_hook(state: dict) -> dict:
+        messages = state.get("messages", [])
+        return {"llm_input_messages": compact_messages(messages, max_tokens, keep_recent, summarize)}
+
+    return compaction_hook
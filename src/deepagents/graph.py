@@ -1,6 +1,7 @@
 from deepagents.sub_agent import (
     _create_task_tool,
     _create_sync_task_tool,
+    limit_tool_parallelism,
     SubAgent,
     CustomSubAgent,
 )
@@ -11,6 +12,7 @@ from typing import Sequence, Union, Callable, Any, TypeVar, Type, Optional
 from langchain_core.tools import BaseTool, tool
 from langchain_core.language_models import LanguageModelLike
 from deepagents.interrupt import create_interrupt_hook, ToolInterruptConfig
+from deepagents.loop_guard import chain_post_model_hooks, create_loop_guard_hook
 from langgraph.types import Checkpointer
 from langgraph.prebuilt import create_react_agent
 from deepagents.prompts import BASE_AGENT_PROMPT
@@ -32,6 +34,10 @@ def _agent_builder(
     post_model_hook: Optional[Callable] = None,
     main_agent_tools: Optional[list[str]] = None,
     is_async: bool = False,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    detect_loops: bool = False,
 ):
     prompt = instructions + BASE_AGENT_PROMPT
 
@@ -52,18 +58,13 @@ def _agent_builder(
         model = get_default_model()
     state_schema = state_schema or DeepAgentState
 
-    # Should never be the case that both are specified
-    if post_model_hook and interrupt_config:
-        raise ValueError(
-            "Cannot specify both post_model_hook and interrupt_config together. "
-            "Use either interrupt_config for tool interrupts or post_model_hook for custom post-processing."
-        )
-    elif post_model_hook is not None:
-        selected_post_model_hook = post_model_hook
-    elif interrupt_config is not None:
-        selected_post_model_hook = create_interrupt_hook(interrupt_config)
-    else:
-        selected_post_model_hook = None
+    # Loop guard first (it answers looping calls), then the custom hook, then the
+    # interrupt hook, which only asks about calls that are still going to run
+    selected_post_model_hook = chain_post_model_hooks(
+        create_loop_guard_hook(max_steps, detect_loops=detect_loops) if detect_loops or max_steps is not None else None,
+        post_model_hook,
+        create_interrupt_hook(interrupt_config) if interrupt_config is not None else None,
+    )
 
     if not is_async:
         task_tool = _create_sync_task_tool(
@@ -73,6 +74,8 @@ def _agent_builder(
             model,
             state_schema,
             selected_post_model_hook,
+            pre_model_hook,
+            tool_parallelism,
         )
     else:
         task_tool = _create_task_tool(
@@ -82,6 +85,8 @@ def _agent_builder(
             model,
             state_schema,
             selected_post_model_hook,
+            pre_model_hook,
+            tool_parallelism,
         )
     if main_agent_tools is not None:
         passed_in_tools = []
@@ -94,15 +99,17 @@ def _agent_builder(
         passed_in_tools = list(tools)
     all_tools = built_in_tools + passed_in_tools + [task_tool]
 
-    return create_react_agent(
+    agent = create_react_agent(
         model,
         prompt=prompt,
         tools=all_tools,
         state_schema=state_schema,
         post_model_hook=selected_post_model_hook,
+        pre_model_hook=pre_model_hook,
         config_schema=config_schema,
         checkpointer=checkpointer,
     )
+    return limit_tool_parallelism(agent, tool_parallelism)
 
 
 def create_deep_agent(
@@ -117,6 +124,10 @@ def create_deep_agent(
     checkpointer: Optional[Checkpointer] = None,
     post_model_hook: Optional[Callable] = None,
     main_agent_tools: Optional[list[str]] = None,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    detect_loops: bool = False,
 ):
     """Create a deep agent.
 
@@ -140,11 +151,23 @@ def create_deep_agent(
             only the specified built-in tools are included.
         interrupt_config: Optional Dict[str, HumanInterruptConfig] mapping tool names to interrupt configs.
         config_schema: The schema of the deep agent.
-        post_model_hook: Custom post model hook
+        post_model_hook: Custom post model hook. Runs after the loop guard and before
+            the interrupt hook from `interrupt_config`, if those are set.
+        pre_model_hook: Custom pre model hook, e.g. `create_compaction_hook(...)` to keep
+            the message history sent to the model under a token budget. Also applied to
+            subagents.
         checkpointer: Optional checkpointer for persisting agent state between runs.
         main_agent_tools: Optional list of tool names that the main agent should have. If not provided,
             will have access to all tools. Note that built-in tools (for filesystem and todo and subagents) are
             always included - this filtering only applies to passed in tools.
+        tool_parallelism: Max tool calls from one model turn that run at the same time
+            (e.g. a batch of read_file calls). None leaves them unbounded. Also applied
+            to subagents. Set as the graph's default `max_concurrency`; the agent is
+            still returned as its CompiledStateGraph.
+        max_steps: Model turns before the agent is told to write its output and stop
+            (see `deepagents.loop_guard`). Also applied to subagents.
+        detect_loops: Answer repeated reads from earlier results and refuse identical
+            repeats and oscillating edits instead of running them. Independent of `max_steps`.
     """
     return _agent_builder(
         tools=tools,
@@ -158,6 +181,10 @@ def create_deep_agent(
         checkpointer=checkpointer,
         post_model_hook=post_model_hook,
         main_agent_tools=main_agent_tools,
+        pre_model_hook=pre_model_hook,
+        tool_parallelism=tool_parallelism,
+        max_steps=max_steps,
+        detect_loops=detect_loops,
         is_async=False,
     )
 
@@ -174,6 +201,10 @@ def async_create_deep_agent(
     checkpointer: Optional[Checkpointer] = None,
     post_model_hook: Optional[Callable] = None,
     main_agent_tools: Optional[list[str]] = None,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    detect_loops: bool = False,
 ):
     """Create a deep agent.
 
@@ -197,11 +228,23 @@ def async_create_deep_agent(
             only the specified built-in tools are included.
         interrupt_config: Optional Dict[str, HumanInterruptConfig] mapping tool names to interrupt configs.
         config_schema: The schema of the deep agent.
-        post_model_hook: Custom post model hook
+        post_model_hook: Custom post model hook. Runs after the loop guard and before
+            the interrupt hook from `interrupt_config`, if those are set.
+        pre_model_hook: Custom pre model hook, e.g. `create_compaction_hook(...)` to keep
+            the message history sent to the model under a token budget. Also applied to
+            subagents.
         checkpointer: Optional checkpointer for persisting agent state between runs.
         main_agent_tools: Optional list of tool names that the main agent should have. If not provided,
             will have access to all tools. Note that built-in tools (for filesystem and todo and subagents) are
             always included - this filtering only applies to passed in tools.
+        tool_parallelism: Max tool calls from one model turn that run at the same time
+            (e.g. a batch of read_file calls). None leaves them unbounded. Also applied
+            to subagents. Set as the graph's default `max_concurrency`; the agent is
+            still returned as its CompiledStateGraph.
+        max_steps: Model turns before the agent is told to write its output and stop
+            (see `deepagents.loop_guard`). Also applied to subagents.
+        detect_loops: Answer repeated reads from earlier results and refuse identical
+            repeats and oscillating edits instead of running them. Independent of `max_steps`.
     """
     return _agent_builder(
         tools=tools,
@@ -215,5 +258,9 @@ def async_create_deep_agent(
         checkpointer=checkpointer,
         post_model_hook=post_model_hook,
         main_agent_tools=main_agent_tools,
+        pre_model_hook=pre_model_hook,
+        tool_parallelism=tool_parallelism,
+        max_steps=max_steps,
+        detect_loops=detect_loops,
         is_async=True,
     )
@@ -1,6 +1,7 @@
 """Interrupt configuration functionality for deep agents using LangGraph prebuilts."""
 
 from typing import Dict, Any, List, Optional, Union
+from langchain_core.messages import AIMessage, ToolMessage
 from langgraph.types import interrupt
 from langgraph.prebuilt.interrupt import (
     HumanInterruptConfig,
@@ -37,10 +38,13 @@ def create_interrupt_hook(
         if not messages:
             return
 
-        last_message = messages[-1]
+        # The model's message; hooks chained before this one may have answered
+        # some of its calls already (see loop_guard.chain_post_model_hooks)
+        last_message = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
 
-        if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
+        if last_message is None or not last_message.tool_calls:
             return
+        answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
 
         # Separate tool calls that need interrupts from those that don't
         interrupt_tool_calls = []
@@ -48,7 +52,7 @@ def create_interrupt_hook(
 
         for tool_call in last_message.tool_calls:
             tool_name = tool_call["name"]
-            if tool_name in tool_configs and tool_configs[tool_name]:
+            if tool_call["id"] not in answered and tool_name in tool_configs and tool_configs[tool_name]:
                 interrupt_tool_calls.append(tool_call)
             else:
                 auto_approved_tool_calls.append(tool_call)
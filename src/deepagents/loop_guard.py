@@ -0,0 +1,204 @@
+"""Loop detection and step budgets for deep agents.
+
+`create_loop_guard_hook` builds a `post_model_hook` that looks at the tool calls
+the model just made, before they run. Every repeat is a paid model turn, so it
+stops the common loops early:
+
+1. Repeated reads: a `read_file`/`ls` call identical to an earlier one, with no
+   write to the file since, is answered from the earlier result instead of
+   running the tool again. Reads are never refused: compaction
+   (`deepagents.compaction`) may have elided the earlier result from the model's
+   context and told it to read the file again.
+2. Identical repeats: once any other call has been made `max_repeats` times,
+   further identical calls are not run; the model is told to use what it has.
+3. Oscillating edits: an `edit_file` that reverts an earlier edit, or a
+   `write_file` that restores an earlier, since-replaced version of a file, is
+   not run.
+4. Step budget: after `max_steps` model turns, only the wrap-up tools
+   (`write_file`, `edit_file`) still run and the model is told to finish; two
+   turns later any remaining tool calls are dropped and the agent stops.
+
+Checks 1-3 run with `detect_loops`, check 4 with `max_steps`; either works
+without the other. Skipped calls are answered with a ToolMessage, so the tool-call/tool-result
+pairing the providers require stays intact. `chain_post_model_hooks` runs
+several post-model hooks in order, e.g. the loop guard before the interrupt
+hook built from `interrupt_config`.
+"""
+
+import json
+from typing import Any, Callable, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+# Tools whose result only depends on the file system
+CACHEABLE_TOOLS = ("read_file", "ls")
+# Tools that change files (invalidate cached reads) and still run during wrap-up
+WRITE_TOOLS = ("write_file", "edit_file")
+# Turns after the budget in which the model may still write its output
+WRAP_UP_TURNS = 2
+
+
+def chain_post_model_hooks(*hooks: Optional[Callable]) -> Optional[Callable]:
+    """One post_model_hook that runs `hooks` in order, each seeing the previous ones' updates."""
+    hooks = [h for h in hooks if h is not None]
+    if len(hooks) <= 1:
+        return hooks[0] if hooks else None
+
+    def chained_hook(state: dict[str, Any]) -> Optional[dict[str, Any]]:
+        messages = list(state.get("messages", []))
+        updates: list = []
+        for hook in hooks:
+            update = hook({**state, "messages": messages}) or {}
+            new_messages = update.get("messages") or []
+            if new_messages:
+                updates.extend(new_messages)
+                messages = add_messages(messages, new_messages)
+        return {"messages": updates} if updates else None
+
+    return chained_hook
+
+
+def _signature(tool_call: dict[str, Any]) -> str:
+    return tool_call.get("name", "") + json.dumps(tool_call.get("args") or {}, sort_keys=True, default=str)
+
+
+def _path(tool_call: dict[str, Any]) -> str:
+    return str((tool_call.get("args") or {}).get("file_path", "")).lstrip("/")
+
+
+def _reply(tool_call: dict[str, Any], content: str, note: bool = True) -> ToolMessage:
+    # Notes (refusals, duplicates) are marked so they are never replayed as a cached result
+    return ToolMessage(
+        content=content,
+        name=tool_call.get("name"),
+        tool_call_id=tool_call["id"],
+        additional_kwargs={"loop_guard_note": True} if note else {},
+    )
+
+
+def _replayable(result: Optional[ToolMessage]) -> bool:
+    return (
+        result is not None
+        and not result.additional_kwargs.get("loop_guard_note")
+        and not str(result.content).startswith("[Elided:")
+    )
+
+
+def create_loop_guard_hook(
+    max_steps: Optional[int] = None,
+    detect_loops: bool = True,
+    max_repeats: int = 2,
+    cacheable_tools: Sequence[str] = CACHEABLE_TOOLS,
+    write_tools: Sequence[str] = WRITE_TOOLS,
+) -> Callable[[dict[str, Any]], Optional[dict[str, Any]]]:
+    """Post-model hook that answers looping tool calls instead of running them.
+
+    Args:
+        max_steps: Model turns before the agent must wrap up (None: no budget).
+        detect_loops: Answer repeated reads and refuse identical repeats and
+            oscillating edits. With False only the step budget is enforced.
+        max_repeats: Identical calls allowed before further repeats are refused.
+        cacheable_tools: Read-only tools whose repeats are answered from earlier results.
+        write_tools: Tools that change files; they invalidate cached reads and still
+            run while wrapping up.
+    """
+
+    def loop_guard_hook(state: dict[str, Any]) -> Optional[dict[str, Any]]:
+        messages: list[BaseMessage] = state.get("messages", [])
+        if not messages or not isinstance(messages[-1], AIMessage) or not messages[-1].tool_calls:
+            return None
+        current = messages[-1]
+
+        # This agent's turns: everything after the last user message
+        start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1) + 1
+        history = messages[start:-1]
+        steps = sum(isinstance(m, AIMessage) for m in messages[start:])
+
+        if max_steps is not None and steps >= max_steps + WRAP_UP_TURNS:
+            note = f"[Stopped: step budget of {max_steps} turns exhausted.]"
+            content = f"{current.content}\n\n{note}" if isinstance(current.content, str) and current.content else note
+            return {"messages": [current.model_copy(update={"content": content, "tool_calls": []})]}
+
+        # Earlier calls in order, with their results and the position of each
+        results = {m.tool_call_id: m for m in history if isinstance(m, ToolMessage)}
+        earlier: list[tuple[int, dict[str, Any]]] = [
+            (position, call)
+            for position, m in enumerate(history) if isinstance(m, AIMessage)
+            for call in m.tool_calls or []
+        ]
+
+        def written_since(position: int, path: Optional[str]) -> bool:
+            # Any write (to `path`, or to anything if None) or subagent task after `position`
+            for p, call in earlier:
+                if p <= position:
+                    continue
+                if call["name"] == "task" or (call["name"] in write_tools and (path is None or _path(call) == path)):
+                    return True
+            return False
+
+        replies = []
+        seen_this_turn: dict[str, str] = {}
+        for call in current.tool_calls:
+            name, signature = call["name"], _signature(call)
+
+            if max_steps is not None and steps >= max_steps and name not in write_tools:
+                replies.append(_reply(call, (
+                    f"[Step budget of {max_steps} turns exhausted: {name} was not run. "
+                    "Write your final output now with what you already have, then stop.]"
+                )))
+                continue
+
+            if not detect_loops:
+                continue
+
+            if signature in seen_this_turn:
+                replies.append(_reply(call, f"[Duplicate of tool call {seen_this_turn[signature]} in this turn; see its result.]"))
+                continue
+            seen_this_turn[signature] = call["id"]
+
+            same = [(p, c) for p, c in earlier if _signature(c) == signature]
+            if name in cacheable_tools:
+                # Answered from the latest real result if nothing was written since,
+                # otherwise run again; never refused (see module docstring)
+                latest = next(((p, results.get(c["id"])) for p, c in reversed(same) if _replayable(results.get(c["id"]))), None)
+                path = _path(call) if name == "read_file" else None
+                if latest is not None and not written_since(latest[0], path):
+                    replies.append(_reply(call, latest[1].content, note=False))
+                continue
+
+            if len(same) >= max_repeats:
+                replies.append(_reply(call, (
+                    f"[Not run: identical {name} call already made {len(same)} times. "
+                    "Its result has not changed; use it and move on to the next step.]"
+                )))
+                continue
+
+            if name == "edit_file":
+                args = call.get("args") or {}
+                reverts = any(
+                    c["name"] == "edit_file" and _path(c) == _path(call)
+                    and (c.get("args") or {}).get("old_string") == args.get("new_string")
+                    and (c.get("args") or {}).get("new_string") == args.get("old_string")
+                    for _, c in earlier
+                )
+                if reverts:
+                    replies.append(_reply(call, (
+                        f"[Not run: this edit reverts an earlier edit of '{_path(call)}'. "
+                        "Keep the current version and move on.]"
+                    )))
+                    continue
+
+            if name == "write_file":
+                content = (call.get("args") or {}).get("content")
+                versions = [(c.get("args") or {}).get("content") for _, c in earlier if c["name"] == "write_file" and _path(c) == _path(call)]
+                if content in versions[:-1] and content != versions[-1]:
+                    replies.append(_reply(call, (
+                        f"[Not run: this restores an earlier version of '{_path(call)}' that was already replaced. "
+                        "Keep the current version and move on.]"
+                    )))
+                    continue
+
+        return {"messages": replies} if replies else None
+
+    return loop_guard_hook
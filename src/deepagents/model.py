@@ -4,7 +4,9 @@
 # def get_default_model():
 #     return ChatAnthropic(model_name="claude-sonnet-4-20250514", max_tokens=64000)
 
-from langchain_openai import ChatOpenAI
 
 def get_default_model():
+    # Imported here so that importing deepagents does not load the provider SDK
+    from langchain_openai import ChatOpenAI
+
     return ChatOpenAI(model="gpt-4o", temperature=0)
@@ -10,8 +10,12 @@ from langchain.chat_models import init_chat_model
 from typing import Annotated, NotRequired, Any, Union, Optional, Callable
 from langgraph.types import Command
 from langchain_core.runnables import Runnable
+from langgraph.graph.state import CompiledStateGraph
 
 from langgraph.prebuilt import InjectedState
+import threading
+from collections.abc import Mapping
+from fnmatch import fnmatch
 
 
 class SubAgent(TypedDict):
@@ -21,12 +25,70 @@ class SubAgent(TypedDict):
     tools: NotRequired[list[str]]
     # Optional per-subagent model: can be either a model instance OR dict settings
     model: NotRequired[Union[LanguageModelLike, dict[str, Any]]]
+    # Optional glob patterns (e.g. "summaries/*") of the files the subagent sees;
+    # all files if omitted
+    files: NotRequired[list[str]]
 
 
 class CustomSubAgent(TypedDict):
     name: str
     description: str
     graph: Runnable
+    files: NotRequired[list[str]]
+
+
+class _LazyAgents(Mapping):
+    """Subagent graphs by name, each compiled on first use.
+
+    Most deep agents never call `task`, so compiling every subagent (and the
+    general-purpose one) up front is wasted work on every agent build.
+    """
+
+    def __init__(self, factories: dict[str, Callable[[], Runnable]]):
+        self._factories = factories
+        self._agents: dict[str, Runnable] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Runnable:
+        agent = self._agents.get(name)
+        if agent is None:
+            factory = self._factories[name]
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is None:
+                    agent = self._agents[name] = factory()
+        return agent
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+
+def limit_tool_parallelism(agent: CompiledStateGraph, max_parallelism: Optional[int]) -> CompiledStateGraph:
+    """Cap how many tool calls from one model turn run at the same time.
+
+    create_react_agent sends each tool call of a turn to the tools node as its own
+    task, so they run concurrently as parallel tasks of one graph step; the
+    graph's `max_concurrency` bounds them, sync and async. Updates are still
+    applied in tool-call order, so the resulting state does not depend on which
+    call finished first. None leaves them unbounded.
+
+    The limit goes into the compiled graph's own default config, so the result is
+    still a CompiledStateGraph (get_state, get_graph, stream(..., subgraphs=True))
+    rather than a RunnableBinding around it; a config passed at invoke time can
+    still override it.
+    """
+    if max_parallelism is None:
+        return agent
+    if max_parallelism < 1:
+        raise ValueError("tool_parallelism must be at least 1")
+    # Pregel.with_config returns a copy of the compiled graph, not a RunnableBinding
+    return agent.with_config({"max_concurrency": max_parallelism})
 
 
 def _get_agents(
@@ -36,17 +98,21 @@ def _get_agents(
     model,
     state_schema,
     post_model_hook: Optional[Callable] = None,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
 ):
-    agents = {
-        "general-purpose": create_react_agent(
-            model,
-            prompt=instructions,
-            tools=tools,
+    def react_agent(get_model, prompt, agent_tools):
+        return lambda: limit_tool_parallelism(create_react_agent(
+            get_model(),
+            prompt=prompt,
+            tools=agent_tools,
+            state_schema=state_schema,
             checkpointer=False,
             post_model_hook=post_model_hook,
-            state_schema=state_schema,
-        )
-    }
+            pre_model_hook=pre_model_hook,
+        ), tool_parallelism)
+
+    factories = {"general-purpose": react_agent(lambda: model, instructions, tools)}
     tools_by_name = {}
     for tool_ in tools:
         if not isinstance(tool_, BaseTool):
@@ -54,8 +120,9 @@ def _get_agents(
         tools_by_name[tool_.name] = tool_
     for _agent in subagents:
         if "graph" in _agent:
-            agents[_agent["name"]] = _agent["graph"]
+            factories[_agent["name"]] = (lambda graph: lambda: graph)(_agent["graph"])
             continue
+        # Tool names are resolved now so typos still fail when the agent is built
         if "tools" in _agent:
             _tools = [tools_by_name[t] for t in _agent["tools"]]
         else:
@@ -64,27 +131,50 @@ def _get_agents(
         if "model" in _agent:
             agent_model = _agent["model"]
             if isinstance(agent_model, dict):
-                # Dictionary settings - create model from config
-                sub_model = init_chat_model(**agent_model)
+                # Dictionary settings - create model from config on first use
+                get_model = (lambda settings: lambda: init_chat_model(**settings))(agent_model)
             else:
                 # Model instance - use directly
-                sub_model = agent_model
+                get_model = (lambda instance: lambda: instance)(agent_model)
         else:
             # Fallback to main model
-            sub_model = model
-        agents[_agent["name"]] = create_react_agent(
-            sub_model,
-            prompt=_agent["prompt"],
-            tools=_tools,
-            state_schema=state_schema,
-            checkpointer=False,
-            post_model_hook=post_model_hook,
-        )
-    return agents
+            get_model = lambda: model
+        factories[_agent["name"]] = react_agent(get_model, _agent["prompt"], _tools)
+    return _LazyAgents(factories)
 
 
 def _get_subagent_description(subagents: list[SubAgent | CustomSubAgent]):
-    return [f"- {_agent['name']}: {_agent['description']}" for _agent in subagents]
+    return [
+        f"- {_agent['name']}: {_agent['description']}"
+        + (f" (sees only files matching: {', '.join(_agent['files'])})" if _agent.get("files") is not None else "")
+        for _agent in subagents
+    ]
+
+
+def _subagent_input(state: dict, description: str, patterns: Optional[list[str]]) -> tuple[dict, dict]:
+    """The subagent's own input state, and the files forwarded to it.
+
+    The caller's state is not modified. Only files matching `patterns` are
+    forwarded; their contents are shared, not copied, since the file tools never
+    mutate state and the `files` reducer always builds a new dict.
+    """
+    files = state.get("files") or {}
+    if patterns is not None:
+        files = {path: content for path, content in files.items() if any(fnmatch(path, p) for p in patterns)}
+    sub_state = {k: v for k, v in state.items() if k not in ("messages", "files")}
+    sub_state["messages"] = [{"role": "user", "content": description}]
+    sub_state["files"] = files
+    return sub_state, files
+
+
+def _changed_files(forwarded: dict, result: dict) -> dict:
+    """Files the subagent created or changed (unchanged ones are the same objects)."""
+    changed = {}
+    for path, content in (result.get("files") or {}).items():
+        previous = forwarded.get(path)
+        if previous is not content and previous != content:
+            changed[path] = content
+    return changed
 
 
 def _create_task_tool(
@@ -94,11 +184,15 @@ def _create_task_tool(
     model,
     state_schema,
     post_model_hook: Optional[Callable] = None,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
 ):
     agents = _get_agents(
-        tools, instructions, subagents, model, state_schema, post_model_hook
+        tools, instructions, subagents, model, state_schema, post_model_hook, pre_model_hook,
+        tool_parallelism,
     )
     other_agents_string = _get_subagent_description(subagents)
+    file_scopes = {_agent["name"]: _agent.get("files") for _agent in subagents}
 
     @tool(
         description=TASK_TOOL_DESCRIPTION.format(other_agents=other_agents_string)
@@ -112,11 +206,12 @@ def _create_task_tool(
         if subagent_type not in agents:
             return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents]}"
         sub_agent = agents[subagent_type]
-        state["messages"] = [{"role": "user", "content": description}]
-        result = await sub_agent.ainvoke(state)
+        sub_state, forwarded = _subagent_input(state, description, file_scopes.get(subagent_type))
+        result = await sub_agent.ainvoke(sub_state)
         return Command(
             update={
-                "files": result.get("files", {}),
+                # Only what the subagent wrote; the reducer merges it into the caller's files
+                "files": _changed_files(forwarded, result),
                 "messages": [
                     ToolMessage(
                         result["messages"][-1].content, tool_call_id=tool_call_id
@@ -135,11 +230,15 @@ def _create_sync_task_tool(
     model,
     state_schema,
     post_model_hook: Optional[Callable] = None,
+    pre_model_hook: Optional[Callable] = None,
+    tool_parallelism: Optional[int] = None,
 ):
     agents = _get_agents(
-        tools, instructions, subagents, model, state_schema, post_model_hook
+        tools, instructions, subagents, model, state_schema, post_model_hook, pre_model_hook,
+        tool_parallelism,
     )
     other_agents_string = _get_subagent_description(subagents)
+    file_scopes = {_agent["name"]: _agent.get("files") for _agent in subagents}
 
     @tool(
         description=TASK_TOOL_DESCRIPTION.format(other_agents=other_agents_string)
@@ -153,11 +252,12 @@ def _create_sync_task_tool(
         if subagent_type not in agents:
             return f"Error: invoked agent of type {subagent_type}, the only allowed types are {[f'`{k}`' for k in agents]}"
         sub_agent = agents[subagent_type]
-        state["messages"] = [{"role": "user", "content": description}]
-        result = sub_agent.invoke(state)
+        sub_state, forwarded = _subagent_input(state, description, file_scopes.get(subagent_type))
+        result = sub_agent.invoke(sub_state)
         return Command(
             update={
-                "files": result.get("files", {}),
+                # Only what the subagent wrote; the reducer merges it into the caller's files
+                "files": _changed_files(forwarded, result),
                 "messages": [
                     ToolMessage(
                         result["messages"][-1].content, tool_call_id=tool_call_id
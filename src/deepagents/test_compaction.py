@@ -0,0 +1,96 @@
+"""
+Tests for context compaction (compaction.py).
+
+Usage:
+    python src/deepagents/test_compaction.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copy import deepcopy
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from deepagents.compaction import compact_messages, create_compaction_hook, estimate_tokens
+
+BIG = "x" * 2000
+
+
+def history(reads=6):
+    """A task followed by `reads` read_file turns with large outputs, then a final AI turn."""
+    messages = [HumanMessage(content="Write the report.")]
+    for n in range(reads):
+        call = {"name": "read_file", "args": {"file_path": f"file{n}.md"}, "id": f"call_{n}"}
+        messages += [AIMessage(content="", tool_calls=[call]), ToolMessage(content=BIG, tool_call_id=call["id"])]
+    messages.append(AIMessage(content="Reading done."))
+    return messages
+
+
+def assert_paired(messages):
+    """Every tool result follows an AI message that made its call."""
+    seen = set()
+    for message in messages:
+        if isinstance(message, AIMessage):
+            seen |= {c["id"] for c in message.tool_calls or []}
+        if isinstance(message, ToolMessage):
+            assert message.tool_call_id in seen, f"orphan tool result {message.tool_call_id}"
+
+
+def test_hook_only_changes_model_input():
+    """The hook returns llm_input_messages and leaves the graph state's messages untouched."""
+    messages = history()
+    before = deepcopy(messages)
+    update = create_compaction_hook(max_tokens=2000)({"messages": messages})
+    assert set(update) == {"llm_input_messages"}
+    assert messages == before
+    assert estimate_tokens(update["llm_input_messages"]) < estimate_tokens(messages)
+    print("✓ Only llm_input_messages is compacted")
+
+
+def test_under_budget_unchanged():
+    """A history within budget is sent as is."""
+    messages = history(reads=1)
+    assert compact_messages(messages, max_tokens=100_000) == messages
+    print("✓ Histories within budget are unchanged")
+
+
+def test_stubs_keep_tool_call_ids_paired():
+    """Consumed outputs become stubs with the same tool_call_id; read_file stubs name the path."""
+    messages = history()
+    compacted = compact_messages(messages, max_tokens=2500, keep_recent=4)
+    stubs = [m for m in compacted if isinstance(m, ToolMessage) and str(m.content).startswith("[Elided:")]
+    assert stubs
+    assert all(m.tool_call_id.startswith("call_") for m in stubs)
+    assert "read_file('file0.md')" in stubs[0].content
+    assert_paired(compacted)
+    print("✓ Stubs keep tool_call ids paired")
+
+
+def test_summary_keeps_task_and_pairing():
+    """Folding older turns keeps the first user message and never leaves an orphan tool result."""
+    messages = history(reads=10)
+    for keep_recent in range(2, 8):
+        compacted = compact_messages(messages, max_tokens=300, keep_recent=keep_recent)
+        assert compacted[0].content == "Write the report."
+        assert any(isinstance(m, HumanMessage) and m.content.startswith("[Summary of earlier turns") for m in compacted)
+        assert_paired(compacted)
+    print("✓ Summaries keep the task and tool-call pairing")
+
+
+def test_unseen_outputs_kept():
+    """Tool outputs the model has not responded to yet are never stubbed."""
+    messages = history()[:-1]
+    compacted = compact_messages(messages, max_tokens=100, keep_recent=2)
+    assert compacted[-1].content == BIG
+    print("✓ Outputs the model has not seen are kept")
+
+
+if __name__ == "__main__":
+    test_hook_only_changes_model_input()
+    test_under_budget_unchanged()
+    test_stubs_keep_tool_call_ids_paired()
+    test_summary_keeps_task_and_pairing()
+    test_unseen_outputs_kept()
+    print("✓ ALL TESTS PASSED")
@@ -0,0 +1,41 @@
+"""
+Tests for deep agent construction (graph.py, sub_agent.py).
+
+Usage:
+    python src/deepagents/test_graph.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.state import CompiledStateGraph
+
+from deepagents import create_deep_agent
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def test_tool_parallelism_keeps_compiled_graph():
+    """The parallelism cap is the graph's default config; the agent stays a CompiledStateGraph."""
+    model = ToolCallingFakeModel(messages=iter([AIMessage(content="done")]))
+    agent = create_deep_agent([], "Answer briefly.", model=model, checkpointer=MemorySaver(), tool_parallelism=3)
+    assert isinstance(agent, CompiledStateGraph)
+    assert agent.config["max_concurrency"] == 3
+
+    config = {"configurable": {"thread_id": "t1"}}
+    agent.invoke({"messages": [("user", "hi")]}, config)
+    assert agent.get_state(config).values["messages"][-1].content == "done"
+    assert agent.get_graph().nodes
+    print("✓ tool_parallelism keeps the CompiledStateGraph API")
+
+
+if __name__ == "__main__":
+    test_tool_parallelism_keeps_compiled_graph()
+    print("✓ ALL TESTS PASSED")
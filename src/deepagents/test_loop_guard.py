@@ -0,0 +1,156 @@
+"""
+Tests for the deep agent loop guard (loop_guard.py).
+
+Usage:
+    python src/deepagents/test_loop_guard.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from itertools import count
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from deepagents.loop_guard import WRAP_UP_TURNS, create_loop_guard_hook
+
+_ids = count()
+
+
+def call(name, **args):
+    return {"name": name, "args": args, "id": f"call_{next(_ids)}"}
+
+
+def turn(*calls, result="ok"):
+    """An AI turn with its tool calls and their results."""
+    return [AIMessage(content="", tool_calls=list(calls))] + [ToolMessage(content=result, tool_call_id=c["id"]) for c in calls]
+
+
+def run(hook, history, *calls):
+    """Replies the hook gives for the new turn `calls`, by tool call id (None if all calls run)."""
+    update = hook({"messages": [HumanMessage(content="task")] + history + [AIMessage(content="", tool_calls=list(calls))]})
+    return {m.tool_call_id: m for m in (update or {}).get("messages", []) if isinstance(m, ToolMessage)}, update
+
+
+def test_rereads_answered_from_cache():
+    """A repeated read with no write since is answered with the earlier result."""
+    history = turn(call("read_file", file_path="notes.md"), result="NOTES v1")
+    again = call("read_file", file_path="notes.md")
+    replies, _ = run(create_loop_guard_hook(), history, again)
+    assert replies[again["id"]].content == "NOTES v1"
+    print("✓ Re-read answered from the earlier result")
+
+
+def test_reread_after_write_runs():
+    """A write to the file since the last read invalidates the cached result."""
+    history = turn(call("read_file", file_path="notes.md"), result="NOTES v1") + turn(call("write_file", file_path="notes.md", content="v2"))
+    replies, _ = run(create_loop_guard_hook(), history, call("read_file", file_path="notes.md"))
+    assert not replies
+    print("✓ Re-read after a write runs the tool")
+
+
+def test_rereads_never_refused():
+    """Reads past max_repeats are still answered (compaction may have elided the earlier output)."""
+    history = []
+    for _ in range(4):
+        history += turn(call("read_file", file_path="notes.md"), result="NOTES")
+    again = call("read_file", file_path="notes.md")
+    replies, _ = run(create_loop_guard_hook(max_repeats=2), history, again)
+    assert replies[again["id"]].content == "NOTES"
+    print("✓ Re-reads are never refused")
+
+
+def test_guard_notes_not_replayed():
+    """A refusal or duplicate note is never served as a cached read result."""
+    first = call("read_file", file_path="notes.md")
+    history = [AIMessage(content="", tool_calls=[first]),
+               ToolMessage(content="[Duplicate of tool call x in this turn; see its result.]", tool_call_id=first["id"],
+                           additional_kwargs={"loop_guard_note": True})]
+    replies, _ = run(create_loop_guard_hook(), history, call("read_file", file_path="notes.md"))
+    assert not replies
+    print("✓ Guard notes are not replayed as results")
+
+
+def test_identical_repeats_refused():
+    """Other tools are refused once an identical call was made max_repeats times."""
+    history = turn(call("web_search", query="x")) + turn(call("web_search", query="x"))
+    again = call("web_search", query="x")
+    replies, _ = run(create_loop_guard_hook(max_repeats=2), history, again)
+    assert replies[again["id"]].content.startswith("[Not run: identical web_search call already made 2 times")
+    replies, _ = run(create_loop_guard_hook(max_repeats=2), history[:2], call("web_search", query="x"))
+    assert not replies
+    print("✓ Identical repeats refused after max_repeats")
+
+
+def test_duplicates_in_one_turn():
+    """The second of two identical calls in one turn points at the first."""
+    first, second = call("web_search", query="y"), call("web_search", query="y")
+    replies, _ = run(create_loop_guard_hook(), [], first, second)
+    assert list(replies) == [second["id"]]
+    assert first["id"] in replies[second["id"]].content
+    print("✓ Duplicates within a turn answered")
+
+
+def test_edit_oscillation_refused():
+    """An edit that reverts an earlier edit is not run."""
+    history = turn(call("edit_file", file_path="a.md", old_string="red", new_string="blue"))
+    revert = call("edit_file", file_path="a.md", old_string="blue", new_string="red")
+    replies, _ = run(create_loop_guard_hook(), history, revert)
+    assert "reverts an earlier edit" in replies[revert["id"]].content
+    print("✓ Reverting edits refused")
+
+
+def test_write_oscillation_refused():
+    """A write that restores an already replaced version is not run; rewriting the current one is."""
+    history = turn(call("write_file", file_path="a.md", content="v1")) + turn(call("write_file", file_path="a.md", content="v2"))
+    restore = call("write_file", file_path="a.md", content="v1")
+    replies, _ = run(create_loop_guard_hook(), history, restore)
+    assert "restores an earlier version" in replies[restore["id"]].content
+    replies, _ = run(create_loop_guard_hook(), history, call("write_file", file_path="a.md", content="v3"))
+    assert not replies
+    print("✓ Restoring replaced writes refused")
+
+
+def test_step_budget_and_wrap_up():
+    """After max_steps only writes run; WRAP_UP_TURNS later the agent is stopped."""
+    max_steps = 3
+    history = []
+    for n in range(max_steps - 1):
+        history += turn(call("web_search", query=f"q{n}"))
+    search, write = call("web_search", query="late"), call("write_file", file_path="out.md", content="done")
+    replies, _ = run(create_loop_guard_hook(max_steps=max_steps), history, search, write)
+    assert "Step budget of 3 turns exhausted" in replies[search["id"]].content
+    assert write["id"] not in replies
+
+    for n in range(WRAP_UP_TURNS):
+        history += turn(call("write_file", file_path="out.md", content=f"draft {n}"))
+    replies, update = run(create_loop_guard_hook(max_steps=max_steps), history, call("write_file", file_path="out.md", content="final"))
+    stopped = update["messages"][0]
+    assert isinstance(stopped, AIMessage) and not stopped.tool_calls
+    assert "step budget of 3 turns exhausted" in stopped.content
+    print("✓ Step budget enforced, then the agent stops after the wrap-up turns")
+
+
+def test_detect_loops_off_keeps_budget_only():
+    """With detect_loops=False repeats run, while the step budget still applies."""
+    history = turn(call("web_search", query="x")) + turn(call("web_search", query="x"))
+    replies, _ = run(create_loop_guard_hook(max_steps=10, detect_loops=False), history, call("web_search", query="x"))
+    assert not replies
+    replies, _ = run(create_loop_guard_hook(max_steps=2, detect_loops=False), history, call("web_search", query="z"))
+    assert replies
+    print("✓ detect_loops=False leaves only the step budget")
+
+
+if __name__ == "__main__":
+    test_rereads_answered_from_cache()
+    test_reread_after_write_runs()
+    test_rereads_never_refused()
+    test_guard_notes_not_replayed()
+    test_identical_repeats_refused()
+    test_duplicates_in_one_turn()
+    test_edit_oscillation_refused()
+    test_write_oscillation_refused()
+    test_step_budget_and_wrap_up()
+    test_detect_loops_off_keeps_budget_only()
+    print("✓ ALL TESTS PASSED")
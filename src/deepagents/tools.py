@@ -137,11 +137,11 @@ def write_file(
                 }
             )
     
-    files = state.get("files", {})
-    files[normalized_path] = content
+    # Only the changed file: the `files` reducer merges it, so concurrent
+    # tool calls never overwrite each other's updates
     return Command(
         update={
-            "files": files,
+            "files": {normalized_path: content},
             "messages": [
                 ToolMessage(f"Updated file {file_path}", tool_call_id=tool_call_id)
             ],
@@ -193,11 +193,10 @@ def edit_file(
         )  # Replace only first occurrence
         result_msg = f"Successfully replaced string in '{file_path}'"
 
-    # Update the mock filesystem using normalized path
-    mock_filesystem[normalized_path] = new_content
+    # Return only the edited file; state["files"] is shared and must not be mutated
     return Command(
         update={
-            "files": mock_filesystem,
+            "files": {normalized_path: new_content},
             "messages": [ToolMessage(result_msg, tool_call_id=tool_call_id)],
         }
     )